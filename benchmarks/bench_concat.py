@@ -0,0 +1,115 @@
+"""
+Plan build / compile time benchmark for concat_standalone.
+
+Compares the previous implementation (quadratic schema dedupe and a left deep union_all_by_name fold) against the balanced and flat unions
+for 10, 100 and 1,000 input dataframes with partially overlapping, mixed type schemas.
+
+By default a Snowpark local testing session is used, which measures the client side plan build time.
+With --connection <name> (a connection in connections.toml) the server side compile time is also
+measured with EXPLAIN, which compiles the statement without running it.
+
+| python benchmarks/bench_concat.py
+| python benchmarks/bench_concat.py --connection my_connection --sizes 10 100
+"""
+
+import argparse
+import sys
+import time
+
+from snowflake.snowpark import Session
+from snowflake.snowpark.types import StructType, StructField, IntegerType, FloatType, StringType
+
+from snowflake.snowpark.functions import lit
+
+from ice_pick.utils import concat_standalone
+
+
+def make_dfs(session: Session, n_dfs: int) -> list:
+    # each dataframe shares column A (int or float) and has 2 of 20 other columns
+    dfs = []
+    for i in range(n_dfs):
+        schema = StructType([
+            StructField("A", IntegerType() if i % 2 else FloatType()),
+            StructField(f"B_{i % 20}", StringType()),
+            StructField(f"C_{(i + 7) % 20}", IntegerType()),
+        ])
+        dfs.append(session.create_dataframe([[i, str(i), i]], schema))
+
+    return dfs
+
+
+def union_left_deep(session: Session, dfs: list):
+    # the previous implementation: quadratic struct dedupe (first type wins), an empty seed dataframe
+    # and a union_all_by_name fold one dataframe at a time
+    unique_structs = []
+    for df in dfs:
+        for struct in df.schema.fields:
+            if struct not in unique_structs:
+                unique_structs.append(struct)
+
+    struct_names = []
+    union_structs = []
+    for struct in unique_structs:
+        if struct.name not in struct_names:
+            struct_names.append(struct.name)
+            union_structs.append(struct)
+
+    union_df = session.create_dataframe([], StructType(union_structs))
+    for df in dfs:
+        df_names = [struct.name for struct in df.schema.fields]
+        for struct in union_structs:
+            if struct.name not in df_names:
+                df = df.with_column(struct.name, lit(None))
+        union_df = union_df.union_all_by_name(df)
+
+    return union_df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connection", default=None)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    if args.connection:
+        session = Session.builder.config("connection_name", args.connection).create()
+    else:
+        session = Session.builder.config("local_testing", True).create()
+
+    sys.setrecursionlimit(100_000)
+
+    methods = {
+        "left_deep": lambda dfs: union_left_deep(session, dfs),
+        "balanced": lambda dfs: concat_standalone(session, dfs, union_method="balanced"),
+    }
+    if args.connection:
+        methods["flat"] = lambda dfs: concat_standalone(session, dfs, union_method="flat")
+
+    print(f"{'inputs':>8} {'method':>10} {'build_s':>10} {'compile_s':>10}")
+    for n_dfs in args.sizes:
+        dfs = make_dfs(session, n_dfs)
+        for method, union in methods.items():
+            try:
+                union_df, build_seconds = timed(union, dfs)
+            except RecursionError:
+                print(f"{n_dfs:>8} {method:>10} {'recursion':>10}")
+                continue
+
+            compile_str = "-"
+            if args.connection:
+                sql = union_df.queries["queries"][-1]
+                _, compile_seconds = timed(lambda: session.sql(f"explain {sql}").collect())
+                compile_str = f"{compile_seconds:.3f}"
+
+            print(f"{n_dfs:>8} {method:>10} {build_seconds:>10.3f} {compile_str:>10}")
+
+
+if __name__ == "__main__":
+    main()
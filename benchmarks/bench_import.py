@@ -0,0 +1,60 @@
+"""
+Import time benchmark for ice_pick.
+
+Each statement runs in a fresh interpreter (so nothing is cached in sys.modules) and the median wall time
+of --repeat runs is reported, with the heavy dependencies that were imported.
+The "eager" row imports every submodule, which is what "import ice_pick" did before the lazy __init__.
+
+| python benchmarks/bench_import.py
+| python benchmarks/bench_import.py --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+STATEMENTS = {
+    "import ice_pick": "import ice_pick",
+    "version": "import ice_pick; ice_pick.__version__",
+    "simulator": "from ice_pick import WhatIfSimulator",
+    "warehouse": "from ice_pick import Warehouse",
+    "extend_session": "from ice_pick import extend_session",
+    "eager": "import ice_pick; [getattr(ice_pick, name) for name in ice_pick._SUBMODULES]",
+}
+
+HEAVY_MODULES = ["snowflake.snowpark", "pandas", "numpy"]
+
+TIMER = """
+import sys, time, json
+start = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_statement(statement: str) -> dict:
+    code = TIMER.format(statement=statement, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'statement':>16} {'median_s':>10}  loaded")
+    for name, statement in STATEMENTS.items():
+        runs = [time_statement(statement) for _ in range(args.repeat)]
+        median_seconds = statistics.median(run["seconds"] for run in runs)
+
+        print(f"{name:>16} {median_seconds:>10.3f}  {', '.join(runs[-1]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
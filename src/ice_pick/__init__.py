@@ -19,40 +19,198 @@ __all__ = [
     "NetworkPolicy",
     "ResourceMonitor",
     "SchemaObject",
+    "get_descriptions_bulk",
     "SchemaObjectFilter",
     "AccountObjectFilter",
     "extend_session",
     "concat_standalone",
     "melt_standalone",
+    "pivot_standalone",
+    "get_dummies_standalone",
+    "DummyEncoder",
+    "isna_standalone",
+    "isnull_standalone",
+    "null_profile_standalone",
     "Privilege",
     "Grant",
+    "get_account_grants",
+    "get_grants_bulk",
+    "PrivilegeIndex",
+    "FutureGrantIndex",
+    "get_future_grants",
+    "GrantReconciler",
+    "GrantPlan",
+    "WarehouseFleet",
+    "QueryHistorySync",
+    "OperatorStatsCache",
+    "GroupedRollup",
+    "aggregate_stream",
+    "RecommendationEngine",
+    "Rule",
+    "align_telemetry",
+    "AutoscaleController",
+    "AutoscalePolicy",
+    "SimulatedWarehouse",
+    "WhatIfSimulator",
+    "WarehouseConfig",
+    "attribute_credits",
+    "rollup_credits",
+    "get_table_statistics",
+    "get_statistics_bulk",
+    "StatisticsCache",
+    "deploy_procedures",
+    "run_procedure_locally",
+    "FakeSession",
+    "ObjectRegistry",
+    "get_registry",
 
 ]
 
 
+from typing import TYPE_CHECKING
+import importlib
+
 from ice_pick.version import VERSION
 
 __version__ = ".".join(str(x) for x in VERSION if x is not None)
 
 
-from ice_pick.schema_object import SchemaObject
-from ice_pick.filters import SchemaObjectFilter, AccountObjectFilter
+# Public names are imported on first access (PEP 562), so "import ice_pick" doesn't import Snowpark,
+# pandas, NumPy or any submodule, and "from ice_pick import Warehouse" only imports what Warehouse needs.
+_LAZY_ATTRIBUTES = {
+    "SchemaObject": "ice_pick.schema_object",
+    "get_descriptions_bulk": "ice_pick.schema_object",
+    "SchemaObjectFilter": "ice_pick.filters",
+    "AccountObjectFilter": "ice_pick.filters",
+    "AccountObject": "ice_pick.account_object",
+    "Account": "ice_pick.account_object",
+    "Warehouse": "ice_pick.account_object",
+    "Role": "ice_pick.account_object",
+    "User": "ice_pick.account_object",
+    "Database": "ice_pick.account_object",
+    "Schema": "ice_pick.account_object",
+    "Integration": "ice_pick.account_object",
+    "NetworkPolicy": "ice_pick.account_object",
+    "ResourceMonitor": "ice_pick.account_object",
+    "Privilege": "ice_pick.privileges",
+    "Grant": "ice_pick.privileges",
+    "PrivilegeIndex": "ice_pick.privileges",
+    "FutureGrantIndex": "ice_pick.privileges",
+    "get_account_grants": "ice_pick.privileges",
+    "get_grants_bulk": "ice_pick.privileges",
+    "get_future_grants": "ice_pick.privileges",
+    "GrantReconciler": "ice_pick.reconcile",
+    "GrantPlan": "ice_pick.reconcile",
+    "WarehouseFleet": "ice_pick.fleet",
+    "QueryHistorySync": "ice_pick.query_history",
+    "OperatorStatsCache": "ice_pick.query_history",
+    "GroupedRollup": "ice_pick.streaming",
+    "aggregate_stream": "ice_pick.streaming",
+    "RecommendationEngine": "ice_pick.recommendations",
+    "Rule": "ice_pick.recommendations",
+    "align_telemetry": "ice_pick.recommendations",
+    "AutoscaleController": "ice_pick.autoscaler",
+    "AutoscalePolicy": "ice_pick.autoscaler",
+    "SimulatedWarehouse": "ice_pick.autoscaler",
+    "WhatIfSimulator": "ice_pick.simulator",
+    "WarehouseConfig": "ice_pick.simulator",
+    "attribute_credits": "ice_pick.attribution",
+    "rollup_credits": "ice_pick.attribution",
+    "get_table_statistics": "ice_pick.statistics",
+    "get_statistics_bulk": "ice_pick.statistics",
+    "StatisticsCache": "ice_pick.statistics",
+    "deploy_procedures": "ice_pick.deploy",
+    "run_procedure_locally": "ice_pick.deploy",
+    "FakeSession": "ice_pick.deploy",
+    "ObjectRegistry": "ice_pick.registry",
+    "get_registry": "ice_pick.registry",
+    "extend_session": "ice_pick.extension",
+    "concat_standalone": "ice_pick.utils",
+    "melt_standalone": "ice_pick.utils",
+    "pivot_standalone": "ice_pick.utils",
+    "get_dummies_standalone": "ice_pick.utils",
+    "DummyEncoder": "ice_pick.utils",
+    "isna_standalone": "ice_pick.utils",
+    "isnull_standalone": "ice_pick.utils",
+    "null_profile_standalone": "ice_pick.utils",
+}
+
+_SUBMODULES = [
+    "account_object",
+    "attribution",
+    "autoscaler",
+    "deploy",
+    "extension",
+    "filters",
+    "fleet",
+    "privileges",
+    "query_history",
+    "recommendations",
+    "reconcile",
+    "registry",
+    "schema_object",
+    "simulator",
+    "statistics",
+    "streaming",
+    "utils",
+]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        # cache on the package so __getattr__ only runs once per name
+        globals()[name] = value
+        return value
+
+    if name in _SUBMODULES:
+        return importlib.import_module(f"ice_pick.{name}")
+
+    raise AttributeError(f"module 'ice_pick' has no attribute {name!r}")
+
 
-from ice_pick.account_object import (
-    AccountObject,
-    Account,
-    Warehouse, 
-    Role, 
-    User,
-    Database,
-    Schema,
-    Integration,
-    NetworkPolicy,
-    ResourceMonitor,
-)
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_SUBMODULES))
 
-from ice_pick.privileges import Privilege, Grant
 
-from ice_pick.extension import extend_session
-from ice_pick.utils import concat_standalone
-from ice_pick.utils import melt_standalone
+if TYPE_CHECKING:
+    from ice_pick.schema_object import SchemaObject, get_descriptions_bulk
+    from ice_pick.filters import SchemaObjectFilter, AccountObjectFilter
+    from ice_pick.account_object import (
+        AccountObject,
+        Account,
+        Warehouse,
+        Role,
+        User,
+        Database,
+        Schema,
+        Integration,
+        NetworkPolicy,
+        ResourceMonitor,
+    )
+    from ice_pick.privileges import (
+        Privilege,
+        Grant,
+        PrivilegeIndex,
+        FutureGrantIndex,
+        get_account_grants,
+        get_grants_bulk,
+        get_future_grants,
+    )
+    from ice_pick.reconcile import GrantReconciler, GrantPlan
+    from ice_pick.fleet import WarehouseFleet
+    from ice_pick.query_history import QueryHistorySync, OperatorStatsCache
+    from ice_pick.streaming import GroupedRollup, aggregate_stream
+    from ice_pick.recommendations import RecommendationEngine, Rule, align_telemetry
+    from ice_pick.autoscaler import AutoscaleController, AutoscalePolicy, SimulatedWarehouse
+    from ice_pick.simulator import WhatIfSimulator, WarehouseConfig
+    from ice_pick.attribution import attribute_credits, rollup_credits
+    from ice_pick.statistics import get_table_statistics, get_statistics_bulk, StatisticsCache
+    from ice_pick.deploy import deploy_procedures, run_procedure_locally, FakeSession
+    from ice_pick.registry import ObjectRegistry, get_registry
+    from ice_pick.extension import extend_session
+    from ice_pick.utils import concat_standalone
+    from ice_pick.utils import melt_standalone
+    from ice_pick.utils import pivot_standalone
+    from ice_pick.utils import get_dummies_standalone, DummyEncoder
+    from ice_pick.utils import isna_standalone, isnull_standalone, null_profile_standalone
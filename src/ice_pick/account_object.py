@@ -1,13 +1,14 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Iterator, Union, Tuple, Set
 import copy
 import re
 import configparser
 
 from snowflake.snowpark import Session
 import snowflake.snowpark as snowpark
-from ice_pick.utils import snowpark_query
+from ice_pick.utils import snowpark_query, snowpark_query_batches
 from ice_pick.schema_object import SchemaObject
+from ice_pick.registry import MetadataCache, resolve
 
 import pandas as pd
 
@@ -45,6 +46,8 @@ class AccountObject:
         self.session = session
         self.name = name
         self.object_type = object_type
+        # memoized ddl, description and grants (shared through the session's identity map)
+        self._metadata = MetadataCache()
 
     def __repr__(self):
         return (
@@ -52,9 +55,14 @@ class AccountObject:
             f"(session={self.session!r}, name={self.name!r}, object_type={self.object_type!r})"
         )
 
-    def get_description(self):
+    def invalidate(self):
+        """ drop the memoized metadata, ex: after the object was changed outside of ice_pick """
+        self._metadata.invalidate()
+
+    def get_description(self, refresh: bool = False):
         """
         Return the description of the object as a string
+        (memoized until refresh = True or the object is changed through ice_pick)
 
         Supports:
         - DATABASE
@@ -84,13 +92,15 @@ class AccountObject:
 
         desc_sql = f"""describe {self.object_type} 
                     "{self.name}";"""
-        desc_df = snowpark_query(self.session, desc_sql, non_select=True)
 
-        return desc_df
+        return self._metadata.get(
+            "description", lambda: snowpark_query(self.session, desc_sql, non_select=True), refresh
+        )
 
-    def get_ddl(self, fully_qualified:bool = True) -> str:
+    def get_ddl(self, fully_qualified:bool = True, refresh: bool = False) -> str:
         """
         Return the ddl of the account object as a string
+        (memoized until refresh = True or the object is changed through ice_pick)
 
         Supports:
         - DATABASE
@@ -107,9 +117,10 @@ class AccountObject:
 
         ddl_sql = f"""select get_ddl('{self.object_type}',
                 '{self.name}', {str(fully_qualified).lower()} );"""
-        ddl_df = snowpark_query(self.session, ddl_sql)
 
-        ddl_str = ddl_df.iloc[0][0]
+        ddl_str = self._metadata.get(
+            ("ddl", fully_qualified), lambda: snowpark_query(self.session, ddl_sql).iloc[0, 0], refresh
+        )
 
         # load to state to help create object (might use later)
         self.ddl_str = ddl_str
@@ -144,16 +155,16 @@ class AccountObject:
         return ddl_str
 
 
-    def get_grants_on(self):
+    def get_grants_on(self, refresh: bool = False):
         """
-        Supports:
-
+        Return the grants on the object
+        (memoized until refresh = True or the object is changed through ice_pick)
         """
         grants_sql = f""" show grants on {self.object_type} "{self.name}" """
 
-        grants_df = snowpark_query(self.session, grants_sql, non_select=True)
-
-        return grants_df
+        return self._metadata.get(
+            "grants_on", lambda: snowpark_query(self.session, grants_sql, non_select=True), refresh
+        )
     
 
     def get_grant_objects(self) -> list:
@@ -164,11 +175,8 @@ class AccountObject:
         
             return []
         
-        grants_sql = f""" show grants on {self.object_type} "{self.name}" """
-
-        grants_df = snowpark_query(self.session, grants_sql, non_select=True)
+        grants_df = self.get_grants_on()
 
-        
         if "privilege" not in grants_df.columns.tolist():
             # need to look into this case
             # I think it is for the information schema maybe?
@@ -176,15 +184,20 @@ class AccountObject:
         
         
         # create privilege
-        grants_df['Privilege_Obj'] = grants_df.apply(lambda x: ice_pick.privileges.Privilege(self, x['privilege']), axis = 1)
-        
-        grants_df['Role_Obj'] = grants_df['granted_to'].apply(lambda x: Role(self.session, x))
-       
-        grants_df['Grant_Obj'] = grants_df.apply(
-            lambda x: ice_pick.privileges.Grant(
-            self.session, x['Privilege_Obj'], x['Role_Obj'], x['privilege']), axis=1 )
-        
-        grant_objects = grants_df['Grant_Obj'].tolist()
+        # only create one Privilege/Role object per distinct value
+        privilege_objs = {
+            privilege: ice_pick.privileges.Privilege(self, privilege)
+            for privilege in grants_df['privilege'].unique()
+        }
+        role_objs = {
+            grantee: resolve(self.session, Role, grantee)
+            for grantee in grants_df['grantee_name'].unique()
+        }
+
+        grant_objects = [
+            ice_pick.privileges.Grant(self.session, privilege_objs[privilege], role_objs[grantee], privilege)
+            for privilege, grantee in zip(grants_df['privilege'], grants_df['grantee_name'])
+        ]
 
         return grant_objects
     
@@ -202,6 +215,7 @@ class AccountObject:
         drop_sql = f""" drop {self.object_type} if exists "{self.name}" """
 
         drop_df = snowpark_query(self.session, drop_sql, non_select=True)
+        self.invalidate()
 
         return drop_df
 
@@ -217,6 +231,7 @@ class AccountObject:
         undrop_sql = f""" undrop {self.object_type} "{self.name}" """
 
         undrop_df = snowpark_query(self.session, undrop_sql, non_select=True)
+        self.invalidate()
 
         return undrop_df
 
@@ -233,6 +248,7 @@ class AccountObject:
         create_sql = f""" create {replace_str} {self.object_type} "{self.name}" """
 
         create_df = snowpark_query(self.session, create_sql, non_select=True)
+        self.invalidate()
 
         return create_df
 
@@ -251,17 +267,26 @@ class Role(AccountObject):
 
         return
 
-    def show_grants_to(self):
+    def show_grants_to(self, refresh: bool = False):
+        """
+        return dataframe with the grants to the role
+        (memoized, so crawling many users only shows the grants of a shared role once)
+        """
         show_grants_sql = f""" show grants to role {self.name}"""
 
-        grants_to_df = snowpark_query(self.session, show_grants_sql, non_select=True)
-
-        return grants_to_df
+        return self._metadata.get(
+            "grants_to", lambda: snowpark_query(self.session, show_grants_sql, non_select=True), refresh
+        )
 
-    def show_future_grants(self):
+    def show_future_grants(self) -> pd.DataFrame:
+        """
+        return dataframe with the future grants to the role
+        """
         show_grants_sql = f""" show future grants to role {self.name}"""
 
-        return
+        future_grants_df = snowpark_query(self.session, show_grants_sql, non_select=True)
+
+        return future_grants_df
 
     def show_grants_recursive(self):
         """
@@ -305,45 +330,44 @@ class User(AccountObject):
 
         role_name_list = grants_to_df["role"].unique().tolist()
 
-        role_objs = [Role(self.session, role_name) for role_name in role_name_list]
+        role_objs = [resolve(self.session, Role, role_name) for role_name in role_name_list]
 
         return role_objs
 
     def get_all_privileges(self) -> pd.DataFrame:
         """
         return all privileges for a user
+        (including privileges inherited through granted roles and the PUBLIC role)
 
         """
+        all_privileges_df, _ = self._crawl_privileges()
 
-        show_grants_sql = f""" show grants to user PRESTONT4"""
+        return all_privileges_df
+
+    def _crawl_privileges(self) -> Tuple[pd.DataFrame, Set[str]]:
+        # the privileges and every role in the hierarchy, including roles without current grants
+        show_grants_sql = f""" show grants to user {self.name}"""
 
         grants_to_user_df = snowpark_query(
             self.session, show_grants_sql, non_select=True
         )
 
-        user_role_list = grants_to_user_df["role"].unique().tolist()
-
-        user_role_obj_list = [
-            self.session.Role(user_role) for user_role in user_role_list
-        ]
-
-        user_role_dfs = [
-            user_role_obj.show_grants_to() for user_role_obj in user_role_obj_list
-        ]
-
-        comb_user_roles_df = pd.concat(user_role_dfs)
-
-        role_list = (
-            comb_user_roles_df[comb_user_roles_df["granted_on"] == "ROLE"]["name"]
-            .unique()
-            .tolist()
-        )
+        role_list = ["PUBLIC"]
+        if "role" in grants_to_user_df.columns:
+            role_list = grants_to_user_df["role"].unique().tolist() + role_list
 
+        # crawl the role hierarchy, only showing grants once per role
+        crawled_roles = set()
         all_privileges_dfs = []
         while role_list:
-            role_obj_list = [self.session.Role(role) for role in role_list]
+            role_list = [role for role in dict.fromkeys(role_list) if role not in crawled_roles]
+            crawled_roles.update(role_list)
+
+            role_dfs = [resolve(self.session, Role, role).show_grants_to() for role in role_list]
+            role_dfs = [role_df for role_df in role_dfs if not role_df.empty]
 
-            role_dfs = [role_obj.show_grants_to() for role_obj in role_obj_list]
+            if not role_dfs:
+                break
 
             comb_role_dfs = pd.concat(role_dfs)
 
@@ -352,30 +376,54 @@ class User(AccountObject):
             role_grants_df = comb_role_dfs[comb_role_dfs["granted_on"] == "ROLE"]
             role_list = role_grants_df["name"].unique().tolist()
 
+        if not all_privileges_dfs:
+            return pd.DataFrame(columns=["privilege", "granted_on", "name", "grantee_name"]), crawled_roles
+
         all_privileges_df = pd.concat(all_privileges_dfs)
 
-        # add back in initial privileges:
-        all_privileges_df = pd.concat([all_privileges_df, comb_user_roles_df])
+        return all_privileges_df, crawled_roles
 
-        return all_privileges_df
+    def privilege_index(self, refresh: bool = False, future_index=None):
+        """
+        return a PrivilegeIndex of all privileges for the user.
+        The index is built once from get_all_privileges() and reused until refresh = True.
+        Pass an account wide FutureGrantIndex to also predict access to new objects
+        (the future index can be shared between users).
+        """
+        if refresh or getattr(self, "_privilege_index", None) is None:
+            all_privileges_df, roles = self._crawl_privileges()
+            self._privilege_index = ice_pick.privileges.PrivilegeIndex(
+                all_privileges_df, future_index, roles=roles
+            )
+        elif future_index is not None:
+            self._privilege_index.future_index = future_index
+
+        return self._privilege_index
 
     def check_privilege(self, schema_object: SchemaObject) -> list:
         """
-        maybe a quick way to show privilege on object?
+        return the user's privileges on a schema object
 
         """
-        all_privileges_df = self.get_all_privileges()
+        privileges = self.privilege_index().lookup(
+            schema_object.object_type,
+            f"{schema_object.database}.{schema_object.schema}.{schema_object.object_name}",
+        )
 
-        obj_privileges_df = all_privileges_df[
-            all_privileges_df["name"]
-            == f"{schema_object.database}.{schema_object.schema}.{schema_object.object_name}"
-        ]
+        return sorted(privileges)
 
-        obj_privileges_df
+    def check_privileges(self, schema_objects: List[SchemaObject]) -> pd.DataFrame:
+        """
+        return the user's privileges on many schema objects in one call
+        (see PrivilegeIndex.check_privileges for the returned columns)
 
-        obj_privileges = obj_privileges_df["privilege"].tolist()
+        Example
+        -------
+        | >> objs = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"]).return_schema_objects()
+        | >> session.user("USER1").check_privileges(objs)
 
-        return obj_privileges
+        """
+        return self.privilege_index().check_privileges(schema_objects)
 
 
 class Warehouse(AccountObject):
@@ -389,20 +437,20 @@ class Warehouse(AccountObject):
     def suspend(self):
         suspend_sql = f""" alter warehouse if exists {self.name} suspend"""
         suspend_df = snowpark_query(self.session, suspend_sql, non_select=True)
-        suspend_str = suspend_df.iloc[0][0]
+        suspend_str = suspend_df.iloc[0, 0]
 
         return suspend_str
 
     def resume(self):
         resume_sql = f""" alter warehouse if exists {self.name} resume"""
         resume_df = snowpark_query(self.session, resume_sql, non_select=True)
-        resume_str = resume_df.iloc[0][0]
+        resume_str = resume_df.iloc[0, 0]
 
         return resume_str
 
     def load_history(
-        self, date_range_start: int, date_range_end: int, interval: str = "hour"
-    ) -> pd.DataFrame:
+        self, date_range_start: int, date_range_end: int, interval: str = "hour", stream: bool = False
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         This function returns warehouse activity within the last 14 days.
         This funciton requires elevated privileges to run, either:
@@ -420,11 +468,13 @@ class Warehouse(AccountObject):
             end of hours/days ago interval
         interval: str
             set the date range to either "days" or "hours"
+        stream: bool
+            return an iterator of pandas dataframe chunks instead of a single dataframe
 
         Returns
         -------
-        snowpark.DataFrame
-            A snowpark dataframe with the unioned input dataframes
+        pd.DataFrame
+            A pandas dataframe with the load history (or an iterator of chunks when stream = True)
 
         Example
         -------
@@ -448,13 +498,16 @@ class Warehouse(AccountObject):
                                                   DATE_RANGE_END => dateadd('{interval}', -{date_range_end}, current_date()),
                                                   WAREHOUSE_NAME => '{self.name}'))"""
 
+        if stream:
+            return snowpark_query_batches(self.session, wh_load_sql)
+
         load_hist_df = snowpark_query(self.session, wh_load_sql)
 
         return load_hist_df
 
     def metering_history(
-        self, date_range_start: int, date_range_end: int, interval: str = "hour"
-    ):
+        self, date_range_start: int, date_range_end: int, interval: str = "hour", stream: bool = False
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
         """
         This table function can be used in queries to return the hourly credit usage for a single warehouse (or all the warehouses in your account) within a specified date range.
         This funciton requires elevated privileges to run, either:
@@ -470,11 +523,13 @@ class Warehouse(AccountObject):
             end of hours/days ago interval
         interval: str
             set the date range to either "days" or "hours"
+        stream: bool
+            return an iterator of pandas dataframe chunks instead of a single dataframe
 
         Returns
         -------
-        snowpark.DataFrame
-            A snowpark dataframe with the unioned input dataframes
+        pd.DataFrame
+            A pandas dataframe with the metering history (or an iterator of chunks when stream = True)
 
         Example
         -------
@@ -496,6 +551,9 @@ class Warehouse(AccountObject):
                                                   DATE_RANGE_END => dateadd('{interval}', -{date_range_end}, current_date()),
                                                   WAREHOUSE_NAME => '{self.name}'))"""
 
+        if stream:
+            return snowpark_query_batches(self.session, wh_meter_sql)
+
         meter_hist_df = snowpark_query(self.session, wh_meter_sql)
 
         return meter_hist_df
@@ -506,7 +564,13 @@ class Warehouse(AccountObject):
         date_range_end: int,
         interval: str = "hour",
         result_limit: int = 1000,
-    ):
+        stream: bool = False,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Return the query history of the warehouse (capped at result_limit, max 10,000).
+        With stream = True an iterator of pandas dataframe chunks is returned instead
+        (see ice_pick.streaming for chunk wise aggregation).
+        """
         wh_query_hist = f"""select * from 
                             table (information_schema.QUERY_HISTORY_BY_WAREHOUSE(
                                 WAREHOUSE_NAME => '{self.name}', 
@@ -514,11 +578,40 @@ class Warehouse(AccountObject):
                                 END_TIME_RANGE_END => dateadd('hours',{date_range_end},current_timestamp()),
                                 RESULT_LIMIT => {result_limit} )
                                 );"""
+        if stream:
+            return snowpark_query_batches(self.session, wh_query_hist)
+
         meter_hist_df = snowpark_query(self.session, wh_query_hist)
 
         return meter_hist_df
 
-    def resize_recommendation(self, auto_apply: bool = False) -> str:
+    def sync_query_history(
+        self, path: str = None, lookback_hours: float = 24, storage: str = "sqlite"
+    ) -> pd.DataFrame:
+        """
+        Incrementally sync the complete query history of the warehouse to local storage,
+        paging past RESULT_LIMIT (see QueryHistorySync).
+        Returns the newly fetched queries.
+
+        Example
+        -------
+        | >> warehouse.sync_query_history("compute_wh_history.db", lookback_hours=72)
+        """
+        path = path or f"{self.name.lower()}_query_history.db"
+        history_sync = ice_pick.query_history.QueryHistorySync(
+            self.session, self.name, path=path, storage=storage
+        )
+
+        return history_sync.sync(lookback_hours=lookback_hours)
+
+    def resize_recommendation(
+        self,
+        auto_apply: bool = False,
+        top_n: int = 5,
+        query_df: pd.DataFrame = None,
+        max_workers: int = 8,
+        operator_stats_cache=None,
+    ) -> str:
         """
         Keeping this simple as a starting point.
         In most cases rules should be customized for individual use cases.
@@ -537,41 +630,53 @@ class Warehouse(AccountObject):
         | - And: Local disk spillage over the last 3 days > 2% for the longest running queries
         | - Then: recommend scaling up
 
-        """
-        query_df = self.query_history(36, 0, interval="hour", result_limit=1000)
+        Operator stats for the top queries are cached permanently by query id once the queries
+        finished (see OperatorStatsCache) and fetched concurrently, so larger samples (top_n of 50-500)
+        are cheap to recompute on a schedule. Local disk spillage is averaged per query first
+        (see summarize_operator_stats), so queries with many operators don't dominate.
+
+        Parameters
+        ----------
+        auto_apply : bool = False
+            apply the recommendation one step at a time within the default AutoscalePolicy limits
+            (see AutoscaleController for scheduled scaling with hysteresis and cooldowns)
+        top_n : int = 5
+            the number of longest running / longest queued queries to sample
+        query_df : pd.DataFrame = None
+            query history to use instead of fetching the last 36 hours
+            (ex: from QueryHistorySync.load())
+        max_workers : int = 8
+            the number of concurrent operator stats queries
+        operator_stats_cache : OperatorStatsCache = None
+            the cache to use, defaults to a process wide cache
+
+        """
+        if query_df is None:
+            query_df = self.query_history(36, 0, interval="hour", result_limit=1000)
 
         # filter out queries that don't use warehouse compute
         query_df = query_df[pd.notna(query_df["WAREHOUSE_SIZE"])]
 
-        top_5_queries_df = query_df.nlargest(5, "EXECUTION_TIME")
-
-        top_5_query_list = top_5_queries_df["QUERY_ID"].tolist()
-
-        # combine querys so we just make one request
+        top_queries_df = query_df.nlargest(top_n, "EXECUTION_TIME")
 
-        execution_queries = []
-        for query in top_5_query_list:
-            execution_sql = f"""select 
-            EXECUTION_TIME_BREAKDOWN:local_disk_io as local_disk,
-            EXECUTION_TIME_BREAKDOWN:remote_disk_io as remote_disk,
-            EXECUTION_TIME_BREAKDOWN:processing as processing
-                from table(get_query_operator_stats('{query}'))
-            """
-            execution_queries.append(execution_sql)
-
-        execution_queries_sql = " union ".join(execution_queries)
+        top_query_list = top_queries_df["QUERY_ID"].tolist()
 
-        top_query_df = snowpark_query(self.session, execution_queries_sql)
+        if operator_stats_cache is None:
+            operator_stats_cache = ice_pick.query_history.OPERATOR_STATS_CACHE
 
-        mean_local_disk_pct = (
-            top_query_df[pd.notna(top_query_df["LOCAL_DISK"])]["LOCAL_DISK"]
-            .astype(float)
-            .mean()
-            * 100
+        top_query_df = operator_stats_cache.get(
+            self.session,
+            top_query_list,
+            max_workers=max_workers,
+            final_query_ids=ice_pick.query_history.final_query_ids(top_queries_df),
         )
+        top_query_df["LOCAL_DISK"] = top_query_df["LOCAL_DISK"].astype(float)
+        query_stats_df = ice_pick.query_history.summarize_operator_stats(top_query_df)
+
+        mean_local_disk_pct = query_stats_df["LOCAL_DISK_MEAN"].mean() * 100
 
-        # mean overload time of top 5 longest queued time queries
-        mean_queued_overload_time = query_df["QUEUED_OVERLOAD_TIME"].nlargest(5).mean()
+        # mean overload time of top n longest queued time queries
+        mean_queued_overload_time = query_df["QUEUED_OVERLOAD_TIME"].nlargest(top_n).mean()
 
         wh_recommendation = "No Change"
 
@@ -585,8 +690,7 @@ class Warehouse(AccountObject):
             wh_recommendation = "Size Up"
 
         if auto_apply:
-            # TODO
-            pass
+            ice_pick.autoscaler.apply_action(self, wh_recommendation, ice_pick.autoscaler.AutoscalePolicy())
 
         return wh_recommendation
 
@@ -622,32 +726,15 @@ class Warehouse(AccountObject):
         | >> warehouse.resize("SMALL")
 
         """
-        wh_size_list = [
-            "XSMALL",
-            "SMALL",
-            "MEDIUM",
-            "LARGE",
-            "XLARGE",
-            "2XLARGE",
-            "XXLARGE",
-            "3XLARGE",
-            "XXXLARGE",
-            "4XLARGE",
-            "5XLARGE",
-            "6XLARGE",
-        ]
-
-        if wh_size.replace("-", "").upper() in wh_size_list:
-            resize_sql = f""" alter warehouse if exists {self.name}
-                            set WAREHOUSE_SIZE = {wh_size}
-            """
-            resize_df = snowpark_query(self.session, resize_sql, non_select=True)
-            resize_str = resize_df.iloc[0][0]
-        else:
-            resize_str = f"""selected warehouse size not supported: 
-                         supported warehouse sizes: {wh_size_list}"""
+        # raises a ValueError for unsupported sizes, ex: "2X-Large" -> X2LARGE
+        wh_size = ice_pick.autoscaler.sql_size(wh_size)
 
-            raise ValueError(resize_str)
+        resize_sql = f""" alter warehouse if exists {self.name}
+                        set WAREHOUSE_SIZE = {wh_size}
+        """
+        resize_df = snowpark_query(self.session, resize_sql, non_select=True)
+        resize_str = resize_df.iloc[0, 0]
+        self.invalidate()
 
         return resize_str
 
@@ -678,10 +765,78 @@ class Warehouse(AccountObject):
                             set AUTO_SUSPEND = {seconds}
             """
         suspend_df = snowpark_query(self.session, suspend_sql, non_select=True)
-        suspend_str = suspend_df.iloc[0][0]
+        suspend_str = suspend_df.iloc[0, 0]
+        self.invalidate()
 
         return suspend_str
 
+    def set_cluster_count(self, min_cluster_count: int, max_cluster_count: int):
+        """
+        Set the minimum and maximum number of clusters for a multi-cluster warehouse
+        (requires Enterprise Edition or higher)
+
+        Parameters
+        ----------
+        min_cluster_count : int
+            the minimum number of clusters
+        max_cluster_count : int
+            the maximum number of clusters
+
+        Returns
+        -------
+        str
+            a string with execution status
+
+        Example
+        -------
+        | >> warehouse.set_cluster_count(1, 3)
+        """
+        if not 1 <= min_cluster_count <= max_cluster_count:
+            raise ValueError(
+                f"cluster counts must satisfy 1 <= min_cluster_count <= max_cluster_count: "
+                f"got {min_cluster_count}, {max_cluster_count}"
+            )
+
+        cluster_sql = f""" alter warehouse if exists {self.name}
+                            set MIN_CLUSTER_COUNT = {min_cluster_count} MAX_CLUSTER_COUNT = {max_cluster_count}
+            """
+        cluster_df = snowpark_query(self.session, cluster_sql, non_select=True)
+        cluster_str = cluster_df.iloc[0, 0]
+        self.invalidate()
+
+        return cluster_str
+
+    def get_settings(self) -> dict:
+        """
+        Return the current scaling settings of the warehouse
+
+        Returns
+        -------
+        dict
+            | - size (normalized, ex: "XSMALL", "2XLARGE")
+            | - min_cluster_count
+            | - max_cluster_count
+            | - auto_suspend (seconds)
+        """
+        # "_" and "%" are wildcards in like patterns: escape them and keep the exact match only
+        name_pattern = re.sub(r"([_%\\])", r"\\\\\1", self.name.replace("'", "''"))
+        settings_sql = f""" show warehouses like '{name_pattern}' """
+        settings_df = snowpark_query(self.session, settings_sql, non_select=True)
+        # the alter statements use the unquoted name, so it resolves case insensitively
+        settings_df = settings_df[settings_df["name"].str.upper() == self.name.upper()]
+        if settings_df.empty:
+            raise ValueError(f"warehouse {self.name} does not exist")
+
+        settings = settings_df.iloc[0]
+        auto_suspend = settings["auto_suspend"]
+
+        return {
+            "size": ice_pick.autoscaler.normalize_size(settings["size"]),
+            "min_cluster_count": int(settings["min_cluster_count"]),
+            "max_cluster_count": int(settings["max_cluster_count"]),
+            "auto_suspend": int(auto_suspend) if pd.notna(auto_suspend) else 0,
+        }
+
 
 # ---------------    In Progress    ------------------
 class Database(AccountObject):
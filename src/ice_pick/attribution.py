@@ -0,0 +1,250 @@
+"""
+Per query credit attribution.
+Warehouse credits from metering history are apportioned to the queries that ran in each metering interval
+by execution time share, then rolled up by user, role, query tag or normalized query text.
+
+Each query's execution interval (END_TIME - EXECUTION_TIME, END_TIME) is split across the metering
+intervals it overlaps with a sorted merge (searchsorted on the sorted interval starts), so the join is
+vectorized and scales to millions of queries.
+
+Credits billed while no query was running (auto suspend tails, gaps between queries) are idle credits.
+They are either spread over the interval's queries by execution time share (idle_allocation="proportional")
+or left unattributed (idle_allocation="none").
+Metering intervals without any queries are always left unattributed.
+"""
+
+from typing import List, Union
+
+import pandas as pd
+import numpy as np
+
+from ice_pick.autoscaler import WAREHOUSE_CREDITS_PER_HOUR, normalize_size
+
+
+IDLE_ALLOCATIONS = ["proportional", "none"]
+
+QUERY_DIMENSIONS = ["USER_NAME", "ROLE_NAME", "QUERY_TAG", "QUERY_TEXT", "WAREHOUSE_SIZE"]
+
+
+def _epoch_seconds(times: pd.Series) -> np.ndarray:
+    times = pd.to_datetime(times, utc=True)
+
+    return (times - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy(dtype=float)
+
+
+def _size_credits_per_hour(sizes: pd.Series) -> np.ndarray:
+    size_map = {size: WAREHOUSE_CREDITS_PER_HOUR[normalize_size(size)] for size in sizes.dropna().unique()}
+
+    return sizes.map(size_map).to_numpy(dtype=float)
+
+
+def normalize_query_text(query_text: pd.Series) -> pd.Series:
+    """
+    Normalize query text so queries that only differ by literals group together:
+    string and number literals are replaced with ?, whitespace is collapsed and the text is lower cased
+    """
+    return (
+        query_text.fillna("")
+        .astype(str)
+        .str.replace(r"'(?:[^']|'')*'", "?", regex=True)
+        .str.replace(r"\b\d+(?:\.\d+)?\b", "?", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def _split_intervals(
+    query_starts: np.ndarray,
+    query_ends: np.ndarray,
+    interval_starts: np.ndarray,
+    interval_ends: np.ndarray,
+):
+    """
+    Split query intervals across sorted, non overlapping metering intervals.
+
+    Returns
+    -------
+    (query positions, interval positions, overlap start, overlap end) for every (query, interval) overlap
+    """
+    first = np.searchsorted(interval_starts, query_starts, side="right") - 1
+    first = np.maximum(first, 0)
+    last = np.searchsorted(interval_starts, query_ends, side="left") - 1
+    pieces = np.maximum(last - first + 1, 0)
+
+    query_positions = np.repeat(np.arange(len(query_starts)), pieces)
+    # offsets 0..pieces-1 within each query
+    offsets = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    interval_positions = first[query_positions] + offsets
+
+    overlap_starts = np.maximum(query_starts[query_positions], interval_starts[interval_positions])
+    overlap_ends = np.minimum(query_ends[query_positions], interval_ends[interval_positions])
+    keep = overlap_ends > overlap_starts
+
+    return query_positions[keep], interval_positions[keep], overlap_starts[keep], overlap_ends[keep]
+
+
+def _busy_seconds(interval_positions: np.ndarray, starts: np.ndarray, ends: np.ndarray, n_intervals: int) -> np.ndarray:
+    """ the length of the union of the query pieces in each interval """
+    order = np.lexsort((starts, interval_positions))
+    interval_positions, starts, ends = interval_positions[order], starts[order], ends[order]
+
+    pieces_df = pd.DataFrame({"interval": interval_positions, "end": ends})
+    running_end = pieces_df.groupby("interval")["end"].cummax().to_numpy()
+    previous_end = np.concatenate(([-np.inf], running_end[:-1]))
+    group_start = np.concatenate(([True], interval_positions[1:] != interval_positions[:-1]))
+    previous_end[group_start] = -np.inf
+
+    contribution = np.maximum(ends - np.maximum(starts, previous_end), 0)
+
+    return np.bincount(interval_positions, weights=contribution, minlength=n_intervals)
+
+
+def attribute_credits(
+    metering_df: pd.DataFrame,
+    query_df: pd.DataFrame,
+    idle_allocation: str = "proportional",
+) -> pd.DataFrame:
+    """
+    Apportion warehouse credits to queries.
+
+    Parameters
+    ----------
+    metering_df : pd.DataFrame
+        warehouse metering history (ex: WarehouseFleet.metering_history) with the columns
+        WAREHOUSE_NAME, START_TIME, END_TIME and CREDITS_USED_COMPUTE or CREDITS_USED
+    query_df : pd.DataFrame
+        query history (ex: WarehouseFleet.query_history) with the columns
+        QUERY_ID, WAREHOUSE_NAME, END_TIME, EXECUTION_TIME (ms) and optionally
+        WAREHOUSE_SIZE (used to estimate idle credits), USER_NAME, ROLE_NAME, QUERY_TAG, QUERY_TEXT
+    idle_allocation : str = "proportional"
+        "proportional" spreads idle credits over the interval's queries by execution time share,
+        "none" leaves idle credits unattributed (CREDITS_IDLE = 0)
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per query with QUERY_ID, WAREHOUSE_NAME, EXECUTION_SECONDS, CREDITS_COMPUTE,
+        CREDITS_IDLE, CREDITS and any available query dimensions
+
+    Example
+    -------
+        | >> fleet = WarehouseFleet(session)
+        | >> attribution_df = attribute_credits(fleet.metering_history(24, 0), fleet.query_history(24, 0))
+        | >> rollup_credits(attribution_df, "USER_NAME")
+    """
+    if idle_allocation not in IDLE_ALLOCATIONS:
+        raise ValueError(f"idle_allocation {idle_allocation} not supported: supported: {IDLE_ALLOCATIONS}")
+
+    metering_df = metering_df.reset_index() if "WAREHOUSE_NAME" in (metering_df.index.names or []) else metering_df
+    query_df = query_df.reset_index() if "WAREHOUSE_NAME" in (query_df.index.names or []) else query_df
+    query_df = query_df[pd.notna(query_df["WAREHOUSE_NAME"])].reset_index(drop=True)
+
+    credit_column = "CREDITS_USED_COMPUTE" if "CREDITS_USED_COMPUTE" in metering_df.columns else "CREDITS_USED"
+    interval_starts = _epoch_seconds(metering_df["START_TIME"])
+    interval_ends = (
+        _epoch_seconds(metering_df["END_TIME"]) if "END_TIME" in metering_df.columns else interval_starts + 3600
+    )
+    interval_credits = pd.to_numeric(metering_df[credit_column]).fillna(0).to_numpy(dtype=float)
+    interval_warehouses = metering_df["WAREHOUSE_NAME"].to_numpy(dtype=object)
+
+    query_ends = _epoch_seconds(query_df["END_TIME"])
+    execution_seconds = pd.to_numeric(query_df["EXECUTION_TIME"]).fillna(0).to_numpy(dtype=float) / 1000
+    query_starts = query_ends - execution_seconds
+    query_warehouses = query_df["WAREHOUSE_NAME"].to_numpy(dtype=object)
+    query_rates = (
+        _size_credits_per_hour(query_df["WAREHOUSE_SIZE"])
+        if "WAREHOUSE_SIZE" in query_df.columns else np.full(len(query_df), np.nan)
+    )
+
+    # sorted merge per warehouse, positions are mapped back to the original rows
+    query_positions, interval_positions, overlap_starts, overlap_ends = [], [], [], []
+    interval_groups = pd.Series(np.arange(len(metering_df))).groupby(interval_warehouses).indices
+    for warehouse, query_rows in pd.Series(np.arange(len(query_df))).groupby(query_warehouses).indices.items():
+        interval_rows = interval_groups.get(warehouse)
+        if interval_rows is None:
+            continue
+
+        interval_rows = interval_rows[np.argsort(interval_starts[interval_rows], kind="stable")]
+        q_pos, i_pos, o_starts, o_ends = _split_intervals(
+            query_starts[query_rows], query_ends[query_rows],
+            interval_starts[interval_rows], interval_ends[interval_rows],
+        )
+        query_positions.append(query_rows[q_pos])
+        interval_positions.append(interval_rows[i_pos])
+        overlap_starts.append(o_starts)
+        overlap_ends.append(o_ends)
+
+    if query_positions:
+        query_positions = np.concatenate(query_positions)
+        interval_positions = np.concatenate(interval_positions)
+        overlap_starts = np.concatenate(overlap_starts)
+        overlap_ends = np.concatenate(overlap_ends)
+    else:
+        query_positions = interval_positions = np.array([], dtype=int)
+        overlap_starts = overlap_ends = np.array([], dtype=float)
+
+    n_intervals = len(metering_df)
+    overlap_seconds = overlap_ends - overlap_starts
+    interval_execution = np.bincount(interval_positions, weights=overlap_seconds, minlength=n_intervals)
+    interval_busy = _busy_seconds(interval_positions, overlap_starts, overlap_ends, n_intervals)
+
+    # billed seconds from the warehouse size, unknown sizes are treated as fully active
+    interval_rate = np.full(n_intervals, np.nan)
+    if len(interval_positions):
+        np.fmax.at(interval_rate, interval_positions, query_rates[query_positions])
+    billed_seconds = interval_credits / interval_rate * 3600
+    active_fraction = np.where(
+        np.isnan(billed_seconds), 1.0, np.clip(interval_busy / np.where(billed_seconds > 0, billed_seconds, 1), 0, 1)
+    )
+    compute_credits = interval_credits * active_fraction
+    idle_credits = interval_credits - compute_credits
+
+    share = overlap_seconds / np.where(interval_execution > 0, interval_execution, 1)[interval_positions]
+    n_queries = len(query_df)
+    query_compute = np.bincount(
+        query_positions, weights=share * compute_credits[interval_positions], minlength=n_queries
+    )
+    query_idle = np.bincount(query_positions, weights=share * idle_credits[interval_positions], minlength=n_queries)
+    if idle_allocation == "none":
+        query_idle = np.zeros(n_queries)
+
+    attribution_df = pd.DataFrame({
+        "QUERY_ID": query_df["QUERY_ID"].to_numpy(),
+        "WAREHOUSE_NAME": query_warehouses,
+        "EXECUTION_SECONDS": execution_seconds,
+        "CREDITS_COMPUTE": query_compute,
+        "CREDITS_IDLE": query_idle,
+        "CREDITS": query_compute + query_idle,
+    })
+    for dimension in QUERY_DIMENSIONS:
+        if dimension in query_df.columns:
+            attribution_df[dimension] = query_df[dimension].to_numpy()
+
+    return attribution_df
+
+
+def rollup_credits(attribution_df: pd.DataFrame, by: Union[str, List[str]] = "USER_NAME") -> pd.DataFrame:
+    """
+    Roll up attributed credits, ex: by "USER_NAME", "ROLE_NAME", "QUERY_TAG" or "QUERY_TEXT".
+    Rolling up by "QUERY_TEXT" groups on the normalized query text (see normalize_query_text).
+
+    Returns
+    -------
+    pd.DataFrame
+        QUERIES, EXECUTION_SECONDS, CREDITS_COMPUTE, CREDITS_IDLE, CREDITS per group, sorted by CREDITS
+    """
+    by = [by] if isinstance(by, str) else list(by)
+
+    if "QUERY_TEXT" in by:
+        attribution_df = attribution_df.assign(QUERY_TEXT=normalize_query_text(attribution_df["QUERY_TEXT"]))
+
+    rollup_df = attribution_df.groupby(by, dropna=False).agg(
+        QUERIES=("QUERY_ID", "count"),
+        EXECUTION_SECONDS=("EXECUTION_SECONDS", "sum"),
+        CREDITS_COMPUTE=("CREDITS_COMPUTE", "sum"),
+        CREDITS_IDLE=("CREDITS_IDLE", "sum"),
+        CREDITS=("CREDITS", "sum"),
+    )
+
+    return rollup_df.sort_values("CREDITS", ascending=False)
@@ -0,0 +1,427 @@
+"""
+Closed loop warehouse autoscaling.
+An AutoscaleController periodically evaluates fleet recommendations (see RecommendationEngine)
+and applies size, multi-cluster and auto suspend changes one step at a time, with hysteresis
+(an action must be recommended several evaluations in a row), per warehouse cooldowns,
+credit budget caps and a dry run mode.
+Controllers can be tested offline against SimulatedWarehouse objects.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Callable
+import copy
+import logging
+import time
+
+import pandas as pd
+
+import ice_pick
+
+
+# warehouse sizes in order, with the credits per hour per cluster
+WAREHOUSE_SIZES = [
+    "XSMALL",
+    "SMALL",
+    "MEDIUM",
+    "LARGE",
+    "XLARGE",
+    "2XLARGE",
+    "3XLARGE",
+    "4XLARGE",
+    "5XLARGE",
+    "6XLARGE",
+]
+WAREHOUSE_CREDITS_PER_HOUR = {size: 2 ** i for i, size in enumerate(WAREHOUSE_SIZES)}
+
+# sizes starting with a digit aren't valid unquoted identifiers in "set WAREHOUSE_SIZE = ..."
+_SQL_SIZES = {"2XLARGE": "X2LARGE", "3XLARGE": "X3LARGE", "4XLARGE": "X4LARGE", "5XLARGE": "X5LARGE",
+              "6XLARGE": "X6LARGE"}
+
+_SIZE_ALIASES = {"XXLARGE": "2XLARGE", "X2LARGE": "2XLARGE", "XXXLARGE": "3XLARGE", "X3LARGE": "3XLARGE",
+                 "X4LARGE": "4XLARGE", "X5LARGE": "5XLARGE", "X6LARGE": "6XLARGE"}
+
+SUPPORTED_ACTIONS = ["Size Up", "Size Down", "Scale Out", "Scale In", "Reduce Auto Suspend", "No Change"]
+
+DECISION_COLUMNS = ["time", "warehouse_name", "recommendation", "status", "change", "credits_per_hour"]
+
+
+def normalize_size(wh_size: str) -> str:
+    """ normalize a warehouse size, ex: "X-Small" -> "XSMALL", "XXLARGE" -> "2XLARGE" """
+    size = str(wh_size).replace("-", "").replace("_", "").upper()
+    size = _SIZE_ALIASES.get(size, size)
+    if size not in WAREHOUSE_SIZES:
+        raise ValueError(f"warehouse size {wh_size} not supported: supported warehouse sizes: {WAREHOUSE_SIZES}")
+
+    return size
+
+
+def sql_size(wh_size: str) -> str:
+    """ a warehouse size as it can be used in an alter / create warehouse statement, ex: "2X-Large" -> "X2LARGE" """
+    size = normalize_size(wh_size)
+
+    return _SQL_SIZES.get(size, size)
+
+
+def credits_per_hour(settings: dict) -> float:
+    """ the maximum credits per hour for warehouse settings (size x max clusters) """
+    return WAREHOUSE_CREDITS_PER_HOUR[normalize_size(settings["size"])] * settings["max_cluster_count"]
+
+
+@dataclass
+class AutoscalePolicy:
+    """
+    The limits and damping for automatically scaling a warehouse.
+
+    Attributes
+    ----------
+    min_size: str
+        the smallest size the controller will size down to
+    max_size: str
+        the largest size the controller will size up to
+    min_clusters: int
+        the smallest max_cluster_count the controller will scale in to
+        (min_cluster_count is lowered with max_cluster_count when needed)
+    max_clusters: int
+        the largest max_cluster_count the controller will scale out to
+    min_auto_suspend: int
+        the lowest auto suspend (seconds) the controller will set
+    up_confirmations: int
+        consecutive evaluations an up / out action must be recommended before it is applied
+    down_confirmations: int
+        consecutive evaluations a down / in / auto suspend action must be recommended before it is applied
+        (higher than up_confirmations so the controller is slow to scale down)
+    cooldown: timedelta
+        the minimum time between two changes to the same warehouse
+    max_credits_per_hour: float
+        changes that would let the warehouse burn more credits per hour (size x max clusters) are blocked
+    """
+
+    min_size: str = "XSMALL"
+    max_size: str = "LARGE"
+    min_clusters: int = 1
+    max_clusters: int = 3
+    min_auto_suspend: int = 60
+    up_confirmations: int = 2
+    down_confirmations: int = 4
+    cooldown: timedelta = timedelta(hours=1)
+    max_credits_per_hour: float = None
+
+    def __post_init__(self):
+        self.min_size = normalize_size(self.min_size)
+        self.max_size = normalize_size(self.max_size)
+        if WAREHOUSE_SIZES.index(self.min_size) > WAREHOUSE_SIZES.index(self.max_size):
+            raise ValueError(f"min_size {self.min_size} is larger than max_size {self.max_size}")
+        if not 1 <= self.min_clusters <= self.max_clusters:
+            raise ValueError("clusters must satisfy 1 <= min_clusters <= max_clusters")
+
+    def confirmations(self, action: str) -> int:
+        return self.up_confirmations if action in ("Size Up", "Scale Out") else self.down_confirmations
+
+
+def next_settings(settings: dict, action: str, policy: AutoscalePolicy) -> dict:
+    """
+    Return the settings after applying one step of action within the policy limits
+    (the settings are unchanged when the action is already at, or beyond, a limit:
+    a step never moves a warehouse in the opposite direction of the action)
+    """
+    if action not in SUPPORTED_ACTIONS:
+        raise ValueError(f"action {action} not supported: supported actions: {SUPPORTED_ACTIONS}")
+
+    settings = dict(settings, size=normalize_size(settings["size"]))
+    size_index = WAREHOUSE_SIZES.index(settings["size"])
+
+    if action == "Size Up":
+        if size_index + 1 <= WAREHOUSE_SIZES.index(policy.max_size):
+            settings["size"] = WAREHOUSE_SIZES[size_index + 1]
+    elif action == "Size Down":
+        if size_index - 1 >= WAREHOUSE_SIZES.index(policy.min_size):
+            settings["size"] = WAREHOUSE_SIZES[size_index - 1]
+    elif action == "Scale Out":
+        if settings["max_cluster_count"] + 1 <= policy.max_clusters:
+            settings["max_cluster_count"] += 1
+    elif action == "Scale In":
+        if settings["max_cluster_count"] - 1 >= policy.min_clusters:
+            settings["max_cluster_count"] -= 1
+            # min_cluster_count can't be larger than max_cluster_count (ex: maximized warehouses)
+            settings["min_cluster_count"] = min(settings["min_cluster_count"], settings["max_cluster_count"])
+    elif action == "Reduce Auto Suspend":
+        # 0 means the warehouse never suspends
+        auto_suspend = settings["auto_suspend"] or 3600
+        reduced = max(auto_suspend // 2, policy.min_auto_suspend)
+        if reduced < auto_suspend:
+            settings["auto_suspend"] = reduced
+
+    return settings
+
+
+def _describe_change(settings: dict, new_settings: dict) -> str:
+    return ", ".join(
+        f"{key} {settings[key]} -> {new_settings[key]}"
+        for key in ("size", "min_cluster_count", "max_cluster_count", "auto_suspend")
+        if settings[key] != new_settings[key]
+    )
+
+
+def _apply_settings(warehouse, settings: dict, new_settings: dict):
+    if new_settings["size"] != settings["size"]:
+        warehouse.resize(new_settings["size"])
+    if (new_settings["min_cluster_count"], new_settings["max_cluster_count"]) != (
+        settings["min_cluster_count"], settings["max_cluster_count"]
+    ):
+        warehouse.set_cluster_count(new_settings["min_cluster_count"], new_settings["max_cluster_count"])
+    if new_settings["auto_suspend"] != settings["auto_suspend"]:
+        warehouse.set_auto_suspend(new_settings["auto_suspend"])
+
+
+def apply_action(warehouse, action: str, policy: AutoscalePolicy = None, dry_run: bool = False) -> str:
+    """
+    Apply one step of action to a warehouse within the policy limits (no hysteresis or cooldown).
+
+    Returns
+    -------
+    str
+        the applied change (ex: "size SMALL -> MEDIUM"), or "" when nothing changed
+    """
+    policy = policy or AutoscalePolicy()
+    settings = warehouse.get_settings()
+    settings["size"] = normalize_size(settings["size"])
+    new_settings = next_settings(settings, action, policy)
+    change = _describe_change(settings, new_settings)
+
+    if change and not dry_run:
+        _apply_settings(warehouse, settings, new_settings)
+
+    return change
+
+
+class SimulatedWarehouse:
+    """
+    An in memory warehouse with the same scaling interface as Warehouse,
+    for testing autoscaling offline.
+
+    Example
+    -------
+        | >> warehouse = SimulatedWarehouse("ETL_WH", size="MEDIUM", auto_suspend=600)
+        | >> warehouse.resize("LARGE")
+        | >> warehouse.changes
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: str = "XSMALL",
+        min_cluster_count: int = 1,
+        max_cluster_count: int = 1,
+        auto_suspend: int = 600,
+    ):
+        self.name = name
+        self.settings = {
+            "size": normalize_size(size),
+            "min_cluster_count": min_cluster_count,
+            "max_cluster_count": max_cluster_count,
+            "auto_suspend": auto_suspend,
+        }
+        self.changes: List[tuple] = []
+
+    def __repr__(self):
+        return f"SimulatedWarehouse({self.name}, {self.settings})"
+
+    def get_settings(self) -> dict:
+        return copy.copy(self.settings)
+
+    def resize(self, wh_size: str) -> str:
+        self.settings["size"] = normalize_size(wh_size)
+        self.changes.append(("size", self.settings["size"]))
+
+        return "Statement executed successfully."
+
+    def set_cluster_count(self, min_cluster_count: int, max_cluster_count: int) -> str:
+        if not 1 <= min_cluster_count <= max_cluster_count:
+            raise ValueError(
+                f"cluster counts must satisfy 1 <= min_cluster_count <= max_cluster_count: "
+                f"got {min_cluster_count}, {max_cluster_count}"
+            )
+        self.settings["min_cluster_count"] = min_cluster_count
+        self.settings["max_cluster_count"] = max_cluster_count
+        self.changes.append(("clusters", (min_cluster_count, max_cluster_count)))
+
+        return "Statement executed successfully."
+
+    def set_auto_suspend(self, seconds: int) -> str:
+        self.settings["auto_suspend"] = seconds
+        self.changes.append(("auto_suspend", seconds))
+
+        return "Statement executed successfully."
+
+
+@dataclass
+class AutoscaleController:
+    """
+    Periodically evaluate recommendations and scale warehouses to track load.
+
+    Each evaluation a warehouse's recommended action is only applied when:
+        | - the same action was recommended for the last up_confirmations / down_confirmations evaluations
+        | - the warehouse has not been changed within the cooldown
+        | - the change stays within the policy size / cluster / auto suspend limits
+        | - the change keeps the warehouse (and the fleet) within the credit per hour budgets
+
+    Attributes
+    ----------
+    warehouses: list
+        Warehouse (or SimulatedWarehouse) objects to control
+    recommender: Callable[[], pd.DataFrame]
+        returns recommendations indexed by warehouse name with an "action" column
+        (defaults to WarehouseFleet.recommend for the controlled warehouses)
+    policy: AutoscalePolicy
+        the default policy
+    policies: Dict[str, AutoscalePolicy]
+        per warehouse policy overrides
+    budget_credits_per_hour: float
+        the maximum credits per hour for all of the controlled warehouses combined
+    dry_run: bool
+        log and record the decisions without changing any warehouse
+    clock: Callable[[], datetime]
+        the current time (override for simulations)
+
+    Example
+    -------
+        | >> warehouses = [Warehouse(session, "ETL_WH"), Warehouse(session, "BI_WH")]
+        | >> controller = AutoscaleController(warehouses, policy=AutoscalePolicy(max_size="XLARGE"), dry_run=True)
+        | >> controller.step()
+        | >> controller.run(interval_seconds=15 * 60)
+    """
+
+    warehouses: list
+    recommender: Callable[[], pd.DataFrame] = None
+    policy: AutoscalePolicy = field(default_factory=AutoscalePolicy)
+    policies: Dict[str, AutoscalePolicy] = field(default_factory=dict)
+    budget_credits_per_hour: float = None
+    dry_run: bool = True
+    clock: Callable[[], datetime] = None
+
+    def __post_init__(self):
+        self._streaks: Dict[str, tuple] = {}
+        self._last_change: Dict[str, datetime] = {}
+        self.decisions: List[dict] = []
+
+    def _now(self) -> datetime:
+        return self.clock() if self.clock else datetime.now(timezone.utc)
+
+    def _recommend(self) -> pd.DataFrame:
+        if self.recommender is not None:
+            return self.recommender()
+
+        session = self.warehouses[0].session
+        fleet = ice_pick.fleet.WarehouseFleet(session, [warehouse.name for warehouse in self.warehouses])
+
+        return fleet.recommend()
+
+    def _confirmed(self, name: str, action: str, policy: AutoscalePolicy) -> bool:
+        """ hysteresis: count consecutive evaluations with the same recommended action """
+        streak_action, streak = self._streaks.get(name, (None, 0))
+        streak = streak + 1 if streak_action == action else 1
+        self._streaks[name] = (action, streak)
+
+        return streak >= policy.confirmations(action)
+
+    def step(self, recommendations_df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Run one evaluation. Recommendations can be passed in directly,
+        otherwise they are fetched from the recommender.
+
+        Returns
+        -------
+        pd.DataFrame
+            one decision per warehouse with the columns:
+            time, warehouse_name, recommendation, status, change, credits_per_hour.
+            status is one of: no_change, hysteresis, cooldown, at_limit, budget, dry_run, applied
+        """
+        if recommendations_df is None:
+            recommendations_df = self._recommend()
+
+        actions = recommendations_df["action"].to_dict()
+        now = self._now()
+
+        current_settings = {warehouse.name: warehouse.get_settings() for warehouse in self.warehouses}
+        fleet_credits = sum(credits_per_hour(settings) for settings in current_settings.values())
+
+        decisions = []
+        for warehouse in self.warehouses:
+            name = warehouse.name
+            policy = self.policies.get(name, self.policy)
+            settings = dict(current_settings[name], size=normalize_size(current_settings[name]["size"]))
+            action = actions.get(name, "No Change")
+            new_settings = settings
+            change = ""
+
+            if action == "No Change" or action not in SUPPORTED_ACTIONS:
+                self._streaks.pop(name, None)
+                status = "no_change"
+            elif not self._confirmed(name, action, policy):
+                status = "hysteresis"
+            elif name in self._last_change and now - self._last_change[name] < policy.cooldown:
+                status = "cooldown"
+            else:
+                new_settings = next_settings(settings, action, policy)
+                change = _describe_change(settings, new_settings)
+                added_credits = credits_per_hour(new_settings) - credits_per_hour(settings)
+
+                if not change:
+                    status = "at_limit"
+                elif added_credits > 0 and (
+                    (policy.max_credits_per_hour is not None
+                     and credits_per_hour(new_settings) > policy.max_credits_per_hour)
+                    or (self.budget_credits_per_hour is not None
+                        and fleet_credits + added_credits > self.budget_credits_per_hour)
+                ):
+                    status = "budget"
+                elif self.dry_run:
+                    status = "dry_run"
+                    logging.info(f"dry run: {name} {change}")
+                else:
+                    _apply_settings(warehouse, settings, new_settings)
+                    status = "applied"
+                    fleet_credits += added_credits
+                    self._last_change[name] = now
+                    self._streaks.pop(name, None)
+                    logging.info(f"autoscaled {name}: {change}")
+
+                if status not in ("applied", "dry_run"):
+                    new_settings = settings
+
+            decisions.append({
+                "time": now,
+                "warehouse_name": name,
+                "recommendation": action,
+                "status": status,
+                "change": change,
+                "credits_per_hour": credits_per_hour(new_settings),
+            })
+
+        self.decisions.extend(decisions)
+
+        return pd.DataFrame(decisions, columns=DECISION_COLUMNS)
+
+    def run(self, interval_seconds: int = 15 * 60, iterations: int = None) -> pd.DataFrame:
+        """
+        Evaluate every interval_seconds, forever or for a number of iterations.
+        Errors in an evaluation are logged and the controller keeps running.
+
+        Returns
+        -------
+        pd.DataFrame
+            all of the decisions made
+        """
+        iteration = 0
+        while iterations is None or iteration < iterations:
+            try:
+                self.step()
+            except Exception as e:
+                logging.error(f"autoscale evaluation failed: {e}")
+
+            iteration += 1
+            if iterations is None or iteration < iterations:
+                time.sleep(interval_seconds)
+
+        return pd.DataFrame(self.decisions, columns=DECISION_COLUMNS)
@@ -0,0 +1,303 @@
+"""
+Deploy ice_pick operations as Snowpark stored procedures.
+Metadata crawls (ddl export, grant audits, object filters, warehouse recommendations) issue many small
+"show" / "get_ddl" queries. Run as stored procedures, those round trips stay inside Snowflake.
+
+The ice_pick package is uploaded with each procedure (as an import), so the handlers below run
+server side unchanged. Handlers can be tested locally against a FakeSession with run_procedure_locally.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List
+import re
+
+from snowflake.snowpark import Session
+import snowflake.snowpark as snowpark
+from snowflake.snowpark.row import Row
+from snowflake.snowpark.types import (
+    DataType,
+    ArrayType,
+    IntegerType,
+    StringType,
+    StructField,
+    StructType,
+)
+
+import pandas as pd
+
+import ice_pick
+from ice_pick.filters import SchemaObjectFilter
+from ice_pick.privileges import get_account_grants
+from ice_pick.fleet import WarehouseFleet
+
+
+DEFAULT_PACKAGES = ["snowflake-snowpark-python", "pandas"]
+
+
+def _string_schema(*names: str) -> StructType:
+    return StructType([StructField(name, StringType()) for name in names])
+
+
+OBJECT_SCHEMA = _string_schema("DATABASE_NAME", "SCHEMA_NAME", "OBJECT_NAME", "OBJECT_TYPE")
+DDL_SCHEMA = _string_schema("DATABASE_NAME", "SCHEMA_NAME", "OBJECT_NAME", "OBJECT_TYPE", "DDL")
+GRANTS_SCHEMA = _string_schema(
+    "PRIVILEGE", "GRANTED_ON", "NAME", "TABLE_CATALOG", "TABLE_SCHEMA", "GRANTED_TO", "GRANTEE_NAME", "GRANT_OPTION"
+)
+RECOMMENDATION_SCHEMA = _string_schema("WAREHOUSE_NAME", "ACTION", "RULES", "REASON")
+
+
+def _to_table(session: Session, rows: List[list], schema: StructType) -> snowpark.DataFrame:
+    # procedures return tables: values are passed as strings (None for missing values)
+    string_rows = [
+        [None if pd.api.types.is_scalar(value) and pd.isna(value) else str(value) for value in row]
+        for row in rows
+    ]
+
+    return session.create_dataframe(string_rows, schema=schema)
+
+
+# -------------------------   procedure handlers   ----------------------------
+
+def filter_objects_procedure(
+    session: Session, databases: list, schemas: list, object_names: list, object_types: list
+) -> snowpark.DataFrame:
+    """ the schema objects matching a SchemaObjectFilter """
+    objects = SchemaObjectFilter(session, databases, schemas, object_names, object_types).return_schema_objects()
+    rows = [[obj.database, obj.schema, obj.object_name, obj.object_type] for obj in objects]
+
+    return _to_table(session, rows, OBJECT_SCHEMA)
+
+
+def export_ddl_procedure(
+    session: Session, databases: list, schemas: list, object_names: list, object_types: list
+) -> snowpark.DataFrame:
+    """ the ddl of every schema object matching a SchemaObjectFilter """
+    objects = SchemaObjectFilter(session, databases, schemas, object_names, object_types).return_schema_objects()
+    rows = [[obj.database, obj.schema, obj.object_name, obj.object_type, obj.get_ddl()] for obj in objects]
+
+    return _to_table(session, rows, DDL_SCHEMA)
+
+
+def grant_audit_procedure(session: Session, databases: list) -> snowpark.DataFrame:
+    """ every active grant to a role (see get_account_grants) """
+    grants_df = get_account_grants(session, databases or None)
+    columns = [struct.name.lower() for struct in GRANTS_SCHEMA.fields]
+
+    return _to_table(session, grants_df[columns].values.tolist(), GRANTS_SCHEMA)
+
+
+def recommend_warehouses_procedure(session: Session, date_range_start: int) -> snowpark.DataFrame:
+    """ warehouse recommendations for the fleet (see WarehouseFleet.recommend) """
+    recommendations_df = WarehouseFleet(session).recommend(date_range_start)
+    rows = [
+        [warehouse, action, ", ".join(rules), reason]
+        for warehouse, action, rules, reason in zip(
+            recommendations_df.index, recommendations_df["action"],
+            recommendations_df["rules"], recommendations_df["reason"],
+        )
+    ]
+
+    return _to_table(session, rows, RECOMMENDATION_SCHEMA)
+
+
+# -------------------------   registry   ----------------------------
+
+@dataclass
+class ProcedureSpec:
+    """
+    A stored procedure that can be deployed.
+
+    Attributes
+    ----------
+    name: str
+        the procedure name in Snowflake
+    handler: Callable
+        the handler, called with the session followed by the procedure arguments
+    input_types: List[DataType]
+        the Snowflake types of the procedure arguments
+    return_type: StructType
+        the schema of the returned table
+    """
+
+    name: str
+    handler: Callable
+    input_types: List[DataType] = field(default_factory=list)
+    return_type: StructType = None
+
+
+_FILTER_INPUT_TYPES = [ArrayType(StringType())] * 4
+
+PROCEDURES: Dict[str, ProcedureSpec] = {
+    spec.name: spec
+    for spec in [
+        ProcedureSpec("ICE_PICK_FILTER_OBJECTS", filter_objects_procedure, _FILTER_INPUT_TYPES, OBJECT_SCHEMA),
+        ProcedureSpec("ICE_PICK_EXPORT_DDL", export_ddl_procedure, _FILTER_INPUT_TYPES, DDL_SCHEMA),
+        ProcedureSpec("ICE_PICK_GRANT_AUDIT", grant_audit_procedure, [ArrayType(StringType())], GRANTS_SCHEMA),
+        ProcedureSpec(
+            "ICE_PICK_RECOMMEND_WAREHOUSES", recommend_warehouses_procedure, [IntegerType()], RECOMMENDATION_SCHEMA
+        ),
+    ]
+}
+
+
+def _select_procedures(names: List[str] = None) -> List[ProcedureSpec]:
+    if names is None:
+        return list(PROCEDURES.values())
+
+    unknown = [name for name in names if name.upper() not in PROCEDURES]
+    if unknown:
+        raise ValueError(f"procedures {unknown} not supported: supported: {list(PROCEDURES)}")
+
+    return [PROCEDURES[name.upper()] for name in names]
+
+
+def deploy_procedures(
+    session: Session,
+    stage_location: str,
+    names: List[str] = None,
+    database: str = None,
+    schema: str = None,
+    packages: List[str] = None,
+    execute_as: str = "caller",
+    replace: bool = True,
+) -> List[str]:
+    """
+    Register ice_pick operations as permanent stored procedures, with the ice_pick package attached.
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    stage_location : str
+        the stage the procedure code and the ice_pick package are uploaded to (ex: "@ICE_PICK_STAGE")
+    names : List[str] = None
+        the procedures to deploy (see PROCEDURES), defaults to all of them
+    database, schema : str = None
+        where to create the procedures, defaults to the session's database and schema
+    packages : List[str] = None
+        the Anaconda packages for the procedures, defaults to DEFAULT_PACKAGES
+    execute_as : str = "caller"
+        "caller" runs the metadata queries with the caller's privileges, "owner" with the owner's
+    replace : bool = True
+        replace existing procedures with the same name
+
+    Returns
+    -------
+    List[str]
+        the names of the deployed procedures
+
+    Example
+    -------
+        | >> deploy_procedures(session, "@ICE_PICK_STAGE", ["ICE_PICK_EXPORT_DDL"])
+        | >> session.call("ICE_PICK_EXPORT_DDL", ["TEST"], [".*"], [".*"], ["table"]).show()
+    """
+    if database and not schema:
+        raise ValueError("a schema is required when a database is given")
+
+    ice_pick_path = Path(ice_pick.__file__).parent
+    deployed = []
+
+    for spec in _select_procedures(names):
+        name_parts = [part for part in (database, schema, spec.name) if part]
+        session.sproc.register(
+            spec.handler,
+            name=name_parts,
+            return_type=spec.return_type,
+            input_types=spec.input_types,
+            is_permanent=True,
+            stage_location=stage_location,
+            replace=replace,
+            packages=packages or DEFAULT_PACKAGES,
+            imports=[(str(ice_pick_path), "ice_pick")],
+            execute_as=execute_as,
+        )
+        deployed.append(".".join(name_parts))
+
+    return deployed
+
+
+# -------------------------   local harness   ----------------------------
+
+class FakeDataFrame:
+    """ the parts of a Snowpark DataFrame used by the procedure handlers, backed by a pandas dataframe """
+
+    def __init__(self, pd_df: pd.DataFrame):
+        self._pd_df = pd_df
+
+    def collect(self) -> List[Row]:
+        return [Row(**record) for record in self._pd_df.to_dict("records")]
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self._pd_df.copy()
+
+
+class FakeSession:
+    """
+    A stand in for a Snowpark Session that answers queries with canned results,
+    for testing procedure handlers without a connection.
+
+    Parameters
+    ----------
+    responses : Dict[str, pd.DataFrame]
+        regex pattern -> the result of queries matching the pattern (the first match is used)
+
+    Example
+    -------
+        | >> fake_session = FakeSession({r"show databases": databases_df, r"show schemas": schemas_df})
+        | >> run_procedure_locally("ICE_PICK_FILTER_OBJECTS", fake_session, ["TEST"], [".*"], [".*"], ["table"])
+    """
+
+    def __init__(self, responses: Dict[str, pd.DataFrame] = None):
+        self.responses = [
+            (re.compile(pattern, re.IGNORECASE), response_df) for pattern, response_df in (responses or {}).items()
+        ]
+        self.queries: List[str] = []
+
+    def sql(self, query: str) -> FakeDataFrame:
+        self.queries.append(query)
+        for pattern, response_df in self.responses:
+            if pattern.search(query):
+                return FakeDataFrame(response_df)
+
+        raise ValueError(f"no fake response matches the query: {query}")
+
+    def create_dataframe(self, data: list, schema: StructType = None) -> FakeDataFrame:
+        return FakeDataFrame(pd.DataFrame(data, columns=schema.names if schema is not None else None))
+
+
+def _matches_type(value, data_type: DataType) -> bool:
+    # the python values Snowflake passes to a handler for each input type (None for NULL)
+    if value is None:
+        return True
+    if isinstance(data_type, ArrayType):
+        return isinstance(value, (list, tuple)) and all(
+            _matches_type(element, data_type.element_type) for element in value
+        )
+    if isinstance(data_type, IntegerType):
+        return isinstance(value, int) and not isinstance(value, bool)
+    if isinstance(data_type, StringType):
+        return isinstance(value, str)
+    return True
+
+
+def run_procedure_locally(name: str, session, *args) -> pd.DataFrame:
+    """
+    Run a procedure handler in process (ex: against a FakeSession) and return the result as pandas.
+    Arguments are checked against the procedure's input types like Snowflake would
+    (ARRAY(STRING) -> a list of str, INTEGER -> int).
+    """
+    spec = _select_procedures([name])[0]
+    if len(args) != len(spec.input_types):
+        raise ValueError(f"{spec.name} takes {len(spec.input_types)} arguments, got {len(args)}")
+    for position, (arg, data_type) in enumerate(zip(args, spec.input_types)):
+        if not _matches_type(arg, data_type):
+            raise ValueError(f"{spec.name} argument {position} {arg!r} doesn't match the input type {data_type}")
+
+    result_df = spec.handler(session, *args)
+    result_pd_df = result_df.to_pandas()
+
+    if list(result_pd_df.columns) != spec.return_type.names:
+        raise ValueError(f"{spec.name} returned {list(result_pd_df.columns)}, expected {spec.return_type.names}")
+
+    return result_pd_df
@@ -23,10 +23,16 @@ from ice_pick.account_object import (
 from ice_pick.filters import SchemaObjectFilter, AccountObjectFilter
 from ice_pick.utils import concat_standalone
 from ice_pick.utils import melt_standalone
+from ice_pick.utils import pivot_standalone
+from ice_pick.utils import get_dummies_standalone
+from ice_pick.utils import isna_standalone, isnull_standalone, null_profile_standalone
 
 from ice_pick.account_object import AccountObject, Warehouse, Role, User
 
 from ice_pick.privileges import Privilege, Grant
+from ice_pick.reconcile import GrantReconciler, GrantPlan
+from ice_pick.fleet import WarehouseFleet
+from ice_pick.registry import resolve
 
 
 # todo - create a wrapper/decorator to help with monkey patching
@@ -35,9 +41,11 @@ from ice_pick.privileges import Privilege, Grant
 
 
 # -----------------------  Schema Level Extensions ----------------------------
+# objects are resolved through the session's identity map (see registry),
+# so the same object is returned for the same name and its fetched metadata is shared
 
 def create_schema_object(self, database, schema, object_name, object_type):
-    return SchemaObject(self, database, schema, object_name, object_type)
+    return resolve(self, SchemaObject, database, schema, object_name, object_type)
 
 def create_schema_object_filter(
     self,
@@ -59,31 +67,34 @@ def create_schema_object_filter(
 # -----------------------  Account Level Extensions ----------------------------
 
 def create_account_object(self, name, object_type):
-    return AccountObject(self, name, object_type)
+    return resolve(self, AccountObject, name, object_type)
 
 def create_warehouse(self, name):
-    return Warehouse(self, name)
+    return resolve(self, Warehouse, name)
 
 def create_role(self, name):
-    return Role(self, name)
+    return resolve(self, Role, name)
 
 def create_user(self, name):
-    return User(self, name)
+    return resolve(self, User, name)
 
 def create_database(self, name):
-    return Database(self, name)
+    return resolve(self, Database, name)
 
 def create_schema(self, name):
-    return Schema(self, name)
+    return resolve(self, Schema, name)
 
 def create_integration(self, name):
-    return Integration(self, name)
+    return resolve(self, Integration, name)
 
 def create_network_policy(self, name):
-    return NetworkPolicy(self, name)
+    return resolve(self, NetworkPolicy, name)
 
 def create_resource_monitor(self, name):
-    return ResourceMonitor(self, name)
+    return resolve(self, ResourceMonitor, name)
+
+def create_warehouse_fleet(self, warehouse_names: list = None):
+    return WarehouseFleet(self, warehouse_names)
 
 
 def create_account_object_filter(
@@ -122,12 +133,16 @@ def create_grant(
     )
 
 
+def reconcile_grants(self, desired_state, databases: list = None) -> GrantPlan:
+    return GrantReconciler(self, desired_state, databases).plan()
+
+
 
 
 # ---------------------  Pandas like utils --------------------------
 
-def concat(self, union_dfs: list):
-    unioned_dfs = concat_standalone(self, union_dfs)
+def concat(self, union_dfs: list, union_method: str = "balanced", engine: str = "auto"):
+    unioned_dfs = concat_standalone(self, union_dfs, union_method=union_method, engine=engine)
 
     return unioned_dfs
 
@@ -139,14 +154,68 @@ def melt(
     value_vars: list,
     var_name: str = "variable",
     value_name: str = "value",
+    include_nulls: bool = True,
+    method: str = "auto",
+    engine: str = "auto",
 ):
     melt_df = melt_standalone(
-        self, df, id_vars, value_vars, var_name=var_name, value_name=value_name
+        self, df, id_vars, value_vars, var_name=var_name, value_name=value_name,
+        include_nulls=include_nulls, method=method, engine=engine,
     )
 
     return melt_df
 
 
+def pivot(
+    self,
+    df,
+    index,
+    columns: str,
+    values: str,
+    aggfunc: str = "mean",
+    pivot_values: list = None,
+    fill_value=None,
+    max_columns: int = 100,
+    refresh: bool = False,
+):
+    pivot_df = pivot_standalone(
+        self, df, index, columns, values, aggfunc=aggfunc, pivot_values=pivot_values,
+        fill_value=fill_value, max_columns=max_columns, refresh=refresh,
+    )
+
+    return pivot_df
+
+
+def get_dummies(
+    self,
+    df,
+    columns,
+    top_k: int = None,
+    other_category: str = "other",
+    prefix_sep: str = "_",
+    drop_original: bool = True,
+    max_categories: int = 100,
+):
+    dummies_df = get_dummies_standalone(
+        self, df, columns, top_k=top_k, other_category=other_category, prefix_sep=prefix_sep,
+        drop_original=drop_original, max_categories=max_categories,
+    )
+
+    return dummies_df
+
+
+def isna(self, df):
+    return isna_standalone(self, df)
+
+
+def isnull(self, df):
+    return isnull_standalone(self, df)
+
+
+def null_profile(self, df, columns: list = None):
+    return null_profile_standalone(self, df, columns)
+
+
 
 
 
@@ -186,6 +255,7 @@ def extend_session(Session: Session) -> Session:
     Session.integration = create_integration
     Session.network_policy = create_network_policy
     Session.resource_monitor = create_resource_monitor
+    Session.warehouse_fleet = create_warehouse_fleet
 
     Session.create_account_object_filter = create_account_object_filter
     
@@ -193,10 +263,16 @@ def extend_session(Session: Session) -> Session:
     # permission handling
     Session.privilege = create_privilege
     Session.grant = create_grant
+    Session.reconcile_grants = reconcile_grants
     
 
     # adding the methods to create misc functions
     Session.concat = concat
     Session.melt = melt
+    Session.pivot = pivot
+    Session.get_dummies = get_dummies
+    Session.isna = isna
+    Session.isnull = isnull
+    Session.null_profile = null_profile
 
     return Session
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import copy
 import re
 import configparser
@@ -14,7 +14,9 @@ import pandas as pd
 import numpy as np
 
 from ice_pick.utils import snowpark_query
-from ice_pick.schema_object import SchemaObject
+from ice_pick.schema_object import SchemaObject, get_descriptions_bulk
+from ice_pick.privileges import get_grants_bulk
+from ice_pick.statistics import get_statistics_bulk
 from ice_pick.account_object import AccountObject
 from ice_pick.account_object import (
     AccountObject,
@@ -215,7 +217,7 @@ class SchemaObjectFilter:
 
             return all_objs_df
 
-    def return_schema_objects(self) -> List[SchemaObject]:
+    def return_schema_objects(self, describe: bool = False) -> List[SchemaObject]:
         """
         Filter objects based on input objects
         If the property is a wildcard ".*", then search all objects at that level
@@ -225,7 +227,9 @@ class SchemaObjectFilter:
 
         Parameters
         ----------
-        None :
+        describe : bool = False
+            describe the returned tables and views in bulk (see get_descriptions_bulk),
+            so their get_description() doesn't query Snowflake
 
 
         Returns
@@ -324,8 +328,58 @@ class SchemaObjectFilter:
 
         schema_object_list = schema_object_series.tolist()
 
+        if describe:
+            get_descriptions_bulk(self.session, schema_object_list)
+
         return schema_object_list
 
+    def return_descriptions(self, max_workers: int = 8) -> Dict[str, pd.DataFrame]:
+        """
+        Return the description of all tables and views matching the filter, keyed by object
+        (see get_descriptions_bulk)
+
+        Example
+        -------
+        | >> obj_filter = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"])
+        | >> descriptions = obj_filter.return_descriptions()
+        """
+        return get_descriptions_bulk(self.session, self.return_schema_objects(), max_workers)
+
+    def return_grants(
+        self, method: str = "account_usage", max_workers: int = 8
+    ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Return the grants on all schema objects matching the filter, grouped by object
+        and keyed by (object type, name) (see get_grants_bulk for the supported methods)
+
+        Example
+        -------
+        | >> obj_filter = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"])
+        | >> grants = obj_filter.return_grants()
+        """
+        return get_grants_bulk(self.session, self.return_schema_objects(), method, max_workers)
+
+    def return_statistics(
+        self,
+        sample: float = None,
+        sample_method: str = "system",
+        refresh: bool = False,
+        max_workers: int = 8,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Return the column statistics of all tables and views matching the filter, keyed by table
+        (see get_statistics_bulk)
+
+        Example
+        -------
+        | >> obj_filter = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"])
+        | >> statistics = obj_filter.return_statistics(sample=1)
+        """
+        return get_statistics_bulk(
+            self.session, self.return_schema_objects(), sample=sample, sample_method=sample_method,
+            refresh=refresh, max_workers=max_workers,
+        )
+
 
 
 
@@ -576,6 +630,15 @@ class AccountObjectFilter:
 
         return account_object_instances
 
+    def return_grants(
+        self, method: str = "account_usage", max_workers: int = 8
+    ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Return the grants on all account objects matching the filter, grouped by object
+        and keyed by (object type, name) (see get_grants_bulk for the supported methods)
+        """
+        return get_grants_bulk(self.session, self.return_account_objects(), method, max_workers)
+
 
 
 
@@ -0,0 +1,413 @@
+"""
+Fleet level warehouse functionality.
+A WarehouseFleet works on many warehouses at once, so monitoring a fleet costs one query per metric
+instead of one query per metric per warehouse.
+"""
+
+from dataclasses import dataclass
+from typing import List, Iterator, Union, Callable
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from snowflake.snowpark import Session
+
+import pandas as pd
+
+from ice_pick.utils import snowpark_query, snowpark_query_batches
+from ice_pick.account_object import Warehouse
+from ice_pick.registry import resolve
+from ice_pick.recommendations import RecommendationEngine, align_telemetry
+from ice_pick.attribution import attribute_credits
+from ice_pick.autoscaler import normalize_size, sql_size
+
+
+TELEMETRY_SOURCES = ["information_schema", "account_usage"]
+
+OPERATION_COLUMNS = ["WAREHOUSE_NAME", "OPERATION", "STATUS", "MESSAGE"]
+
+SNAPSHOT_COLUMNS = ["size", "min_cluster_count", "max_cluster_count", "auto_suspend", "state"]
+
+
+@dataclass
+class WarehouseFleet:
+    """
+    A group of warehouses that telemetry is fetched for together.
+
+    Attributes
+    ----------
+    session: Session
+        Snowpark Session
+    warehouse_names: list
+        the warehouses in the fleet (None for all warehouses in the account)
+
+    Example
+    -------
+        | >> fleet = WarehouseFleet(session, ["COMPUTE_WH", "ETL_WH"])
+        | >> load_df = fleet.load_history(12, 0)
+        | >> load_df.loc["ETL_WH"]
+
+        | Suspend the fleet for a maintenance window and restore it afterwards:
+        | >> snapshot_df = fleet.snapshot()
+        | >> fleet.suspend()
+        | >> fleet.restore(snapshot_df)
+
+        | Build the fleet from a filter:
+        | >> wh_filter = session.create_account_object_filter(["ETL_.*"], ["warehouse"])
+        | >> fleet = WarehouseFleet.from_objects(session, wh_filter.return_account_objects())
+    """
+
+    session: Session
+    warehouse_names: list = None
+
+    @classmethod
+    def from_objects(cls, session: Session, objects: list):
+        """ create the fleet from Warehouse objects (other account objects are ignored) """
+        warehouse_names = [obj.name for obj in objects if isinstance(obj, Warehouse)]
+
+        return cls(session, warehouse_names)
+
+    def warehouses(self) -> List[Warehouse]:
+        """ return the fleet as Warehouse objects """
+        if self.warehouse_names is None:
+            warehouses_df = snowpark_query(self.session, """ show warehouses in account """, non_select=True)
+            return [resolve(self.session, Warehouse, name) for name in warehouses_df["name"]]
+
+        return [resolve(self.session, Warehouse, name) for name in self.warehouse_names]
+
+    def _warehouse_filter_sql(self, column: str = "warehouse_name") -> str:
+        if self.warehouse_names is None:
+            return ""
+        if not self.warehouse_names:
+            # an empty fleet (ex: a filter that matched no warehouses): no rows, same columns
+            return """ and false """
+
+        warehouse_list_str = ", ".join("'" + name.replace("'", "''") + "'" for name in self.warehouse_names)
+
+        return f""" and {column} in ({warehouse_list_str}) """
+
+    @staticmethod
+    def _index_by_warehouse(telemetry_df: pd.DataFrame, time_column: str) -> pd.DataFrame:
+        telemetry_df = telemetry_df.set_index(["WAREHOUSE_NAME", time_column])
+
+        return telemetry_df.sort_index()
+
+    def _history(
+        self,
+        table_function: str,
+        account_usage_view: str,
+        date_range_start: int,
+        date_range_end: int,
+        interval: str,
+        source: str,
+        stream: bool,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        if source not in TELEMETRY_SOURCES:
+            raise ValueError(f"source {source} not supported: supported sources: {TELEMETRY_SOURCES}")
+
+        if source == "information_schema":
+            # without WAREHOUSE_NAME the table function returns every warehouse
+            history_sql = f""" select * from
+                           table(information_schema.{table_function}(DATE_RANGE_START => dateadd('{interval}', -{date_range_start}, current_date()),
+                                                  DATE_RANGE_END => dateadd('{interval}', -{date_range_end}, current_date())))
+                           where 1 = 1 {self._warehouse_filter_sql()}"""
+        else:
+            history_sql = f""" select * from snowflake.account_usage.{account_usage_view}
+                           where start_time >= dateadd('{interval}', -{date_range_start}, current_date())
+                             and start_time < dateadd('{interval}', -{date_range_end}, current_date())
+                             {self._warehouse_filter_sql()}"""
+
+        if stream:
+            return snowpark_query_batches(self.session, history_sql)
+
+        history_df = snowpark_query(self.session, history_sql)
+
+        return self._index_by_warehouse(history_df, "START_TIME")
+
+    def load_history(
+        self,
+        date_range_start: int,
+        date_range_end: int,
+        interval: str = "hour",
+        source: str = "information_schema",
+        stream: bool = False,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Return the load history for every warehouse in the fleet with a single query
+        (see Warehouse.load_history for the required privileges and returned columns)
+
+        Parameters
+        ----------
+        date_range_start : int
+            start of hours/days ago interval
+        date_range_end : int
+            end of hours/days ago interval
+        interval: str
+            set the date range to either "days" or "hours"
+        source: str
+            "information_schema" (last 14 days, no latency) or
+            "account_usage" (last 365 days, up to 3 hours of latency)
+        stream: bool
+            return an iterator of (unindexed) pandas dataframe chunks instead
+
+        Returns
+        -------
+        pd.DataFrame
+            the load history indexed by (WAREHOUSE_NAME, START_TIME)
+        """
+        return self._history(
+            "WAREHOUSE_LOAD_HISTORY", "warehouse_load_history",
+            date_range_start, date_range_end, interval, source, stream,
+        )
+
+    def metering_history(
+        self,
+        date_range_start: int,
+        date_range_end: int,
+        interval: str = "hour",
+        source: str = "information_schema",
+        stream: bool = False,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Return the hourly credit usage for every warehouse in the fleet with a single query
+        (see Warehouse.metering_history for the required privileges and returned columns)
+
+        Returns
+        -------
+        pd.DataFrame
+            the metering history indexed by (WAREHOUSE_NAME, START_TIME)
+        """
+        return self._history(
+            "WAREHOUSE_METERING_HISTORY", "warehouse_metering_history",
+            date_range_start, date_range_end, interval, source, stream,
+        )
+
+    def query_history(
+        self,
+        date_range_start: int,
+        date_range_end: int,
+        result_limit: int = 10000,
+        source: str = "information_schema",
+        stream: bool = False,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Return the query history for every warehouse in the fleet with a single query.
+        The information_schema source is capped at result_limit (max 10,000) rows,
+        the account_usage source has no limit but has up to 45 minutes of latency.
+
+        Parameters
+        ----------
+        date_range_start : int
+            start of hours ago interval
+        date_range_end : int
+            end of hours ago interval
+        result_limit : int
+            the maximum number of rows for the information_schema source
+        source: str
+            "information_schema" or "account_usage"
+        stream: bool
+            return an iterator of (unindexed) pandas dataframe chunks instead,
+            for account wide history that does not fit in memory (see ice_pick.streaming)
+
+        Returns
+        -------
+        pd.DataFrame
+            the query history indexed by (WAREHOUSE_NAME, START_TIME)
+        """
+        if source not in TELEMETRY_SOURCES:
+            raise ValueError(f"source {source} not supported: supported sources: {TELEMETRY_SOURCES}")
+
+        if source == "information_schema":
+            query_hist_sql = f""" select * from
+                            table(information_schema.QUERY_HISTORY(
+                                END_TIME_RANGE_START => dateadd('hours',-{date_range_start},current_timestamp()),
+                                END_TIME_RANGE_END => dateadd('hours',-{date_range_end},current_timestamp()),
+                                RESULT_LIMIT => {result_limit} ))
+                            where warehouse_name is not null {self._warehouse_filter_sql()}"""
+        else:
+            query_hist_sql = f""" select * from snowflake.account_usage.query_history
+                            where end_time >= dateadd('hours',-{date_range_start},current_timestamp())
+                              and end_time < dateadd('hours',-{date_range_end},current_timestamp())
+                              and warehouse_name is not null {self._warehouse_filter_sql()}"""
+
+        if stream:
+            return snowpark_query_batches(self.session, query_hist_sql)
+
+        query_hist_df = snowpark_query(self.session, query_hist_sql)
+
+        return self._index_by_warehouse(query_hist_df, "START_TIME")
+
+    def recommend(
+        self,
+        date_range_start: int = 48,
+        engine: RecommendationEngine = None,
+        source: str = "information_schema",
+    ) -> pd.DataFrame:
+        """
+        Fetch the last date_range_start hours of load, metering and query history
+        (one query per metric) and the current settings (see snapshot),
+        and return recommendations for every warehouse in the fleet
+        (see RecommendationEngine.recommend for the returned columns)
+
+        Example
+        -------
+        | >> session.warehouse_fleet().recommend(48)
+        """
+        engine = engine or RecommendationEngine()
+
+        telemetry = align_telemetry(
+            self.load_history(date_range_start, 0, source=source),
+            self.metering_history(date_range_start, 0, source=source),
+            self.query_history(date_range_start, 0, source=source),
+        )
+
+        return engine.recommend(telemetry, self.snapshot())
+
+    def credit_attribution(
+        self,
+        date_range_start: int = 24,
+        date_range_end: int = 0,
+        source: str = "account_usage",
+        idle_allocation: str = "proportional",
+    ) -> pd.DataFrame:
+        """
+        Apportion the fleet's metered credits to queries (see attribute_credits).
+        The account_usage source is the default since the information_schema
+        query history is capped at 10,000 rows.
+
+        Example
+        -------
+        | >> attribution_df = session.warehouse_fleet().credit_attribution(24 * 7)
+        | >> rollup_credits(attribution_df, "QUERY_TAG")
+        """
+        return attribute_credits(
+            self.metering_history(date_range_start, date_range_end, source=source),
+            self.query_history(date_range_start, date_range_end, source=source),
+            idle_allocation=idle_allocation,
+        )
+
+    # -------------------------   bulk operations   ----------------------------
+
+    def _bulk(self, operation: str, warehouse_operation: Callable[[Warehouse], str], max_workers: int) -> pd.DataFrame:
+        """ run an operation on every warehouse concurrently and collect the status of each """
+
+        def run(warehouse: Warehouse) -> tuple:
+            try:
+                return (warehouse.name, operation, "success", warehouse_operation(warehouse))
+            except Exception as e:
+                logging.error(f"{operation} failed for warehouse {warehouse.name}: {e}")
+                return (warehouse.name, operation, "error", str(e))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run, self.warehouses()))
+
+        return pd.DataFrame(results, columns=OPERATION_COLUMNS)
+
+    def suspend(self, max_workers: int = 8) -> pd.DataFrame:
+        """
+        Suspend every warehouse in the fleet concurrently
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per warehouse: WAREHOUSE_NAME, OPERATION, STATUS ("success" or "error"), MESSAGE
+        """
+        return self._bulk("suspend", lambda warehouse: warehouse.suspend(), max_workers)
+
+    def resume(self, max_workers: int = 8) -> pd.DataFrame:
+        """ Resume every warehouse in the fleet concurrently (see suspend for the returned status) """
+        return self._bulk("resume", lambda warehouse: warehouse.resume(), max_workers)
+
+    def resize(self, wh_size: str, max_workers: int = 8) -> pd.DataFrame:
+        """ Resize every warehouse in the fleet concurrently (see Warehouse.resize for the sizes) """
+        normalize_size(wh_size)
+
+        return self._bulk("resize", lambda warehouse: warehouse.resize(wh_size), max_workers)
+
+    def set_auto_suspend(self, seconds: int, max_workers: int = 8) -> pd.DataFrame:
+        """ Set the auto suspend of every warehouse in the fleet concurrently """
+        return self._bulk("set_auto_suspend", lambda warehouse: warehouse.set_auto_suspend(seconds), max_workers)
+
+    def set_cluster_count(self, min_cluster_count: int, max_cluster_count: int, max_workers: int = 8) -> pd.DataFrame:
+        """ Set the min / max cluster counts of every warehouse in the fleet concurrently """
+        return self._bulk(
+            "set_cluster_count",
+            lambda warehouse: warehouse.set_cluster_count(min_cluster_count, max_cluster_count),
+            max_workers,
+        )
+
+    def snapshot(self) -> pd.DataFrame:
+        """
+        Capture the configuration of every warehouse in the fleet with a single "show warehouses" query
+
+        Returns
+        -------
+        pd.DataFrame
+            indexed by warehouse name with the columns:
+            size, min_cluster_count, max_cluster_count, auto_suspend, state
+        """
+        warehouses_df = snowpark_query(self.session, """ show warehouses in account """, non_select=True)
+        if self.warehouse_names is not None:
+            warehouse_names = {name.upper() for name in self.warehouse_names}
+            warehouses_df = warehouses_df[warehouses_df["name"].str.upper().isin(warehouse_names)]
+
+        snapshot_df = pd.DataFrame({
+            "size": warehouses_df["size"].map(normalize_size).to_numpy(),
+            "min_cluster_count": warehouses_df["min_cluster_count"].astype(int).to_numpy(),
+            "max_cluster_count": warehouses_df["max_cluster_count"].astype(int).to_numpy(),
+            "auto_suspend": pd.to_numeric(warehouses_df["auto_suspend"]).fillna(0).astype(int).to_numpy(),
+            "state": warehouses_df["state"].str.upper().to_numpy(),
+        }, index=pd.Index(warehouses_df["name"].to_numpy(), name="WAREHOUSE_NAME"))
+
+        return snapshot_df
+
+    def restore(self, snapshot_df: pd.DataFrame, restore_state: bool = True, max_workers: int = 8) -> pd.DataFrame:
+        """
+        Restore a snapshot (see snapshot). The current configuration is fetched with one query
+        and only the warehouses that changed are altered, each with a single alter statement
+        (plus a suspend / resume when restore_state = True and the state changed).
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per altered warehouse: WAREHOUSE_NAME, OPERATION, STATUS, MESSAGE
+        """
+        current_df = self.snapshot()
+
+        def restore_warehouse(warehouse: Warehouse) -> str:
+            target = snapshot_df.loc[warehouse.name]
+            current = current_df.loc[warehouse.name]
+
+            settings = [
+                f"{parameter} = {sql_size(target[column]) if column == 'size' else target[column]}"
+                for parameter, column in [
+                    ("WAREHOUSE_SIZE", "size"),
+                    ("MIN_CLUSTER_COUNT", "min_cluster_count"),
+                    ("MAX_CLUSTER_COUNT", "max_cluster_count"),
+                    ("AUTO_SUSPEND", "auto_suspend"),
+                ]
+                if target[column] != current[column]
+            ]
+
+            messages = []
+            if settings:
+                restore_sql = f""" alter warehouse if exists {warehouse.name} set {" ".join(settings)} """
+                restore_df = snowpark_query(self.session, restore_sql, non_select=True)
+                messages.append(restore_df.iloc[0, 0])
+
+            if restore_state and target["state"] != current["state"]:
+                if target["state"] == "SUSPENDED":
+                    messages.append(warehouse.suspend())
+                elif target["state"] == "STARTED":
+                    messages.append(warehouse.resume())
+
+            return "; ".join(messages)
+
+        changed_names = [
+            name for name in snapshot_df.index
+            if name in current_df.index
+            and current_df.loc[name, SNAPSHOT_COLUMNS].tolist() != snapshot_df.loc[name, SNAPSHOT_COLUMNS].tolist()
+        ]
+        if not changed_names:
+            return pd.DataFrame(columns=OPERATION_COLUMNS)
+
+        return WarehouseFleet(self.session, changed_names)._bulk("restore", restore_warehouse, max_workers)
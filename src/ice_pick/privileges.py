@@ -1,9 +1,10 @@
 
 from dataclasses import dataclass, field
-from typing import List, Union, Literal
+from typing import List, Union, Literal, Dict, Tuple, Set
 import copy
 import re
 import configparser
+from concurrent.futures import ThreadPoolExecutor
 
 from snowflake.snowpark import Session
 import snowflake.snowpark as snowpark
@@ -23,6 +24,193 @@ from ice_pick.account_object import (
 )
 
 import pandas as pd
+import numpy as np
+
+
+
+
+# -----------------------------     bulk grant loading    -------------------------------
+
+# object types in "show grants" output that differ from the SchemaObject types
+_GRANT_OBJECT_TYPE_MAP = {
+    "USER FUNCTION": "FUNCTION",
+    "EXTERNAL FUNCTION": "FUNCTION",
+    "EXTERNAL TABLE": "TABLE",
+    "INTERNAL STAGE": "STAGE",
+    "EXTERNAL STAGE": "STAGE",
+}
+
+
+def _grant_object_type(object_type: str) -> str:
+    object_type = str(object_type).upper().replace("_", " ")
+    return _GRANT_OBJECT_TYPE_MAP.get(object_type, object_type)
+
+
+def _grant_object_name(name: str) -> str:
+    # "show grants" quotes identifiers with special characters
+    return str(name).replace('"', "")
+
+
+def _fully_qualified_grant_names(grants_df: pd.DataFrame) -> pd.Series:
+    """
+        Build the fully qualified object name for each grant row (vectorized).
+        Account level objects keep their name, schemas are qualified with the database,
+        and schema objects are qualified with the database and schema.
+    """
+    names = grants_df["name"].astype(str).copy()
+
+    in_schema = grants_df["table_schema"].notna() & (grants_df["granted_on"] != "SCHEMA")
+    names[in_schema] = (
+        grants_df.loc[in_schema, "table_catalog"] + "."
+        + grants_df.loc[in_schema, "table_schema"] + "."
+        + names[in_schema]
+    )
+
+    in_database = (
+        grants_df["table_catalog"].notna()
+        & grants_df["table_schema"].isna()
+        & (grants_df["granted_on"] != "DATABASE")
+    )
+    names[in_database] = grants_df.loc[in_database, "table_catalog"] + "." + names[in_database]
+
+    return names
+
+
+def get_account_grants(session: Session, databases: list = None) -> pd.DataFrame:
+    """
+    Return every active grant to a role in the account with a single query against
+    SNOWFLAKE.ACCOUNT_USAGE.GRANTS_TO_ROLES (instead of one "show grants" per object).
+    Requires access to the SNOWFLAKE database (ex: ACCOUNTADMIN or IMPORTED PRIVILEGES).
+    Note that the ACCOUNT_USAGE views can lag behind the account by up to a few hours.
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    databases : list = None
+        optionally restrict the schema level grants to these databases
+        (account level grants are always returned)
+
+    Returns
+    -------
+    pd.DataFrame
+        | One row per grant with the columns:
+        | - privilege
+        | - granted_on (object type, ex: "TABLE")
+        | - name (fully qualified object name, ex: "DB.SCHEMA.TABLE")
+        | - table_catalog
+        | - table_schema
+        | - granted_to
+        | - grantee_name
+        | - grant_option
+
+    Example
+    -------
+        | >> grants_df = get_account_grants(session, databases=["TEST"])
+    """
+
+    database_filter_sql = ""
+    if databases:
+        database_list_str = ", ".join(f"'{database.upper()}'" for database in databases)
+        database_filter_sql = f""" and (table_catalog is null or table_catalog in ({database_list_str})) """
+
+    grants_sql = f""" select privilege, granted_on, name, table_catalog, table_schema,
+                             granted_to, grantee_name, grant_option
+                      from snowflake.account_usage.grants_to_roles
+                      where deleted_on is null {database_filter_sql} """
+
+    grants_df = snowpark_query(session, grants_sql)
+    grants_df.columns = [column.lower() for column in grants_df.columns]
+
+    # account usage uses "_" in multi word object types (ex: FILE_FORMAT)
+    grants_df["granted_on"] = grants_df["granted_on"].str.replace("_", " ", regex=False)
+    grants_df["name"] = _fully_qualified_grant_names(grants_df)
+
+    return grants_df
+
+
+def _object_grant_key(obj: Union[SchemaObject, AccountObject]) -> Tuple[str, str]:
+    """ (object type, fully qualified name) key used to match objects to grant rows """
+    if isinstance(obj, SchemaObject):
+        return _grant_object_type(obj.object_type), f"{obj.database}.{obj.schema}.{obj.object_name}"
+
+    return _grant_object_type(obj.object_type), obj.name
+
+
+def get_grants_bulk(
+    session: Session,
+    objects: List[Union[SchemaObject, AccountObject]],
+    method: str = "account_usage",
+    max_workers: int = 8,
+) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    Return the grants on many objects at once, grouped by object.
+
+    Methods:
+        - account_usage: a single query against SNOWFLAKE.ACCOUNT_USAGE.GRANTS_TO_ROLES
+          (see get_account_grants, can lag behind the account by a few hours)
+        - show: "show grants on" for each object, run concurrently with max_workers threads
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    objects : List[Union[SchemaObject, AccountObject]]
+        the objects to get grants for (ex: the result of a SchemaObjectFilter)
+    method : str = "account_usage"
+        "account_usage" or "show"
+    max_workers : int = 8
+        the number of concurrent queries for the "show" method
+
+    Returns
+    -------
+    Dict[Tuple[str, str], pd.DataFrame]
+        the grants for each object, keyed by (object type, fully qualified object name)
+        so objects of different types with the same name are kept apart
+        (objects without grants map to an empty dataframe)
+
+    Example
+    -------
+        | >> objs = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"]).return_schema_objects()
+        | >> grants = get_grants_bulk(session, objs)
+        | >> grants[("TABLE", "TEST.SCHEMA_1.CUSTOMER")]
+    """
+    object_keys = [_object_grant_key(obj) for obj in objects]
+
+    if method == "account_usage":
+        databases = sorted({obj.database for obj in objects if isinstance(obj, SchemaObject)})
+        grants_df = get_account_grants(session, databases or None)
+
+        object_key_set = set(object_keys)
+        grant_object_types = {
+            object_type: _grant_object_type(object_type) for object_type in grants_df["granted_on"].unique()
+        }
+        grant_keys = zip(grants_df["granted_on"].map(grant_object_types), grants_df["name"])
+        selected = np.fromiter(
+            (key in object_key_set for key in grant_keys), dtype=bool, count=len(grants_df)
+        )
+        grants_df = grants_df[selected]
+        grouped_grants = dict(iter(
+            grants_df.groupby([grants_df["granted_on"].map(grant_object_types), grants_df["name"]], sort=False)
+        ))
+
+    elif method == "show":
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            object_grant_dfs = list(executor.map(lambda obj: obj.get_grants_on(), objects))
+
+        grouped_grants = {
+            object_key: object_grants_df.assign(name=object_key[1])
+            for object_grants_df, object_key in zip(object_grant_dfs, object_keys)
+            if "privilege" in object_grants_df.columns
+        }
+        grants_df = pd.concat(grouped_grants.values()) if grouped_grants else pd.DataFrame(columns=["name"])
+
+    else:
+        raise ValueError(f"method {method} is not supported: use 'account_usage' or 'show'")
+
+    empty_df = grants_df.iloc[0:0]
+
+    return {object_key: grouped_grants.get(object_key, empty_df) for object_key in object_keys}
 
 
 
@@ -225,6 +413,11 @@ class Grant:
 
         grant_df = snowpark_query(self.session, grant_sql, non_select=True)
 
+        # the memoized grants on the object and to the role are stale now
+        for obj in (self.on_object, self.role):
+            if hasattr(obj, "invalidate"):
+                obj.invalidate()
+
         return grant_df
 
 
@@ -239,3 +432,269 @@ class Grant:
         return
     
 
+
+
+
+
+# -----------------------------     future grants    -------------------------------
+
+def get_future_grants(session: Session, databases: list = None, max_workers: int = 8) -> pd.DataFrame:
+    """
+    Return the future grants defined in every database and schema of the account.
+    The databases and schemas are listed with one "show" query each, then
+    "show future grants in database/schema" is run concurrently with max_workers threads.
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    databases : list = None
+        optionally only look at these databases
+    max_workers : int = 8
+        the number of concurrent "show future grants" queries
+
+    Returns
+    -------
+    pd.DataFrame
+        | One row per future grant with the columns:
+        | - privilege
+        | - grant_on (object type, ex: "TABLE")
+        | - name (ex: "DB.SCHEMA.<TABLE>" or "DB.<TABLE>")
+        | - grantee_name
+        | - database
+        | - schema (None for database level future grants)
+
+    Example
+    -------
+        | >> future_grants_df = get_future_grants(session, databases=["TEST"])
+    """
+    dbs_df = snowpark_query(session, """ show databases in account """, non_select=True)
+    database_names = dbs_df["name"].tolist()
+    if databases:
+        selected_databases = {database.upper() for database in databases}
+        database_names = [name for name in database_names if name.upper() in selected_databases]
+
+    schemas_df = snowpark_query(session, """ show schemas in account """, non_select=True)
+    schemas_df = schemas_df[
+        schemas_df["database_name"].isin(database_names)
+        & (schemas_df["name"] != "INFORMATION_SCHEMA")
+    ]
+
+    future_sql_list = [f""" show future grants in database "{database}" """ for database in database_names]
+    future_sql_list += [
+        f""" show future grants in schema "{database}"."{schema}" """
+        for database, schema in zip(schemas_df["database_name"], schemas_df["name"])
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_grant_dfs = list(
+            executor.map(lambda sql: snowpark_query(session, sql, non_select=True), future_sql_list)
+        )
+
+    future_grant_dfs = [df for df in future_grant_dfs if "privilege" in df.columns]
+    if not future_grant_dfs:
+        return pd.DataFrame(columns=["privilege", "grant_on", "name", "grantee_name", "database", "schema"])
+
+    future_grants_df = pd.concat(future_grant_dfs, ignore_index=True)
+
+    # name is "DB.<TABLE>" or "DB.SCHEMA.<TABLE>"
+    container_parts = future_grants_df["name"].map(_grant_object_name).str.rsplit(".", n=1).str[0].str.split(".", n=1)
+    future_grants_df["database"] = container_parts.str[0]
+    future_grants_df["schema"] = container_parts.map(lambda parts: parts[1] if len(parts) > 1 else None)
+
+    return future_grants_df
+
+
+class FutureGrantIndex:
+    """
+    An index from (database, schema, object type) to the future grants that will be applied
+    to new objects, so access to new objects can be predicted without per object queries.
+
+    Follows the Snowflake precedence rule: when future grants are defined on the same object type
+    for both a schema and its database, the schema level future grants apply and the
+    database level future grants are ignored.
+
+    Example
+    -------
+        | >> future_index = FutureGrantIndex.from_session(session, databases=["TEST"])
+        | >> future_index.resolve("TEST", "SCHEMA_1", "TABLE")
+        | {('SELECT', 'ANALYST')}
+    """
+
+    def __init__(self, future_grants_df: pd.DataFrame):
+        self.future_grants: Dict[Tuple[str, str, str], Set[Tuple[str, str]]] = {}
+
+        if future_grants_df is None or future_grants_df.empty:
+            return
+
+        future_rows = zip(
+            future_grants_df["database"],
+            future_grants_df["schema"],
+            future_grants_df["grant_on"].map(_grant_object_type),
+            future_grants_df["privilege"],
+            future_grants_df["grantee_name"],
+        )
+        for database, schema, object_type, privilege, grantee_name in future_rows:
+            schema = schema if isinstance(schema, str) else None
+            self.future_grants.setdefault((database, schema, object_type), set()).add(
+                (privilege, grantee_name)
+            )
+
+    @classmethod
+    def from_session(cls, session: Session, databases: list = None, max_workers: int = 8):
+        """ build the index from a bulk fetch of the account's future grants """
+        return cls(get_future_grants(session, databases, max_workers))
+
+    def __len__(self):
+        return len(self.future_grants)
+
+    def resolve(self, database: str, schema: str, object_type: str) -> Set[Tuple[str, str]]:
+        """
+        return the (privilege, grantee_name) pairs that a new object of object_type
+        created in database.schema would receive
+        """
+        object_type = _grant_object_type(object_type)
+        schema_grants = self.future_grants.get((database, schema, object_type))
+        if schema_grants:
+            return schema_grants
+
+        return self.future_grants.get((database, None, object_type), set())
+
+
+
+
+# -----------------------------     privilege index    -------------------------------
+
+class PrivilegeIndex:
+    """
+    A hash index of privileges, built once from a "show grants to role" style dataframe
+    (ex: User.get_all_privileges()), so many objects can be checked without re-crawling the grants.
+
+    Privileges are keyed by (object type, fully qualified name). Database and schema level
+    grants are kept in the same index and inherited by the objects inside them
+    when checking usage (a role needs USAGE on the database and schema to use an object).
+    An optional FutureGrantIndex adds the privileges new objects would receive from future grants.
+    Future grants are matched against roles, the roles the privileges were crawled from
+    (defaults to the grantees in privileges_df, which misses roles that only have future grants).
+
+    Example
+    -------
+        | >> index = PrivilegeIndex(user.get_all_privileges())
+        | >> index.lookup("TABLE", "TEST.SCHEMA_1.CUSTOMER")
+        | {'SELECT'}
+
+        | Predict access to new objects with an account wide future grant index:
+        | >> index = PrivilegeIndex(user.get_all_privileges(), FutureGrantIndex.from_session(session))
+        | >> index.predict_privileges("TEST", "SCHEMA_1", "TABLE")
+    """
+
+    def __init__(
+        self, privileges_df: pd.DataFrame, future_index: FutureGrantIndex = None, roles: Set[str] = None
+    ):
+        self.object_privileges: Dict[Tuple[str, str], Set[str]] = {}
+        self.future_index = future_index
+        self.roles: Set[str] = set(roles) if roles is not None else set()
+
+        if privileges_df is None or privileges_df.empty:
+            return
+
+        if roles is None:
+            self.roles = set(privileges_df["grantee_name"].unique())
+
+        granted_on = privileges_df["granted_on"].map(_grant_object_type).tolist()
+        names = privileges_df["name"].map(_grant_object_name).tolist()
+        privileges = privileges_df["privilege"].tolist()
+
+        for object_type, name, privilege in zip(granted_on, names, privileges):
+            self.object_privileges.setdefault((object_type, name), set()).add(privilege)
+
+    def __len__(self):
+        return len(self.object_privileges)
+
+    def lookup(self, object_type: str, name: str) -> Set[str]:
+        """ return the privileges granted directly on the object """
+        key = (_grant_object_type(object_type), _grant_object_name(name))
+        return self.object_privileges.get(key, set())
+
+    def has_usage(self, object_type: str, name: str) -> bool:
+        privileges = self.lookup(object_type, name)
+        return "USAGE" in privileges or "OWNERSHIP" in privileges
+
+    def predict_privileges(self, database: str, schema: str, object_type: str) -> Set[str]:
+        """
+        return the privileges the indexed roles would get on a new object of object_type
+        created in database.schema (from future grants, requires a future_index)
+        """
+        if self.future_index is None:
+            return set()
+
+        return {
+            privilege
+            for privilege, grantee_name in self.future_index.resolve(database, schema, object_type)
+            if grantee_name in self.roles
+        }
+
+    def check_privileges(self, objects: List[SchemaObject]) -> pd.DataFrame:
+        """
+        Check many schema objects against the index in one call.
+
+        Parameters
+        ----------
+        objects : List[SchemaObject]
+            the schema objects to check
+
+        Returns
+        -------
+        pd.DataFrame
+            | One row per object with the columns:
+            | - database
+            | - schema
+            | - object_name
+            | - object_type
+            | - privileges (privileges on the object)
+            | - database_usage (USAGE or OWNERSHIP on the database)
+            | - schema_usage (USAGE or OWNERSHIP on the schema)
+            | - usable (has privileges on the object and usage on the database and schema)
+            | - future_privileges (privileges a new object of the same type in the schema would get)
+        """
+        columns = ["database", "schema", "object_name", "object_type"]
+        objects_df = pd.DataFrame(
+            [[obj.database, obj.schema, obj.object_name, obj.object_type] for obj in objects],
+            columns=columns,
+        )
+
+        # database and schema usage only needs one lookup per container
+        database_usage = {
+            database: self.has_usage("DATABASE", database)
+            for database in objects_df["database"].unique()
+        }
+        schema_names = (objects_df["database"] + "." + objects_df["schema"]).tolist()
+        schema_usage = {schema: self.has_usage("SCHEMA", schema) for schema in set(schema_names)}
+
+        object_names = [
+            f"{schema}.{object_name}"
+            for schema, object_name in zip(schema_names, objects_df["object_name"])
+        ]
+
+        objects_df["privileges"] = [
+            sorted(self.lookup(object_type, name))
+            for object_type, name in zip(objects_df["object_type"], object_names)
+        ]
+        objects_df["database_usage"] = objects_df["database"].map(database_usage).astype(bool)
+        objects_df["schema_usage"] = pd.Series(
+            [schema_usage[schema] for schema in schema_names], index=objects_df.index, dtype=bool
+        )
+        objects_df["usable"] = (
+            (objects_df["privileges"].str.len() > 0)
+            & objects_df["database_usage"]
+            & objects_df["schema_usage"]
+        )
+
+        # future grants only depend on the container and type, so resolve each combination once
+        containers = list(zip(objects_df["database"], objects_df["schema"], objects_df["object_type"]))
+        future_privileges = {
+            container: sorted(self.predict_privileges(*container)) for container in set(containers)
+        }
+        objects_df["future_privileges"] = [future_privileges[container] for container in containers]
+
+        return objects_df
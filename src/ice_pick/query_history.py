@@ -0,0 +1,442 @@
+"""
+Incremental query history sync and cached query operator stats.
+Query history is paged through by time windows (splitting any window that hits RESULT_LIMIT),
+persisted locally keyed by QUERY_ID, and later syncs only fetch queries since the stored high water mark.
+Operator stats for finished queries never change, so they are cached permanently by QUERY_ID.
+"""
+
+from dataclasses import dataclass
+from typing import List, Dict
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import sqlite3
+import logging
+import warnings
+
+from snowflake.snowpark import Session
+
+import pandas as pd
+
+from ice_pick.utils import snowpark_query
+
+
+STORAGE_TYPES = ["sqlite", "parquet"]
+TABLE_NAME = "query_history"
+
+
+def _to_utc(timestamps: pd.Series) -> pd.Series:
+    """ store timestamps as naive UTC so they sort and compare consistently """
+    timestamps = pd.to_datetime(timestamps, utc=True)
+
+    return timestamps.dt.tz_localize(None)
+
+
+@dataclass
+class QueryHistorySync:
+    """
+    Sync query history to local storage.
+
+    Attributes
+    ----------
+    session: Session
+        Snowpark Session
+    warehouse_name: str
+        only sync queries for this warehouse (None for all warehouses)
+    path: str
+        the SQLite database file, or the directory of Parquet files
+    storage: str
+        "sqlite" (default) or "parquet" (requires pyarrow)
+    window_hours: float
+        the size of the time windows that history is fetched in
+    result_limit: int
+        RESULT_LIMIT for each window query (max 10,000).
+        Windows that hit the limit are split in half and fetched again.
+    min_window_minutes: float
+        windows are not split below this size (a warning is raised if they are still truncated)
+
+    Example
+    -------
+        | >> history_sync = QueryHistorySync(session, "COMPUTE_WH", path="compute_wh_history.db")
+        | >> history_sync.sync(lookback_hours=72)   # first run, fetch the last 3 days
+        | >> history_sync.sync()                    # later runs only fetch new queries
+        | >> history_df = history_sync.load()
+    """
+
+    session: Session
+    warehouse_name: str = None
+    path: str = "query_history.db"
+    storage: str = "sqlite"
+    window_hours: float = 6
+    result_limit: int = 10000
+    min_window_minutes: float = 1
+
+    def __post_init__(self):
+        if self.storage not in STORAGE_TYPES:
+            raise ValueError(f"storage {self.storage} not supported: supported storage: {STORAGE_TYPES}")
+
+    # -------------------------   fetching   ----------------------------
+
+    def _fetch_window(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """ fetch the queries that ended in [start, end) """
+        start_str = start.strftime("%Y-%m-%d %H:%M:%S.%f")
+        end_str = end.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        if self.warehouse_name is None:
+            table_function = "QUERY_HISTORY("
+        else:
+            table_function = f"QUERY_HISTORY_BY_WAREHOUSE(WAREHOUSE_NAME => '{self.warehouse_name}',"
+
+        history_sql = f"""select * from
+                            table (information_schema.{table_function}
+                                END_TIME_RANGE_START => to_timestamp_ltz('{start_str} +00:00', 'YYYY-MM-DD HH24:MI:SS.FF TZH:TZM'),
+                                END_TIME_RANGE_END => to_timestamp_ltz('{end_str} +00:00', 'YYYY-MM-DD HH24:MI:SS.FF TZH:TZM'),
+                                RESULT_LIMIT => {self.result_limit} )
+                                );"""
+
+        return snowpark_query(self.session, history_sql)
+
+    def _fetch_range(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """ fetch a window, splitting it in half while the result is truncated """
+        history_df = self._fetch_window(start, end)
+
+        if len(history_df) < self.result_limit:
+            return history_df
+
+        if (end - start) <= pd.Timedelta(minutes=self.min_window_minutes):
+            warnings.warn(
+                f"query history between {start} and {end} hit RESULT_LIMIT {self.result_limit} "
+                "and may be incomplete",
+                UserWarning,
+            )
+            return history_df
+
+        logging.debug(f"query history window {start} - {end} truncated, splitting")
+        midpoint = start + (end - start) / 2
+
+        return pd.concat(
+            [self._fetch_range(start, midpoint), self._fetch_range(midpoint, end)],
+            ignore_index=True,
+        )
+
+    def fetch(self, start: pd.Timestamp, end: pd.Timestamp = None) -> pd.DataFrame:
+        """
+        Fetch the complete query history between start and end (UTC) by paging through time windows.
+        Nothing is persisted.
+        """
+        end = pd.Timestamp.now(tz="UTC").tz_localize(None) if end is None else end
+        window = pd.Timedelta(hours=self.window_hours)
+
+        window_dfs = []
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + window, end)
+            window_dfs.append(self._fetch_range(window_start, window_end))
+            window_start = window_end
+
+        window_dfs = [window_df for window_df in window_dfs if not window_df.empty]
+        if not window_dfs:
+            return pd.DataFrame()
+
+        history_df = pd.concat(window_dfs, ignore_index=True)
+        history_df = history_df.drop_duplicates(subset="QUERY_ID", keep="last")
+
+        for column in ["START_TIME", "END_TIME"]:
+            if column in history_df.columns:
+                history_df[column] = _to_utc(history_df[column])
+
+        return history_df.reset_index(drop=True)
+
+    # -------------------------   storage   ----------------------------
+
+    def high_water_mark(self) -> pd.Timestamp:
+        """ return the latest stored END_TIME (UTC), or None if nothing has been synced """
+        if not Path(self.path).exists():
+            return None
+
+        if self.storage == "sqlite":
+            with sqlite3.connect(self.path) as conn:
+                table_exists = conn.execute(
+                    "select name from sqlite_master where type = 'table' and name = ?", (TABLE_NAME,)
+                ).fetchone()
+                if not table_exists:
+                    return None
+                high_water = conn.execute(f"select max(END_TIME) from {TABLE_NAME}").fetchone()[0]
+        else:
+            stored_df = self.load(columns=["END_TIME"])
+            high_water = stored_df["END_TIME"].max() if not stored_df.empty else None
+
+        return None if high_water is None else pd.Timestamp(high_water)
+
+    def _save(self, history_df: pd.DataFrame):
+        if self.storage == "sqlite":
+            with sqlite3.connect(self.path) as conn:
+                history_df.head(0).to_sql(TABLE_NAME, conn, if_exists="append", index=False)
+                conn.execute(
+                    f"create unique index if not exists {TABLE_NAME}_query_id on {TABLE_NAME} (QUERY_ID)"
+                )
+                history_df.to_sql(f"{TABLE_NAME}_staging", conn, if_exists="replace", index=False)
+                columns = ", ".join(f'"{column}"' for column in history_df.columns)
+                conn.execute(
+                    f"insert or replace into {TABLE_NAME} ({columns}) "
+                    f"select {columns} from {TABLE_NAME}_staging"
+                )
+                conn.execute(f"drop table {TABLE_NAME}_staging")
+        else:
+            Path(self.path).mkdir(parents=True, exist_ok=True)
+            part_name = pd.Timestamp.now(tz="UTC").strftime("%Y%m%dT%H%M%S%f")
+            history_df.to_parquet(Path(self.path) / f"part-{part_name}.parquet", index=False)
+
+    def load(self, columns: list = None) -> pd.DataFrame:
+        """ return the stored query history (one row per QUERY_ID) """
+        if not Path(self.path).exists():
+            return pd.DataFrame()
+
+        if self.storage == "sqlite":
+            column_str = "*" if columns is None else ", ".join(f'"{column}"' for column in columns)
+            with sqlite3.connect(self.path) as conn:
+                history_df = pd.read_sql(f"select {column_str} from {TABLE_NAME}", conn)
+        else:
+            read_columns = None if columns is None else list(dict.fromkeys(columns + ["QUERY_ID"]))
+            history_df = pd.read_parquet(self.path, columns=read_columns)
+            history_df = history_df.drop_duplicates(subset="QUERY_ID", keep="last")
+            if columns is not None:
+                history_df = history_df[columns]
+
+        for column in ["START_TIME", "END_TIME"]:
+            if column in history_df.columns:
+                history_df[column] = pd.to_datetime(history_df[column])
+
+        return history_df.reset_index(drop=True)
+
+    def sync(self, lookback_hours: float = 24) -> pd.DataFrame:
+        """
+        Fetch and store the queries since the high water mark
+        (or the last lookback_hours on the first sync).
+
+        Returns
+        -------
+        pd.DataFrame
+            the newly fetched queries
+        """
+        high_water = self.high_water_mark()
+        if high_water is None:
+            start = pd.Timestamp.now(tz="UTC").tz_localize(None) - pd.Timedelta(hours=lookback_hours)
+        else:
+            # the stored high water mark is inclusive, duplicates are replaced by QUERY_ID
+            start = high_water
+
+        history_df = self.fetch(start)
+
+        if not history_df.empty:
+            self._save(history_df)
+
+        logging.debug(f"synced {len(history_df)} queries since {start}")
+
+        return history_df
+
+
+
+# -------------------------   operator stats   ----------------------------
+
+OPERATOR_STATS_TABLE_NAME = "operator_stats"
+OPERATOR_STATS_COLUMNS = [
+    "QUERY_ID",
+    "OPERATOR_ID",
+    "OPERATOR_TYPE",
+    "LOCAL_DISK",
+    "REMOTE_DISK",
+    "PROCESSING",
+    "OVERALL_PERCENTAGE",
+    "BYTES_SPILLED_LOCAL",
+    "BYTES_SPILLED_REMOTE",
+]
+
+# operator stats of queries in any other state (ex: RUNNING, QUEUED) are incomplete
+FINAL_EXECUTION_STATUSES = ["SUCCESS", "FAIL", "INCIDENT"]
+
+
+def _operator_stats_sql(query_ids: List[str]) -> str:
+    """ one statement that returns the operator stats for all of the query ids """
+    operator_stats_queries = [
+        f"""select '{query_id}' as QUERY_ID,
+            OPERATOR_ID,
+            OPERATOR_TYPE,
+            EXECUTION_TIME_BREAKDOWN:local_disk_io::float as LOCAL_DISK,
+            EXECUTION_TIME_BREAKDOWN:remote_disk_io::float as REMOTE_DISK,
+            EXECUTION_TIME_BREAKDOWN:processing::float as PROCESSING,
+            EXECUTION_TIME_BREAKDOWN:overall_percentage::float as OVERALL_PERCENTAGE,
+            OPERATOR_STATISTICS:spilling:bytes_spilled_local_storage::float as BYTES_SPILLED_LOCAL,
+            OPERATOR_STATISTICS:spilling:bytes_spilled_remote_storage::float as BYTES_SPILLED_REMOTE
+                from table(get_query_operator_stats('{query_id}'))"""
+        for query_id in query_ids
+    ]
+
+    return " union all ".join(operator_stats_queries)
+
+
+class OperatorStatsCache:
+    """
+    A permanent cache of query operator stats keyed by QUERY_ID.
+    Missing queries are fetched in batches (one union all statement per batch)
+    with the batches run concurrently. With a path the cache is also persisted to SQLite.
+    Only queries with a final execution status are cached (see FINAL_EXECUTION_STATUSES).
+
+    Example
+    -------
+        | >> stats_cache = OperatorStatsCache("operator_stats.db")
+        | >> stats_df = stats_cache.get(session, top_query_ids)
+        | >> summarize_operator_stats(stats_df)
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._stats: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __contains__(self, query_id: str):
+        return query_id in self._stats
+
+    def _load_persisted(self, query_ids: List[str]):
+        if self.path is None or not Path(self.path).exists():
+            return
+
+        with sqlite3.connect(self.path) as conn:
+            table_exists = conn.execute(
+                "select name from sqlite_master where type = 'table' and name = ?",
+                (OPERATOR_STATS_TABLE_NAME,),
+            ).fetchone()
+            if not table_exists:
+                return
+
+            id_params = ", ".join("?" for _ in query_ids)
+            stats_df = pd.read_sql(
+                f"select * from {OPERATOR_STATS_TABLE_NAME} where QUERY_ID in ({id_params})",
+                conn,
+                params=query_ids,
+            )
+            cached_ids = [
+                row[0]
+                for row in conn.execute(
+                    f"select QUERY_ID from {OPERATOR_STATS_TABLE_NAME}_queries where QUERY_ID in ({id_params})",
+                    query_ids,
+                )
+            ]
+
+        for query_id in cached_ids:
+            self._stats[query_id] = stats_df[stats_df["QUERY_ID"] == query_id]
+
+    def _persist(self, query_ids: List[str], stats_df: pd.DataFrame):
+        if self.path is None or not query_ids:
+            return
+
+        with sqlite3.connect(self.path) as conn:
+            stats_df.to_sql(OPERATOR_STATS_TABLE_NAME, conn, if_exists="append", index=False)
+            # queries without operator stats are also recorded so they are not fetched again
+            pd.DataFrame({"QUERY_ID": query_ids}).to_sql(
+                f"{OPERATOR_STATS_TABLE_NAME}_queries", conn, if_exists="append", index=False
+            )
+
+    def get(
+        self,
+        session: Session,
+        query_ids: List[str],
+        max_workers: int = 8,
+        batch_size: int = 25,
+        final_query_ids: List[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Return the operator stats for the query ids, only fetching queries that are not cached.
+
+        Parameters
+        ----------
+        session : Session
+            Snowpark Session
+        query_ids : List[str]
+            the query ids
+        max_workers : int = 8
+            the number of concurrent batch queries
+        batch_size : int = 25
+            the number of queries combined into each statement
+        final_query_ids : List[str] = None
+            the query ids with a final EXECUTION_STATUS (see final_query_ids()),
+            the stats of other queries are fetched but not cached. Defaults to all of the query ids
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per query operator (see OPERATOR_STATS_COLUMNS)
+        """
+        query_ids = list(dict.fromkeys(query_ids))
+
+        with self._lock:
+            missing_ids = [query_id for query_id in query_ids if query_id not in self._stats]
+            if missing_ids:
+                self._load_persisted(missing_ids)
+                missing_ids = [query_id for query_id in missing_ids if query_id not in self._stats]
+
+        if missing_ids:
+            batches = [missing_ids[i:i + batch_size] for i in range(0, len(missing_ids), batch_size)]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                batch_dfs = list(
+                    executor.map(lambda batch: snowpark_query(session, _operator_stats_sql(batch)), batches)
+                )
+
+            fetched_df = pd.concat(batch_dfs, ignore_index=True)
+            fetched_df.columns = [column.upper() for column in fetched_df.columns]
+            fetched_df = fetched_df.reindex(columns=OPERATOR_STATS_COLUMNS)
+
+            fetched = {query_id: fetched_df[fetched_df["QUERY_ID"] == query_id] for query_id in missing_ids}
+
+            final_ids = set(query_ids if final_query_ids is None else final_query_ids)
+            cache_ids = [query_id for query_id in missing_ids if query_id in final_ids]
+            with self._lock:
+                for query_id in cache_ids:
+                    self._stats[query_id] = fetched[query_id]
+                self._persist(cache_ids, fetched_df[fetched_df["QUERY_ID"].isin(cache_ids)])
+        else:
+            fetched = {}
+
+        stats_dfs = [fetched[query_id] if query_id in fetched else self._stats[query_id] for query_id in query_ids]
+        if not stats_dfs:
+            return pd.DataFrame(columns=OPERATOR_STATS_COLUMNS)
+
+        return pd.concat(stats_dfs, ignore_index=True)
+
+
+def final_query_ids(query_df: pd.DataFrame) -> List[str]:
+    """ the ids of the queries in a query history dataframe that finished (see FINAL_EXECUTION_STATUSES) """
+    if "EXECUTION_STATUS" not in query_df.columns:
+        return query_df["QUERY_ID"].tolist()
+
+    return query_df.loc[query_df["EXECUTION_STATUS"].isin(FINAL_EXECUTION_STATUSES), "QUERY_ID"].tolist()
+
+
+# shared process wide cache used by Warehouse.resize_recommendation
+OPERATOR_STATS_CACHE = OperatorStatsCache()
+
+
+def summarize_operator_stats(operator_stats_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate operator stats to one row per query (vectorized group by).
+
+    Returns
+    -------
+    pd.DataFrame
+        | Indexed by QUERY_ID with the columns:
+        | - LOCAL_DISK_MEAN (mean local disk io fraction of the operators)
+        | - REMOTE_DISK_MEAN
+        | - PROCESSING_MEAN
+        | - BYTES_SPILLED_LOCAL (total)
+        | - BYTES_SPILLED_REMOTE (total)
+    """
+    return operator_stats_df.groupby("QUERY_ID").agg(
+        LOCAL_DISK_MEAN=("LOCAL_DISK", "mean"),
+        REMOTE_DISK_MEAN=("REMOTE_DISK", "mean"),
+        PROCESSING_MEAN=("PROCESSING", "mean"),
+        BYTES_SPILLED_LOCAL=("BYTES_SPILLED_LOCAL", "sum"),
+        BYTES_SPILLED_REMOTE=("BYTES_SPILLED_REMOTE", "sum"),
+    )
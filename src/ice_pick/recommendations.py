@@ -0,0 +1,340 @@
+"""
+Vectorized warehouse recommendations.
+Fleet telemetry (load, queueing, spilling and credits) is aligned into (warehouse x period) NumPy arrays,
+rolling percentile and trend features are computed for every warehouse at once,
+and a list of pluggable rules turns the features into sizing, scale out / in and auto suspend recommendations.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Callable
+
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+NO_CHANGE = "No Change"
+TELEMETRY_METRICS = ["running", "queued", "credits", "spill_bytes", "queued_overload_ms", "queries"]
+
+
+# -------------------------   telemetry alignment   ----------------------------
+
+@dataclass
+class FleetTelemetry:
+    """
+    Fleet telemetry aligned on the same warehouses and periods.
+
+    Attributes
+    ----------
+    warehouses: list
+        the warehouse names (the rows of each metric array)
+    periods: pd.DatetimeIndex
+        the period start times (the columns of each metric array)
+    metrics: Dict[str, np.ndarray]
+        metric name -> array with shape (len(warehouses), len(periods))
+    """
+
+    warehouses: list
+    periods: pd.DatetimeIndex
+    metrics: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.metrics[metric]
+
+
+def _telemetry_columns(telemetry_df: pd.DataFrame) -> pd.DataFrame:
+    # fleet telemetry is indexed by (WAREHOUSE_NAME, START_TIME)
+    if "WAREHOUSE_NAME" in (telemetry_df.index.names or []):
+        telemetry_df = telemetry_df.reset_index()
+
+    return telemetry_df
+
+
+def _pivot_metric(
+    telemetry_df: pd.DataFrame,
+    column: str,
+    warehouses: list,
+    periods: pd.DatetimeIndex,
+    freq: str,
+    aggfunc: str,
+) -> np.ndarray:
+    if telemetry_df is None or telemetry_df.empty or column not in telemetry_df.columns:
+        return np.zeros((len(warehouses), len(periods)))
+
+    metric_df = telemetry_df[["WAREHOUSE_NAME", "START_TIME", column]].copy()
+    metric_df["START_TIME"] = pd.to_datetime(metric_df["START_TIME"]).dt.floor(freq)
+    metric_df[column] = pd.to_numeric(metric_df[column], errors="coerce")
+
+    metric_pivot_df = metric_df.pivot_table(
+        index="WAREHOUSE_NAME", columns="START_TIME", values=column, aggfunc=aggfunc
+    )
+    metric_pivot_df = metric_pivot_df.reindex(index=warehouses, columns=periods)
+
+    return metric_pivot_df.to_numpy(dtype=float)
+
+
+def align_telemetry(
+    load_df: pd.DataFrame = None,
+    metering_df: pd.DataFrame = None,
+    query_df: pd.DataFrame = None,
+    freq: str = "h",
+) -> FleetTelemetry:
+    """
+    Align fleet telemetry (ex: from WarehouseFleet) into (warehouse x period) arrays.
+
+    Metrics:
+        | - running: mean AVG_RUNNING (load history)
+        | - queued: mean AVG_QUEUED_LOAD (load history)
+        | - credits: total CREDITS_USED (metering history)
+        | - spill_bytes: total local + remote spilled bytes (query history)
+        | - queued_overload_ms: total QUEUED_OVERLOAD_TIME (query history)
+        | - queries: query count (query history)
+
+    Periods without telemetry are treated as idle (0).
+    """
+    load_df, metering_df, query_df = (
+        _telemetry_columns(df) if df is not None else None for df in (load_df, metering_df, query_df)
+    )
+    telemetry_dfs = [df for df in (load_df, metering_df, query_df) if df is not None and not df.empty]
+
+    if not telemetry_dfs:
+        empty_metrics = {name: np.zeros((0, 0)) for name in TELEMETRY_METRICS}
+        return FleetTelemetry([], pd.DatetimeIndex([]), empty_metrics)
+
+    warehouses = sorted(set().union(*(df["WAREHOUSE_NAME"].dropna().unique() for df in telemetry_dfs)))
+    start_times = pd.concat([pd.to_datetime(df["START_TIME"]) for df in telemetry_dfs])
+    periods = pd.date_range(start_times.min().floor(freq), start_times.max().floor(freq), freq=freq)
+
+    if query_df is not None and not query_df.empty:
+        query_df = query_df.assign(
+            SPILL_BYTES=query_df.reindex(
+                columns=["BYTES_SPILLED_TO_LOCAL_STORAGE", "BYTES_SPILLED_TO_REMOTE_STORAGE"]
+            ).fillna(0).sum(axis=1),
+            QUERIES=1,
+        )
+
+    metrics = {
+        "running": _pivot_metric(load_df, "AVG_RUNNING", warehouses, periods, freq, "mean"),
+        "queued": _pivot_metric(load_df, "AVG_QUEUED_LOAD", warehouses, periods, freq, "mean"),
+        "credits": _pivot_metric(metering_df, "CREDITS_USED", warehouses, periods, freq, "sum"),
+        "spill_bytes": _pivot_metric(query_df, "SPILL_BYTES", warehouses, periods, freq, "sum"),
+        "queued_overload_ms": _pivot_metric(query_df, "QUEUED_OVERLOAD_TIME", warehouses, periods, freq, "sum"),
+        "queries": _pivot_metric(query_df, "QUERIES", warehouses, periods, freq, "sum"),
+    }
+    metrics = {name: np.nan_to_num(metric_array) for name, metric_array in metrics.items()}
+
+    return FleetTelemetry(warehouses, periods, metrics)
+
+
+# -------------------------   features   ----------------------------
+
+def rolling_percentile(values: np.ndarray, window: int, q: float) -> np.ndarray:
+    """
+    Rolling percentile over the period axis for every warehouse at once.
+    Returns an array with the same shape as values (NaN until the first full window).
+    """
+    n_warehouses, n_periods = values.shape
+    rolling = np.full((n_warehouses, n_periods), np.nan)
+    if n_periods < window:
+        return rolling
+
+    windows = sliding_window_view(values, window, axis=1)
+    rolling[:, window - 1:] = np.percentile(windows, q, axis=-1)
+
+    return rolling
+
+
+def trend(values: np.ndarray, window: int) -> np.ndarray:
+    """ least squares slope per period over the last window periods, for every warehouse """
+    recent = values[:, -window:]
+    x = np.arange(recent.shape[1], dtype=float)
+    x_centered = x - x.mean()
+    denominator = (x_centered ** 2).sum()
+    if denominator == 0:
+        return np.zeros(recent.shape[0])
+
+    return ((recent - recent.mean(axis=1, keepdims=True)) * x_centered).sum(axis=1) / denominator
+
+
+def compute_features(telemetry: FleetTelemetry, window: int = 24) -> pd.DataFrame:
+    """
+    Compute the recommendation features for every warehouse over the last window periods.
+
+    Returns
+    -------
+    pd.DataFrame
+        | Indexed by warehouse with the columns:
+        | - running_p50, running_p95, running_trend
+        | - queued_p95, queued_trend
+        | - queued_overload_p95_ms
+        | - spill_p95_bytes
+        | - credits_total, credits_trend
+        | - idle_credit_fraction (fraction of credits billed in periods with no running load)
+        | - queries_total
+    """
+    window = max(1, min(window, len(telemetry.periods)))
+
+    def latest_percentile(metric: str, q: float) -> np.ndarray:
+        if len(telemetry.periods) == 0:
+            return np.zeros(len(telemetry.warehouses))
+        # only the last window is needed, not every rolling window
+        return np.percentile(telemetry[metric][:, -window:], q, axis=1)
+
+    recent_credits = telemetry["credits"][:, -window:]
+    recent_running = telemetry["running"][:, -window:]
+    credits_total = recent_credits.sum(axis=1)
+    idle_credits = np.where(recent_running == 0, recent_credits, 0).sum(axis=1)
+
+    features_df = pd.DataFrame(
+        {
+            "running_p50": latest_percentile("running", 50),
+            "running_p95": latest_percentile("running", 95),
+            "running_trend": trend(telemetry["running"], window),
+            "queued_p95": latest_percentile("queued", 95),
+            "queued_trend": trend(telemetry["queued"], window),
+            "queued_overload_p95_ms": latest_percentile("queued_overload_ms", 95),
+            "spill_p95_bytes": latest_percentile("spill_bytes", 95),
+            "credits_total": credits_total,
+            "credits_trend": trend(telemetry["credits"], window),
+            "idle_credit_fraction": np.divide(
+                idle_credits, credits_total, out=np.zeros_like(credits_total), where=credits_total > 0
+            ),
+            "queries_total": telemetry["queries"][:, -window:].sum(axis=1),
+        },
+        index=pd.Index(telemetry.warehouses, name="WAREHOUSE_NAME"),
+    )
+
+    return features_df
+
+
+# -------------------------   rules   ----------------------------
+
+@dataclass
+class Rule:
+    """
+    A recommendation rule evaluated on the features of every warehouse at once.
+
+    Attributes
+    ----------
+    name: str
+        the rule name
+    action: str
+        the recommended action when the rule matches (ex: "Size Up")
+    condition: Callable[[pd.DataFrame], pd.Series]
+        returns a boolean series (one value per warehouse) from the features dataframe
+    reason: str
+        a human readable explanation
+    """
+
+    name: str
+    action: str
+    condition: Callable[[pd.DataFrame], pd.Series]
+    reason: str = ""
+
+
+# rules are in priority order, the first matching rule sets the recommended action
+DEFAULT_RULES = [
+    Rule(
+        "heavy_spilling",
+        "Size Up",
+        lambda f: f["spill_p95_bytes"] > 1e9,
+        "p95 hourly spill is over 1 GB, queries need more memory / local disk",
+    ),
+    Rule(
+        "queueing",
+        "Scale Out",
+        lambda f: (f["queued_p95"] > 1) | (f["queued_overload_p95_ms"] > 10 * 60 * 1000),
+        "queries are queuing for the warehouse without heavy spilling, add clusters",
+    ),
+    Rule(
+        "idle_clusters",
+        "Scale In",
+        lambda f: (f["max_cluster_count"] > 1) & (f["queued_p95"] == 0) & (f["running_p95"] < 1),
+        "no queueing and less than one cluster of load, remove clusters",
+    ),
+    Rule(
+        "idle_credits",
+        "Reduce Auto Suspend",
+        lambda f: f["idle_credit_fraction"] > 0.25,
+        "over 25% of credits were billed in periods with no running queries",
+    ),
+    Rule(
+        "underused",
+        "Size Down",
+        lambda f: (f["running_p95"] < 0.25) & (f["spill_p95_bytes"] == 0)
+        & (f["queued_p95"] == 0) & (f["credits_total"] > 0),
+        "low load with no spilling or queueing",
+    ),
+]
+
+
+@dataclass
+class RecommendationEngine:
+    """
+    Compute recommendations for a whole fleet in one vectorized pass.
+
+    Attributes
+    ----------
+    rules: List[Rule]
+        the rules in priority order (defaults to DEFAULT_RULES)
+    window: int
+        the number of periods the features are computed over
+
+    Example
+    -------
+        | >> fleet = session.warehouse_fleet()
+        | >> telemetry = align_telemetry(fleet.load_history(48, 0), fleet.metering_history(48, 0), fleet.query_history(48, 0))
+        | >> RecommendationEngine(window=24).recommend(telemetry)
+    """
+
+    rules: List[Rule] = field(default_factory=lambda: list(DEFAULT_RULES))
+    window: int = 24
+
+    def recommend(self, telemetry: FleetTelemetry, settings_df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Parameters
+        ----------
+        telemetry : FleetTelemetry
+            the aligned fleet telemetry (see align_telemetry)
+        settings_df : pd.DataFrame = None
+            the current warehouse settings indexed by warehouse (ex: WarehouseFleet.snapshot),
+            the min_cluster_count and max_cluster_count columns are added to the features
+            (1 for warehouses without settings)
+
+        Returns
+        -------
+        pd.DataFrame
+            | Indexed by warehouse with the features (see compute_features), the cluster counts and:
+            | - action (the action of the highest priority matching rule, or "No Change")
+            | - rules (the names of all matching rules)
+            | - reason (the reason of the highest priority matching rule)
+        """
+        features_df = compute_features(telemetry, self.window)
+        cluster_columns = ["min_cluster_count", "max_cluster_count"]
+        if settings_df is None:
+            settings_df = pd.DataFrame(columns=cluster_columns)
+        features_df = features_df.join(settings_df[cluster_columns].astype(float)).fillna(
+            {column: 1 for column in cluster_columns}
+        )
+
+        matches = pd.DataFrame(
+            {rule.name: np.asarray(rule.condition(features_df), dtype=bool) for rule in self.rules},
+            index=features_df.index,
+        )
+
+        actions = np.full(len(features_df), NO_CHANGE, dtype=object)
+        reasons = np.full(len(features_df), "", dtype=object)
+        # apply the rules from lowest to highest priority so the highest priority wins
+        for rule in reversed(self.rules):
+            matched = matches[rule.name].to_numpy()
+            actions[matched] = rule.action
+            reasons[matched] = rule.reason
+
+        recommendations_df = features_df.copy()
+        recommendations_df["action"] = actions
+        recommendations_df["rules"] = [
+            [rule.name for rule in self.rules if row[rule.name]] for row in matches.to_dict("records")
+        ]
+        recommendations_df["reason"] = reasons
+
+        return recommendations_df
@@ -0,0 +1,331 @@
+"""
+Desired state grant reconciliation.
+
+A desired state spec (dict, YAML or JSON) declares which privileges each role should have.
+The current grants are loaded once in bulk, indexed by (object type, object, role, privilege)
+in hash sets, and diffed against the spec to produce the minimal grant/revoke plan.
+
+Example spec:
+
+| roles:
+|   ANALYST:
+|     - on: TABLE
+|       objects: [TEST.SCHEMA_1.CUSTOMER, TEST.SCHEMA_1.ORDERS]
+|       privileges: [SELECT]
+|     - on: SCHEMA
+|       objects: [TEST.SCHEMA_1]
+|       privileges: [USAGE]
+| database_roles:
+|   TEST.READER:
+|     - on: SCHEMA
+|       objects: [TEST.SCHEMA_1]
+|       privileges: [USAGE]
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Union, Tuple, Set
+import json
+import logging
+from pathlib import Path
+
+from snowflake.snowpark import Session
+
+import pandas as pd
+import numpy as np
+
+from ice_pick.utils import snowpark_query
+from ice_pick.privileges import get_account_grants, _object_grant_key, _grant_object_type, _grant_object_name
+from ice_pick.registry import get_registry, normalize_identifier
+from ice_pick.account_object import Role
+
+
+PLAN_COLUMNS = ["granted_on", "name", "granted_to", "grantee_name", "privilege"]
+
+# desired state sections -> the grantee type (GRANTED_TO)
+GRANTEE_TYPES = {"roles": "ROLE", "database_roles": "DATABASE_ROLE"}
+
+# shorthands that expand to every privilege of the object type when granted: they can't be diffed
+_ALL_PRIVILEGES = {"ALL", "ALL PRIVILEGES"}
+
+
+def _normalize(value: str) -> str:
+    return str(value).strip().upper().replace("_", " ")
+
+
+def _quote_name(name: str) -> str:
+    """ quote each part of a fully qualified name, keeping function arguments unquoted """
+    arguments = ""
+    if "(" in name:
+        name, arguments = name.split("(", 1)
+        arguments = "(" + arguments
+
+    parts = name.split(".", 2)
+    quoted_name = ".".join(f'"{part}"' for part in parts)
+
+    return quoted_name + arguments
+
+
+def load_desired_state(desired_state: Union[dict, str, Path]) -> dict:
+    """
+    Load a desired state spec from a dict, or a YAML / JSON file.
+    YAML support requires the optional PyYAML dependency.
+    """
+    if isinstance(desired_state, dict):
+        return desired_state
+
+    path = Path(desired_state)
+    text = path.read_text()
+
+    if path.suffix.lower() == ".json":
+        return json.loads(text)
+
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError(
+            "Loading a YAML desired state requires PyYAML: python -m pip install pyyaml"
+        ) from e
+
+    return yaml.safe_load(text)
+
+
+def expand_desired_state(desired_state: dict) -> pd.DataFrame:
+    """
+    Flatten a desired state spec into one row per (granted_on, name, granted_to, grantee_name, privilege)
+    """
+    rows = []
+    for section, granted_to in GRANTEE_TYPES.items():
+        for role, role_grants in (desired_state.get(section) or {}).items():
+            for role_grant in role_grants or []:
+                granted_on = role_grant["on"]
+                objects = role_grant.get("objects", [])
+                privileges = role_grant.get("privileges", [])
+                if isinstance(objects, str):
+                    objects = [objects]
+                if isinstance(privileges, str):
+                    privileges = [privileges]
+
+                all_privileges = [privilege for privilege in privileges if _normalize(privilege) in _ALL_PRIVILEGES]
+                if all_privileges:
+                    raise ValueError(
+                        f"{role}: privilege {all_privileges[0]} on {granted_on} can't be reconciled, "
+                        f"list the individual privileges instead"
+                    )
+
+                for object_name in objects:
+                    for privilege in privileges:
+                        rows.append((granted_on, object_name, granted_to, role, privilege))
+
+    desired_df = pd.DataFrame(rows, columns=PLAN_COLUMNS)
+
+    return desired_df
+
+
+def _grant_keys(grants_df: pd.DataFrame) -> List[Tuple[str, ...]]:
+    """ build the normalized hash key for each grant row (vectorized string ops) """
+    key_columns = []
+    for column in PLAN_COLUMNS:
+        key_column = grants_df[column].astype(str).str.strip().str.upper()
+        # "CREATE_TABLE" / "CREATE TABLE" are the same privilege, but ETL_ROLE and "ETL ROLE" are different names
+        if column in ("granted_on", "granted_to", "privilege"):
+            key_column = key_column.str.replace("_", " ", regex=False)
+        key_columns.append(key_column.to_numpy(dtype=object))
+
+    return list(zip(*key_columns))
+
+
+@dataclass
+class GrantPlan:
+    """
+    The minimal set of grants and revokes needed to reach the desired state.
+
+    Attributes
+    ----------
+    grants: pd.DataFrame
+        grants missing from the account (granted_on, name, granted_to, grantee_name, privilege)
+    revokes: pd.DataFrame
+        grants in the account that are not in the desired state (same columns)
+    """
+
+    grants: pd.DataFrame
+    revokes: pd.DataFrame
+
+    def __len__(self):
+        return len(self.grants) + len(self.revokes)
+
+    def _statements(self, plan_df: pd.DataFrame, action: str, quote: bool) -> List[str]:
+        # one statement per object and role, with all of the privileges combined
+        object_privileges: Dict[Tuple[str, str, str, str], Set[str]] = {}
+        plan_rows = zip(*(plan_df[column].tolist() for column in PLAN_COLUMNS))
+        for granted_on, name, granted_to, grantee_name, privilege in plan_rows:
+            object_privileges.setdefault((granted_on, name, granted_to, grantee_name), set()).add(privilege)
+
+        direction = "to" if action == "grant" else "from"
+        statements = []
+        for (granted_on, name, granted_to, grantee_name), privileges in sorted(object_privileges.items()):
+            object_name = _quote_name(name) if quote else name
+            privilege_str = ", ".join(sorted(privileges))
+            # ex: ROLE -> role, DATABASE_ROLE -> database role
+            grantee_type = _normalize(granted_to).lower()
+            statements.append(
+                f"{action} {privilege_str} on {granted_on} {object_name} {direction} {grantee_type} {grantee_name}"
+            )
+
+        return statements
+
+    def to_sql(self) -> List[str]:
+        """
+        Return the plan as a list of sql statements (revokes first, then grants).
+        Revokes come from existing grants so the object names are quoted,
+        grants come from the spec and are used as written.
+        """
+        return self._statements(self.revokes, "revoke", quote=True) + self._statements(
+            self.grants, "grant", quote=False
+        )
+
+    def apply(self, session: Session, dry_run: bool = True) -> List[str]:
+        """
+        Execute the plan. With dry_run = True (default) the statements are only returned.
+        """
+        statements = self.to_sql()
+
+        if dry_run:
+            for statement in statements:
+                logging.info(f"dry run: {statement}")
+            return statements
+
+        for statement in statements:
+            snowpark_query(session, statement, non_select=True)
+
+        self._invalidate(session)
+
+        return statements
+
+    def _invalidate(self, session: Session):
+        """ drop the memoized grants of the roles and objects the plan changed """
+        plan_df = pd.concat([self.grants, self.revokes])
+        registry = get_registry(session)
+
+        # grantees are unquoted in the statements
+        role_grantees = plan_df.loc[plan_df["granted_to"].map(_normalize) == "ROLE", "grantee_name"]
+        for grantee_name in role_grantees.unique():
+            registry.invalidate(Role, normalize_identifier(grantee_name))
+
+        changed_objects = {
+            (_grant_object_type(granted_on), _grant_object_name(name).upper())
+            for granted_on, name in zip(plan_df["granted_on"], plan_df["name"])
+        }
+        for obj in registry.objects():
+            object_type, name = _object_grant_key(obj)
+            if (object_type, _grant_object_name(name).upper()) in changed_objects:
+                obj.invalidate()
+
+
+@dataclass
+class GrantReconciler:
+    """
+    Diff the current grants in the account against a desired state spec.
+
+    Only (role, object type) pairs declared in the spec are managed, so grants for other
+    roles or object types are never revoked. Privileges in ignore_privileges (OWNERSHIP by default)
+    are never revoked since ownership can only be transferred.
+
+    Attributes
+    ----------
+    session: Session
+        Snowpark Session
+    desired_state: Union[dict, str, Path]
+        the desired state spec, or the path to a YAML / JSON file with the spec
+    databases: list
+        optionally restrict the loaded schema level grants to these databases
+    ignore_privileges: list
+        privileges that are never revoked
+
+    Example
+    -------
+        | >> reconciler = GrantReconciler(session, "grants.yml")
+        | >> plan = reconciler.plan()
+        | >> plan.apply(session, dry_run=True)
+    """
+
+    session: Session
+    desired_state: Union[dict, str, Path]
+    databases: list = None
+    ignore_privileges: list = field(default_factory=lambda: ["OWNERSHIP"])
+
+    def load_current_grants(self) -> pd.DataFrame:
+        """ load all current grants once, in bulk """
+        return get_account_grants(self.session, self.databases)
+
+    def plan(self, current_grants_df: pd.DataFrame = None) -> GrantPlan:
+        """
+        Return the minimal GrantPlan. The current grants can be passed in directly
+        (ex: from get_account_grants) to skip the bulk load.
+        """
+        if current_grants_df is None:
+            current_grants_df = self.load_current_grants()
+
+        desired_df = expand_desired_state(load_desired_state(self.desired_state))
+
+        return diff_grants(current_grants_df, desired_df, self.ignore_privileges)
+
+
+def diff_grants(
+    current_grants_df: pd.DataFrame,
+    desired_df: pd.DataFrame,
+    ignore_privileges: list = ("OWNERSHIP",),
+) -> GrantPlan:
+    """
+    Diff current grants against desired grants with hash set lookups.
+
+    Parameters
+    ----------
+    current_grants_df : pd.DataFrame
+        current grants with the columns granted_on, name, granted_to, grantee_name, privilege
+        (granted_to defaults to ROLE when missing)
+    desired_df : pd.DataFrame
+        desired grants with the same columns
+    ignore_privileges : list
+        privileges that are never revoked
+
+    Returns
+    -------
+    GrantPlan
+        the grants to add and the grants to revoke
+    """
+    if "granted_to" not in current_grants_df.columns:
+        current_grants_df = current_grants_df.assign(granted_to="ROLE")
+    if "granted_to" not in desired_df.columns:
+        desired_df = desired_df.assign(granted_to="ROLE")
+
+    current_df = current_grants_df[PLAN_COLUMNS]
+    desired_df = desired_df[PLAN_COLUMNS]
+
+    current_keys = _grant_keys(current_df)
+    desired_keys = _grant_keys(desired_df)
+
+    current_key_set: Set[Tuple[str, ...]] = set(current_keys)
+    desired_key_set: Set[Tuple[str, ...]] = set(desired_keys)
+
+    # only revoke within the (object type, grantee) pairs declared in the spec
+    managed_scope = {(key[0], key[2], key[3]) for key in desired_key_set}
+    ignored = {_normalize(privilege) for privilege in ignore_privileges}
+
+    grant_mask = np.fromiter(
+        (key not in current_key_set for key in desired_keys), dtype=bool, count=len(desired_keys)
+    )
+    revoke_mask = np.fromiter(
+        (
+            key not in desired_key_set
+            and (key[0], key[2], key[3]) in managed_scope
+            and key[4] not in ignored
+            for key in current_keys
+        ),
+        dtype=bool,
+        count=len(current_keys),
+    )
+
+    grants_df = desired_df[grant_mask].drop_duplicates().reset_index(drop=True)
+    revokes_df = current_df[revoke_mask].drop_duplicates().reset_index(drop=True)
+
+    return GrantPlan(grants_df, revokes_df)
@@ -0,0 +1,179 @@
+"""
+Per session identity map for ice_pick objects.
+The same (type, name) resolves to one object per session, so metadata fetched by
+one caller (ddl, description, grants) is memoized on the object and reused by every other caller.
+
+Objects are held by weak reference plus a bounded LRU of strong references, so recently used objects
+(and their memoized metadata) survive between callers, ex: the role shared by every user of a crawl.
+Older objects nobody else references are evicted, and a registry is dropped with its session.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+
+def normalize_identifier(identifier: str) -> str:
+    """
+    Snowflake identifier resolution: unquoted identifiers are upper cased, quoted ones keep their case
+    (ex: the name an unquoted "to ROLE analyst" refers to)
+    """
+    identifier = str(identifier)
+    if len(identifier) > 1 and identifier.startswith('"') and identifier.endswith('"'):
+        return identifier[1:-1].replace('""', '"')
+
+    return identifier.upper()
+
+
+class MetadataCache:
+    """
+    Memoized metadata reads of a single object, keyed by the read (ex: "ddl", "description", "grants_on").
+    A read older than max_age seconds is fetched again.
+    Dataframes are copied on the way out so callers can't modify the cached value.
+    """
+
+    def __init__(self):
+        self._values: Dict[Hashable, Tuple[object, float]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable):
+        return key in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key: Hashable, fetch: Callable[[], object], refresh: bool = False, max_age: float = None):
+        with self._lock:
+            value, fetched_at = self._values.get(key, (None, None))
+
+        stale = fetched_at is None or (max_age is not None and time.monotonic() - fetched_at > max_age)
+        if refresh or stale:
+            value = fetch()
+            with self._lock:
+                self._values[key] = (value, time.monotonic())
+
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+
+    def put(self, key: Hashable, value: object):
+        """ memoize a read fetched elsewhere (ex: by a bulk query) """
+        with self._lock:
+            self._values[key] = (value, time.monotonic())
+
+    def invalidate(self, key: Hashable = None):
+        """ drop one memoized read, or all of them """
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
+
+
+class ObjectRegistry:
+    """
+    An identity map of the ice_pick objects created for one session.
+
+    Parameters
+    ----------
+    max_recent : int = 1024
+        the number of most recently used objects kept alive (with their memoized metadata)
+        even when nobody else references them
+
+    Example
+    -------
+        | >> registry = get_registry(session)
+        | >> registry.get(Role, session, "ANALYST") is registry.get(Role, session, "ANALYST")
+        | True
+        | >> registry.get(Role, session, "ANALYST") is registry.get(Role, session, "analyst")
+        | False
+    """
+
+    def __init__(self, max_recent: int = 1024):
+        self._objects = weakref.WeakValueDictionary()
+        # strong references to the max_recent most recently used objects
+        self._recent = OrderedDict()
+        self.max_recent = max_recent
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def _touch(self, key: tuple, obj):
+        self._recent[key] = obj
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    @staticmethod
+    def _key(cls: type, args: tuple) -> tuple:
+        # objects quote their names in their sql ("ANALYST" and "analyst" are different roles),
+        # so names are keyed exactly as given
+        return cls, tuple(str(arg) for arg in args)
+
+    def get(self, cls: type, session, *args):
+        """ the registered cls(session, *args), created on first use """
+        key = self._key(cls, args)
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None:
+                obj = cls(session, *args)
+                self._objects[key] = obj
+            self._touch(key, obj)
+
+        return obj
+
+    def lookup(self, cls: type, *args):
+        """ the registered object, or None (without creating it) """
+        return self._objects.get(self._key(cls, args))
+
+    def objects(self) -> list:
+        """ the registered objects that are still alive """
+        return list(self._objects.values())
+
+    def invalidate(self, cls: type = None, *args):
+        """
+        Drop the memoized metadata of one object (cls and its name arguments),
+        of every object of a type (cls only) or of every registered object (no arguments)
+        """
+        if cls is not None and args:
+            objs = [self.lookup(cls, *args)]
+        else:
+            objs = [obj for (obj_cls, _), obj in list(self._objects.items()) if cls is None or obj_cls is cls]
+
+        for obj in objs:
+            if obj is not None:
+                obj.invalidate()
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+            self._recent.clear()
+
+
+_REGISTRY_ATTRIBUTE = "_ice_pick_registry"
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_registry(session) -> ObjectRegistry:
+    """ the identity map for a session """
+    # the registry is stored on the session (registered objects reference their session,
+    # so the session and its registry are garbage collected together)
+    with _REGISTRIES_LOCK:
+        registry = getattr(session, _REGISTRY_ATTRIBUTE, None)
+        if not isinstance(registry, ObjectRegistry):
+            registry = ObjectRegistry()
+            try:
+                setattr(session, _REGISTRY_ATTRIBUTE, registry)
+            except (AttributeError, TypeError):
+                # sessions that don't take attributes get an unshared registry
+                pass
+
+    return registry
+
+
+def resolve(session, cls: type, *args):
+    """ the session's registered cls(session, *args) """
+    return get_registry(session).get(cls, session, *args)
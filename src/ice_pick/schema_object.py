@@ -1,7 +1,9 @@
 from dataclasses import dataclass, field
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
 import copy
 import re
+import warnings
 from pathlib import Path
 
 
@@ -13,10 +15,33 @@ import pandas as pd
 import numpy as np
 
 from ice_pick.utils import snowpark_query
+from ice_pick.registry import MetadataCache
 
 import ice_pick
 
 
+# information schema view and column prefix with the LAST_ALTERED of each object type
+LAST_ALTERED_VIEWS = {
+    "TABLE": ("TABLES", "TABLE"),
+    "VIEW": ("TABLES", "TABLE"),
+    "MATERIALIZED VIEW": ("TABLES", "TABLE"),
+    "EXTERNAL TABLE": ("TABLES", "TABLE"),
+    "SEQUENCE": ("SEQUENCES", "SEQUENCE"),
+    "STAGE": ("STAGES", "STAGE"),
+    "FILE FORMAT": ("FILE_FORMATS", "FILE_FORMAT"),
+    "PIPE": ("PIPES", "PIPE"),
+    "USER FUNCTION": ("FUNCTIONS", "FUNCTION"),
+    "PROCEDURE": ("PROCEDURES", "PROCEDURE"),
+}
+
+# the columns returned by "describe table" / "describe view"
+DESCRIBE_COLUMNS = [
+    "name", "type", "kind", "null?", "default", "primary key", "unique key", "check", "expression", "comment",
+    "policy name",
+]
+DESCRIBED_OBJECT_TYPES = ["TABLE", "VIEW", "MATERIALIZED VIEW"]
+
+
 @dataclass
 class SchemaObject:
     """Represents a Snowflake Schema object.
@@ -40,6 +65,9 @@ class SchemaObject:
         the name of the object
     object_type: str
         the type of schema object
+    max_age: float
+        the number of seconds memoized metadata (ddl, description, grants) is reused for,
+        None (default) reuses it until it is invalidated or refreshed
 
 
     """
@@ -50,12 +78,92 @@ class SchemaObject:
     schema: str = ""
     object_name: str = ""
     object_type: str = ""
+    max_age: Optional[float] = field(default=None, repr=False, compare=False)
+
+    _metadata: MetadataCache = field(default_factory=MetadataCache, init=False, repr=False, compare=False)
+    _last_altered: object = field(default=None, init=False, repr=False, compare=False)
+
+    def _memoized(self, key, fetch, refresh: bool = False):
+        return self._metadata.get(key, fetch, refresh, self.max_age)
+
+    def _memoized_versioned(self, key, fetch, refresh: bool = False):
+        # metadata that changes with LAST_ALTERED: record it on the first fetch so refresh() can validate it
+        def fetch_versioned():
+            if self._last_altered is None:
+                self._last_altered = self.get_last_altered()
+            return fetch()
+
+        return self._memoized(key, fetch_versioned, refresh)
+
+    def invalidate(self, key: str = None):
+        """ drop the memoized metadata ("ddl", "description" or "grants_on"), or all of it """
+        if key == "ddl":
+            self._metadata.invalidate(("ddl", True))
+            self._metadata.invalidate(("ddl", False))
+        else:
+            self._metadata.invalidate(key)
+
+    def get_last_altered(self):
+        """
+        Return the LAST_ALTERED timestamp of the object from the database's INFORMATION_SCHEMA,
+        None for object types without one (see LAST_ALTERED_VIEWS) or objects that don't exist
+        """
+        last_altered_sql = self._last_altered_sql()
+        if last_altered_sql is None:
+            return None
+
+        last_altered = snowpark_query(self.session, f"{last_altered_sql};").iloc[0, 0]
+
+        return None if pd.isna(last_altered) else last_altered
+
+    def _last_altered_sql(self) -> Optional[str]:
+        # a scalar LAST_ALTERED query, None for object types without one
+        if self.object_type.upper() not in LAST_ALTERED_VIEWS:
+            return None
+
+        view, prefix = LAST_ALTERED_VIEWS[self.object_type.upper()]
+        # functions and procedures are named with their arguments, ex: MY_FUNC(NUMBER)
+        name = self.object_name.split("(")[0].replace("'", "''")
+        schema = self.schema.replace("'", "''")
+
+        return f"""select max(LAST_ALTERED) as LAST_ALTERED
+                    from "{self.database}".INFORMATION_SCHEMA.{view}
+                    where {prefix}_SCHEMA = '{schema}' and {prefix}_NAME = '{name}'"""
+
+    def refresh(self) -> bool:
+        """
+        Revalidate the memoized metadata with one cheap LAST_ALTERED lookup.
+        The ddl and description are dropped when the object changed since they were fetched
+        (or when the object type has no LAST_ALTERED).
+        Grants don't change LAST_ALTERED, so the memoized grants are always dropped.
+
+        Returns
+        -------
+        bool
+            True if the memoized ddl and description were dropped
+
+        Example
+        -------
+        | >> table_obj.get_ddl()
+        | >> table_obj.refresh()   # later: only re-fetch the ddl if the table was altered
+        | >> table_obj.get_ddl()
+        """
+        last_altered = self.get_last_altered()
+        self.invalidate("grants_on")
+        stale = last_altered is None or last_altered != self._last_altered
+        if stale:
+            self.invalidate("ddl")
+            self.invalidate("description")
+        self._last_altered = last_altered
+
+        return stale
 
     # Which functions should be a part of the class, and
     # which should be outside teh class?
-    def get_ddl(self, save: bool = False, fully_qualified:bool = True) -> str:
+    def get_ddl(self, save: bool = False, fully_qualified:bool = True, refresh: bool = False) -> str:
         """
         Return the ddl of the schema object as a string
+        (memoized, see max_age and refresh())
         if save = True: save the ddl locally
         The default save path is:
         DDL/database/schema/object_type/database.schema.object_name.sql
@@ -64,6 +172,8 @@ class SchemaObject:
         ----------
         save : bool = False
             save the ddl as a file locally
+        refresh : bool = False
+            fetch the ddl even if it is memoized
 
         Returns
         -------
@@ -79,11 +189,21 @@ class SchemaObject:
         else:
             self.ddl_object_type = self.object_type
 
+        # the first fetch also records LAST_ALTERED (in the same query), so refresh() can validate the ddl
+        last_altered_sql = self._last_altered_sql() if self._last_altered is None else None
+        last_altered_col = f", ({last_altered_sql}) as LAST_ALTERED" if last_altered_sql else ""
         ddl_sql = f"""select get_ddl('{self.ddl_object_type}',
-                '{self.database}.{self.schema}.{self.object_name}', {str(fully_qualified).lower()});"""
-        ddl_df = snowpark_query(self.session, ddl_sql)
+                '{self.database}.{self.schema}.{self.object_name}', {str(fully_qualified).lower()}) as DDL
+                {last_altered_col};"""
 
-        ddl_str = ddl_df.iloc[0][0]
+        def fetch_ddl():
+            ddl_df = snowpark_query(self.session, ddl_sql)
+            if last_altered_sql:
+                last_altered = ddl_df["LAST_ALTERED"].iloc[0]
+                self._last_altered = None if pd.isna(last_altered) else last_altered
+            return ddl_df.iloc[0, 0]
+
+        ddl_str = self._memoized(("ddl", fully_qualified), fetch_ddl, refresh)
 
         # load to state to help create object
         self.ddl_str = ddl_str
@@ -97,26 +217,57 @@ class SchemaObject:
 
         return ddl_str
 
-    def get_description(self) -> str:
+    def get_description(self, refresh: bool = False) -> str:
         """
         Return the description of the schema object as a string
+        (memoized, see max_age and refresh())
         """
         desc_sql = f"""describe {self.object_type} 
                     "{self.database}"."{self.schema}"."{self.object_name}";"""
-        desc_df = snowpark_query(self.session, desc_sql, non_select=True)
 
-        return desc_df
+        return self._memoized_versioned(
+            "description", lambda: snowpark_query(self.session, desc_sql, non_select=True), refresh
+        )
 
-    def get_grants_on(self) -> list:
+    def get_grants_on(self, refresh: bool = False) -> list:
         """
         Return a list of grants on the schema object as a list
+        (memoized, see max_age and refresh())
         """
         grants_sql = f"""show grants on {self.object_type} 
                     "{self.database}"."{self.schema}"."{self.object_name}";"""
-        grants_df = snowpark_query(self.session, grants_sql, non_select=True)
 
-        return grants_df
+        return self._memoized(
+            "grants_on", lambda: snowpark_query(self.session, grants_sql, non_select=True), refresh
+        )
     
+    def get_statistics(
+        self,
+        sample: float = None,
+        sample_method: str = "system",
+        seed: int = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Profile every column of the table in a single aggregate query (see statistics.get_table_statistics).
+        Statistics are cached until the table's LAST_ALTERED changes (views are profiled every time).
+
+        Example
+        -------
+        | >> table_obj = session.create_schema_object("TEST", "SCHEMA_1", "CUSTOMER", "TABLE")
+        | >> table_obj.get_statistics(sample=1)
+        """
+        if self.object_type.upper() not in ice_pick.statistics.PROFILED_OBJECT_TYPES:
+            raise ValueError(
+                f"statistics are not supported for {self.object_type}: "
+                f"supported: {ice_pick.statistics.PROFILED_OBJECT_TYPES}"
+            )
+
+        return ice_pick.statistics.get_table_statistics(
+            self.session, self.database, self.schema, self.object_name,
+            sample=sample, sample_method=sample_method, seed=seed, refresh=refresh,
+        )
+
     def get_grant_objects(self) -> list:
         
         object_exceptions = ['USER FUNCTION', 'PROCEDURE']
@@ -140,15 +291,20 @@ class SchemaObject:
             # need to look into this case
             return []
         
-        grants_df['Privilege_Obj'] = grants_df['privilege'].apply(lambda x: ice_pick.privileges.Privilege(self, x))
-        
-        grants_df['Role_Obj'] = grants_df['grantee_name'].apply(lambda x: ice_pick.account_object.Role(self.session, x))
-       
-        grants_df['Grant_Obj'] = grants_df.apply(
-            lambda x: ice_pick.privileges.Grant(
-            self.session, x['Privilege_Obj'], x['Role_Obj'], x['privilege']), axis=1 )
-        
-        grant_objects = grants_df['Grant_Obj'].tolist()
+        # only create one Privilege/Role object per distinct value
+        privilege_objs = {
+            privilege: ice_pick.privileges.Privilege(self, privilege)
+            for privilege in grants_df['privilege'].unique()
+        }
+        role_objs = {
+            grantee: ice_pick.registry.resolve(self.session, ice_pick.account_object.Role, grantee)
+            for grantee in grants_df['grantee_name'].unique()
+        }
+
+        grant_objects = [
+            ice_pick.privileges.Grant(self.session, privilege_objs[privilege], role_objs[grantee], privilege)
+            for privilege, grantee in zip(grants_df['privilege'], grants_df['grantee_name'])
+        ]
 
         return grant_objects
 
@@ -195,8 +351,14 @@ class SchemaObject:
                     "{self.database}"."{self.schema}"."{self.object_name}"
                     to ROLE {grantee};"""
         grant_df = snowpark_query(self.session, grant_sql, non_select=True)
+        # the memoized grants on the object and the grantee's memoized grants are stale now
+        self.invalidate("grants_on")
+        # the grantee is unquoted above, so it resolves like an unquoted identifier
+        ice_pick.registry.get_registry(self.session).invalidate(
+            ice_pick.account_object.Role, ice_pick.registry.normalize_identifier(grantee)
+        )
 
-        grant_status_str = grant_df.iloc[0][0]
+        grant_status_str = grant_df.iloc[0, 0]
 
         return grant_status_str
 
@@ -229,7 +391,147 @@ class SchemaObject:
             create_sql = ddl
 
         create_df = snowpark_query(self.session, create_sql, non_select=True)
+        self.invalidate()
 
-        create_status_str = create_df.iloc[0][0]
+        create_status_str = create_df.iloc[0, 0]
 
         return create_status_str
+
+
+
+def _describe_type(column: pd.Series) -> str:
+    """ the type of an INFORMATION_SCHEMA.COLUMNS row, formatted like describe (ex: NUMBER(38,0)) """
+    data_type = column["DATA_TYPE"]
+    if data_type == "NUMBER":
+        return f"NUMBER({int(column['NUMERIC_PRECISION'])},{int(column['NUMERIC_SCALE'])})"
+    if data_type == "TEXT":
+        return f"VARCHAR({int(column['CHARACTER_MAXIMUM_LENGTH'])})"
+    if data_type == "BINARY":
+        return f"BINARY({int(column['CHARACTER_MAXIMUM_LENGTH'])})"
+    if (data_type == "TIME" or data_type.startswith("TIMESTAMP")) and pd.notna(column["DATETIME_PRECISION"]):
+        return f"{data_type}({int(column['DATETIME_PRECISION'])})"
+
+    return data_type
+
+
+def _describe_frame(
+    columns_df: pd.DataFrame, primary_keys: Set[tuple] = frozenset(), unique_keys: Set[tuple] = frozenset()
+) -> pd.DataFrame:
+    """ INFORMATION_SCHEMA.COLUMNS rows of one object (and the key columns) -> the output of describe """
+    keys = list(zip(columns_df["TABLE_SCHEMA"], columns_df["TABLE_NAME"], columns_df["COLUMN_NAME"]))
+    return pd.DataFrame({
+        "name": columns_df["COLUMN_NAME"].tolist(),
+        "type": [_describe_type(column) for _, column in columns_df.iterrows()],
+        "kind": "COLUMN",
+        "null?": ["Y" if nullable == "YES" else "N" for nullable in columns_df["IS_NULLABLE"]],
+        "default": columns_df["COLUMN_DEFAULT"].tolist(),
+        "primary key": ["Y" if key in primary_keys else "N" for key in keys],
+        "unique key": ["Y" if key in unique_keys else "N" for key in keys],
+        "check": None,
+        "expression": None,
+        "comment": columns_df["COMMENT"].tolist(),
+        "policy name": None,
+    }, columns=DESCRIBE_COLUMNS)
+
+
+def get_columns_bulk(session: Session, database: str, schemas: List[str] = None) -> pd.DataFrame:
+    """
+    Return the columns of every table and view in a database (or in some of its schemas)
+    with one INFORMATION_SCHEMA.COLUMNS query.
+    """
+    schema_filter = ""
+    if schemas:
+        schema_list = ", ".join("'" + schema.replace("'", "''") + "'" for schema in sorted(set(schemas)))
+        schema_filter = f"and TABLE_SCHEMA in ({schema_list})"
+
+    columns_sql = f"""select TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, DATA_TYPE, IS_NULLABLE,
+                    COLUMN_DEFAULT, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION, NUMERIC_SCALE,
+                    DATETIME_PRECISION, COMMENT
+                    from "{database}".INFORMATION_SCHEMA.COLUMNS
+                    where TABLE_SCHEMA != 'INFORMATION_SCHEMA' {schema_filter}
+                    order by TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION;"""
+
+    return snowpark_query(session, columns_sql)
+
+
+def get_key_columns_bulk(session: Session, database: str, key_type: str = "primary") -> Set[tuple]:
+    """
+    Return the (schema, table, column) of every primary or unique key column in a database
+    with one "show <key_type> keys" command.
+    """
+    keys_df = snowpark_query(session, f'show {key_type} keys in database "{database}";', non_select=True)
+    if keys_df.empty:
+        return set()
+
+    return set(zip(keys_df["schema_name"], keys_df["table_name"], keys_df["column_name"]))
+
+
+def get_descriptions_bulk(
+    session: Session,
+    objects: List[SchemaObject],
+    max_workers: int = 8,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Describe many tables and views at once (ex: the objects returned by a SchemaObjectFilter).
+    Columns are fetched with one INFORMATION_SCHEMA.COLUMNS query per database (limited to the
+    schemas of the objects) and the key columns with "show primary keys" / "show unique keys",
+    split into one dataframe per object with the columns of "describe",
+    and memoized on each object so later get_description() calls don't query Snowflake.
+
+    INFORMATION_SCHEMA doesn't expose check, expression or policy columns: those are None.
+    Objects of other types (see DESCRIBED_OBJECT_TYPES) are skipped, as are objects
+    without columns (ex: dropped since the filter ran).
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    objects : List[SchemaObject]
+        the objects to describe
+    max_workers : int = 8
+        the number of databases queried concurrently
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        the description of each object, keyed by the fully qualified object name
+
+    Example
+    -------
+        | >> objs = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"]).return_schema_objects()
+        | >> descriptions = get_descriptions_bulk(session, objs)
+        | >> descriptions["TEST.SCHEMA_1.CUSTOMER"]
+    """
+    described = [obj for obj in objects if obj.object_type.upper() in DESCRIBED_OBJECT_TYPES]
+
+    schemas_by_database: Dict[str, List[str]] = {}
+    for obj in described:
+        schemas_by_database.setdefault(obj.database, []).append(obj.schema)
+
+    def describe_database(database):
+        return (
+            get_columns_bulk(session, database, schemas_by_database[database]),
+            get_key_columns_bulk(session, database, "primary"),
+            get_key_columns_bulk(session, database, "unique"),
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        database_columns = dict(zip(schemas_by_database, executor.map(describe_database, schemas_by_database)))
+
+    object_columns = {}
+    for database, (columns_df, _, _) in database_columns.items():
+        for (schema, name), object_columns_df in columns_df.groupby(["TABLE_SCHEMA", "TABLE_NAME"], sort=False):
+            object_columns[f"{database}.{schema}.{name}"] = object_columns_df
+
+    descriptions = {}
+    for obj in described:
+        key = f"{obj.database}.{obj.schema}.{obj.object_name}"
+        if key not in object_columns:
+            warnings.warn(f"No columns found for {key}, skipping", UserWarning)
+            continue
+
+        _, primary_keys, unique_keys = database_columns[obj.database]
+        descriptions[key] = _describe_frame(object_columns[key], primary_keys, unique_keys)
+        obj._metadata.put("description", descriptions[key].copy())
+
+    return descriptions
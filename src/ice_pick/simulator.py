@@ -0,0 +1,334 @@
+"""
+Offline warehouse what-if simulation.
+Recorded query history is replayed against hypothetical warehouse sizes, cluster counts
+and auto suspend settings to estimate queueing, latency percentiles and credit burn before resizing.
+
+Model:
+    | - execution time scales with size as (original credits / new credits) ** scaling_efficiency,
+    |   queries that scan less than small_query_bytes do not speed up or slow down
+    | - queries that spilled lose spill_penalty of their time per size step up (local spill after one step,
+    |   remote spill after two) and gain it per step down
+    | - each cluster runs max_concurrency_level queries at once, clusters start as soon as queries queue
+    |   (standard scaling policy), queries queue first in first out
+    | - clusters are billed per second (60 second minimum per resume) until auto_suspend seconds of inactivity,
+    |   additional clusters shut down after cluster_shutdown_seconds of inactivity
+
+Queue simulation only runs on busy periods where the recorded load exceeds the configured slots,
+everything else is computed with vectorized NumPy, so dozens of configurations over a week of history
+evaluate in seconds.
+"""
+
+from dataclasses import dataclass
+from typing import List
+import heapq
+import itertools
+
+import pandas as pd
+import numpy as np
+
+from ice_pick.autoscaler import WAREHOUSE_CREDITS_PER_HOUR, WAREHOUSE_SIZES, normalize_size
+
+
+SUMMARY_COLUMNS = [
+    "config",
+    "size",
+    "min_cluster_count",
+    "max_cluster_count",
+    "auto_suspend",
+    "queries",
+    "queued_queries",
+    "queued_hours",
+    "latency_p50_s",
+    "latency_p95_s",
+    "latency_p99_s",
+    "spilling_queries",
+    "credits",
+]
+
+
+@dataclass
+class WarehouseConfig:
+    """
+    A hypothetical warehouse configuration.
+
+    Attributes
+    ----------
+    size: str
+        the warehouse size
+    min_cluster_count: int
+        the clusters that run whenever the warehouse is running
+    max_cluster_count: int
+        the maximum clusters when queries queue
+    auto_suspend: int
+        seconds of inactivity before the warehouse suspends (0 never suspends)
+    max_concurrency_level: int
+        concurrent queries per cluster
+    """
+
+    size: str = "XSMALL"
+    min_cluster_count: int = 1
+    max_cluster_count: int = 1
+    auto_suspend: int = 600
+    max_concurrency_level: int = 8
+
+    def __post_init__(self):
+        self.size = normalize_size(self.size)
+        if not 1 <= self.min_cluster_count <= self.max_cluster_count:
+            raise ValueError(
+                f"cluster counts must satisfy 1 <= min_cluster_count <= max_cluster_count: "
+                f"got {self.min_cluster_count}, {self.max_cluster_count}"
+            )
+
+    @property
+    def label(self) -> str:
+        return f"{self.size} x{self.min_cluster_count}-{self.max_cluster_count} suspend={self.auto_suspend}s"
+
+
+def config_grid(
+    sizes: list,
+    max_cluster_counts: list = (1,),
+    auto_suspends: list = (600,),
+    max_concurrency_level: int = 8,
+) -> List[WarehouseConfig]:
+    """ every combination of sizes, max cluster counts and auto suspend settings """
+    return [
+        WarehouseConfig(size, 1, max_cluster_count, auto_suspend, max_concurrency_level)
+        for size, max_cluster_count, auto_suspend in itertools.product(sizes, max_cluster_counts, auto_suspends)
+    ]
+
+
+def _fifo_starts(arrivals: np.ndarray, durations: np.ndarray, slots: int) -> np.ndarray:
+    """
+    First in first out start times with a fixed number of slots.
+    Only busy periods that exceed the slots are simulated event by event.
+    """
+    n_queries = len(arrivals)
+    starts = arrivals.copy()
+    if n_queries == 0:
+        return starts
+
+    ends = arrivals + durations
+    previous_max_end = np.concatenate(([-np.inf], np.maximum.accumulate(ends)[:-1]))
+    # the warehouse is empty at the arrival of the first query of each busy period
+    period_starts = np.flatnonzero(arrivals >= previous_max_end)
+
+    # concurrency (without queueing) peaks at an arrival
+    concurrency = np.arange(1, n_queries + 1) - np.searchsorted(np.sort(ends), arrivals, side="right")
+    period_peaks = np.maximum.reduceat(concurrency, period_starts)
+    period_bounds = np.append(period_starts, n_queries)
+
+    arrival_list = arrivals.tolist()
+    duration_list = durations.tolist()
+    simulated_until = 0
+    for period in np.flatnonzero(period_peaks > slots):
+        lo = int(period_starts[period])
+        if lo < simulated_until:
+            continue
+
+        free_at = [-np.inf] * slots
+        max_end = -np.inf
+        i = lo
+        hi = int(period_bounds[period + 1])
+        while i < hi:
+            start = max(arrival_list[i], heapq.heappop(free_at))
+            end = start + duration_list[i]
+            heapq.heappush(free_at, end)
+            starts[i] = start
+            max_end = max(max_end, end)
+            i += 1
+            # queued queries can push work into the next busy period
+            if i == hi and hi < n_queries and arrival_list[hi] < max_end:
+                hi = int(period_bounds[np.searchsorted(period_bounds, hi, side="right")])
+
+        simulated_until = hi
+
+    return starts
+
+
+def _active_runs(starts: np.ndarray, ends: np.ndarray, threshold: int):
+    """ the (start, end) intervals where more than threshold queries are running """
+    times = np.concatenate((starts, ends))
+    deltas = np.concatenate((np.ones(len(starts)), -np.ones(len(ends))))
+    # ends before starts at the same time
+    order = np.lexsort((deltas, times))
+    times, levels = times[order], np.cumsum(deltas[order])
+
+    active = levels > threshold
+    changes = np.diff(active.astype(int), prepend=0)
+    run_starts = times[changes == 1]
+    run_ends = times[np.flatnonzero(changes == -1)]
+
+    return run_starts, run_ends
+
+
+def _billed_seconds(run_starts: np.ndarray, run_ends: np.ndarray, idle_seconds: float, horizon: float) -> float:
+    """ billed seconds for a cluster that suspends after idle_seconds of inactivity """
+    if len(run_starts) == 0:
+        return 0.0
+    if idle_seconds <= 0:
+        # never suspends
+        return float(max(horizon - run_starts[0], 60))
+
+    new_group = np.concatenate(([True], run_starts[1:] - run_ends[:-1] > idle_seconds))
+    group_starts = run_starts[new_group]
+    group_ends = run_ends[np.concatenate((new_group[1:], [True]))]
+
+    return float(np.maximum(group_ends - group_starts + idle_seconds, 60).sum())
+
+
+class WhatIfSimulator:
+    """
+    Replay the recorded query history of a warehouse against hypothetical configurations.
+
+    Parameters
+    ----------
+    query_df : pd.DataFrame
+        query history for one warehouse (ex: Warehouse.query_history or QueryHistorySync.load) with the columns
+        START_TIME, EXECUTION_TIME (ms), WAREHOUSE_SIZE and optionally QUERY_ID, BYTES_SCANNED,
+        BYTES_SPILLED_TO_LOCAL_STORAGE and BYTES_SPILLED_TO_REMOTE_STORAGE
+    scaling_efficiency : float = 0.8
+        how close to linear execution time scales with size (1 = perfect scaling)
+    spill_penalty : float = 0.5
+        the fraction of a spilling query's time attributed to spilling
+    small_query_bytes : float = 1e8
+        queries scanning less than this do not scale with size
+    cluster_shutdown_seconds : int = 180
+        inactivity before an additional cluster shuts down
+
+    Example
+    -------
+        | >> simulator = WhatIfSimulator(warehouse.query_history(24 * 7, 0, result_limit=10000))
+        | >> simulator.evaluate(config_grid(["SMALL", "MEDIUM", "LARGE"], [1, 2, 3], [60, 600]))
+    """
+
+    def __init__(
+        self,
+        query_df: pd.DataFrame,
+        scaling_efficiency: float = 0.8,
+        spill_penalty: float = 0.5,
+        small_query_bytes: float = 1e8,
+        cluster_shutdown_seconds: int = 180,
+    ):
+        # queries without a warehouse size did not use warehouse compute
+        query_df = query_df[pd.notna(query_df["WAREHOUSE_SIZE"])]
+        if "WAREHOUSE_NAME" in query_df.columns and query_df["WAREHOUSE_NAME"].nunique() > 1:
+            raise ValueError("query_df must contain the query history of a single warehouse")
+
+        start_times = pd.to_datetime(query_df["START_TIME"])
+        order = np.argsort(start_times.to_numpy(), kind="stable")
+        query_df = query_df.iloc[order]
+        start_times = start_times.iloc[order]
+
+        self.start_time = start_times.min()
+        self.query_ids = (
+            query_df["QUERY_ID"].to_numpy() if "QUERY_ID" in query_df.columns else np.arange(len(query_df))
+        )
+        self.arrivals = ((start_times - self.start_time).dt.total_seconds()).to_numpy(dtype=float)
+        self.execution_seconds = pd.to_numeric(query_df["EXECUTION_TIME"]).fillna(0).to_numpy(dtype=float) / 1000
+
+        sizes = query_df["WAREHOUSE_SIZE"].map(normalize_size)
+        self.size_index = sizes.map(WAREHOUSE_SIZES.index).to_numpy(dtype=int)
+        self.credits_per_hour = sizes.map(WAREHOUSE_CREDITS_PER_HOUR).to_numpy(dtype=float)
+
+        def column(name: str) -> np.ndarray:
+            if name not in query_df.columns:
+                return np.zeros(len(query_df))
+            return pd.to_numeric(query_df[name]).fillna(0).to_numpy(dtype=float)
+
+        self.scales = column("BYTES_SCANNED") >= small_query_bytes if "BYTES_SCANNED" in query_df.columns \
+            else np.ones(len(query_df), dtype=bool)
+        self.remote_spill = column("BYTES_SPILLED_TO_REMOTE_STORAGE") > 0
+        self.local_spill = (column("BYTES_SPILLED_TO_LOCAL_STORAGE") > 0) & ~self.remote_spill
+
+        self.scaling_efficiency = scaling_efficiency
+        self.spill_penalty = spill_penalty
+        self.cluster_shutdown_seconds = cluster_shutdown_seconds
+
+    def _execution_seconds(self, config: WarehouseConfig):
+        """ estimated execution seconds and whether each query still spills at the configured size """
+        steps = WAREHOUSE_SIZES.index(config.size) - self.size_index
+
+        size_factor = np.where(
+            self.scales,
+            (self.credits_per_hour / WAREHOUSE_CREDITS_PER_HOUR[config.size]) ** self.scaling_efficiency,
+            1.0,
+        )
+
+        # steps needed to remove the spill: 1 for local spill, 2 for remote spill
+        spill_steps = np.where(self.remote_spill, 2, np.where(self.local_spill, 1, 0))
+        spills = spill_steps > 0
+        spill_factor = np.where(
+            spills,
+            1 - self.spill_penalty * np.clip(steps, None, spill_steps) / np.maximum(spill_steps, 1),
+            1.0,
+        )
+        still_spilling = spills & (steps < spill_steps)
+
+        return self.execution_seconds * size_factor * spill_factor, still_spilling
+
+    def simulate_queries(self, config: WarehouseConfig) -> pd.DataFrame:
+        """
+        Returns
+        -------
+        pd.DataFrame
+            one row per query: QUERY_ID, START_TIME, SIMULATED_START_TIME, QUEUED_SECONDS,
+            EXECUTION_SECONDS, LATENCY_SECONDS, SPILLING
+        """
+        execution_seconds, spilling = self._execution_seconds(config)
+        starts = _fifo_starts(self.arrivals, execution_seconds, config.max_cluster_count * config.max_concurrency_level)
+        queued_seconds = starts - self.arrivals
+
+        return pd.DataFrame({
+            "QUERY_ID": self.query_ids,
+            "START_TIME": self.start_time + pd.to_timedelta(self.arrivals, unit="s"),
+            "SIMULATED_START_TIME": self.start_time + pd.to_timedelta(starts, unit="s"),
+            "QUEUED_SECONDS": queued_seconds,
+            "EXECUTION_SECONDS": execution_seconds,
+            "LATENCY_SECONDS": queued_seconds + execution_seconds,
+            "SPILLING": spilling,
+        })
+
+    def simulate(self, config: WarehouseConfig) -> dict:
+        """ simulate one configuration and return the summary (see SUMMARY_COLUMNS) """
+        execution_seconds, spilling = self._execution_seconds(config)
+        slots = config.max_concurrency_level
+        starts = _fifo_starts(self.arrivals, execution_seconds, config.max_cluster_count * slots)
+        ends = starts + execution_seconds
+        queued_seconds = starts - self.arrivals
+        latency_seconds = queued_seconds + execution_seconds
+        horizon = float(ends.max()) if len(ends) else 0.0
+
+        billed_seconds = 0.0
+        for cluster in range(1, config.max_cluster_count + 1):
+            # clusters up to min_cluster_count run whenever the warehouse is running
+            threshold = 0 if cluster <= config.min_cluster_count else (cluster - 1) * slots
+            idle_seconds = config.auto_suspend if cluster <= config.min_cluster_count \
+                else self.cluster_shutdown_seconds
+            run_starts, run_ends = _active_runs(starts, ends, threshold)
+            billed_seconds += _billed_seconds(run_starts, run_ends, idle_seconds, horizon)
+
+        latency_p50, latency_p95, latency_p99 = (
+            np.percentile(latency_seconds, [50, 95, 99]) if len(latency_seconds) else (0.0, 0.0, 0.0)
+        )
+
+        return {
+            "config": config.label,
+            "size": config.size,
+            "min_cluster_count": config.min_cluster_count,
+            "max_cluster_count": config.max_cluster_count,
+            "auto_suspend": config.auto_suspend,
+            "queries": len(self.arrivals),
+            "queued_queries": int((queued_seconds > 0).sum()),
+            "queued_hours": float(queued_seconds.sum() / 3600),
+            "latency_p50_s": float(latency_p50),
+            "latency_p95_s": float(latency_p95),
+            "latency_p99_s": float(latency_p99),
+            "spilling_queries": int(spilling.sum()),
+            "credits": billed_seconds / 3600 * WAREHOUSE_CREDITS_PER_HOUR[config.size],
+        }
+
+    def evaluate(self, configs: List[WarehouseConfig]) -> pd.DataFrame:
+        """ simulate every configuration, returns one summary row per configuration sorted by credits """
+        summary_df = pd.DataFrame([self.simulate(config) for config in configs], columns=SUMMARY_COLUMNS)
+
+        return summary_df.sort_values("credits").reset_index(drop=True)
@@ -0,0 +1,358 @@
+"""
+Table statistics.
+Every column of a table is profiled in a single aggregate query with approximate functions
+(APPROX_COUNT_DISTINCT, APPROX_PERCENTILE, min/max and null counts), so the table is scanned once
+instead of once per column. Huge tables can be profiled from a TABLESAMPLE.
+
+Column types and the table's LAST_ALTERED come from INFORMATION_SCHEMA (one metadata query per database),
+and results are cached by LAST_ALTERED so unchanged tables are not profiled again.
+Views are always profiled: their LAST_ALTERED doesn't change when the data they select changes.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+import threading
+import warnings
+
+from snowflake.snowpark import Session
+
+import pandas as pd
+import numpy as np
+
+from ice_pick.utils import snowpark_query
+from ice_pick.schema_object import SchemaObject
+
+
+STATISTICS_COLUMNS = [
+    "DATA_TYPE",
+    "ROW_COUNT",
+    "NULL_COUNT",
+    "NULL_FRACTION",
+    "APPROX_DISTINCT",
+    "MIN",
+    "MAX",
+    "P25",
+    "P50",
+    "P75",
+]
+PERCENTILES = {"P25": 0.25, "P50": 0.5, "P75": 0.75}
+SAMPLE_METHODS = ["system", "bernoulli"]
+PROFILED_OBJECT_TYPES = ["TABLE", "VIEW", "MATERIALIZED VIEW", "EXTERNAL TABLE"]
+# INFORMATION_SCHEMA.TABLES.TABLE_TYPE of the objects whose data only changes with LAST_ALTERED
+CACHED_TABLE_TYPES = ["BASE TABLE", "TEMPORARY TABLE"]
+
+NUMERIC_TYPES = ["NUMBER", "DECIMAL", "NUMERIC", "INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "BYTEINT",
+                 "FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "DOUBLE PRECISION", "REAL"]
+# min / max / distinct counts are not supported (or not meaningful) on these types
+UNORDERED_TYPES = ["VARIANT", "OBJECT", "ARRAY", "GEOGRAPHY", "GEOMETRY", "VECTOR", "MAP"]
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _table_key(database: str, schema: str, table: str) -> str:
+    return f"{database}.{schema}.{table}"
+
+
+def get_table_metadata(session: Session, database: str, tables: List[Tuple[str, str]]) -> pd.DataFrame:
+    """
+    Return the columns, data types, TABLE_TYPE and LAST_ALTERED of many tables in a database with one
+    INFORMATION_SCHEMA query.
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    database : str
+        the database the tables are in
+    tables : List[Tuple[str, str]]
+        (schema, table) pairs
+
+    Returns
+    -------
+    pd.DataFrame
+        TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, ORDINAL_POSITION, TABLE_TYPE, LAST_ALTERED
+    """
+    table_filter = " or ".join(
+        f"(c.TABLE_SCHEMA = {_literal(schema)} and c.TABLE_NAME = {_literal(table)})" for schema, table in tables
+    )
+    metadata_sql = f"""
+        select c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.ORDINAL_POSITION,
+            t.TABLE_TYPE, t.LAST_ALTERED
+        from {_quote(database)}.INFORMATION_SCHEMA.COLUMNS c
+        join {_quote(database)}.INFORMATION_SCHEMA.TABLES t
+            on c.TABLE_SCHEMA = t.TABLE_SCHEMA and c.TABLE_NAME = t.TABLE_NAME
+        where {table_filter}
+        order by c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+    """
+
+    return snowpark_query(session, metadata_sql)
+
+
+def _profile_sql(
+    database: str,
+    schema: str,
+    table: str,
+    columns_df: pd.DataFrame,
+    sample: float = None,
+    sample_method: str = "system",
+    seed: int = None,
+) -> str:
+    """ one aggregate over the (sampled) table, with positional aliases per column """
+    expressions = ["count(*) as ROW_COUNT"]
+    for position, (column_name, data_type) in enumerate(zip(columns_df["COLUMN_NAME"], columns_df["DATA_TYPE"])):
+        column = _quote(column_name)
+        expressions.append(f"count_if({column} is null) as NULL_COUNT_{position}")
+
+        if data_type in UNORDERED_TYPES:
+            continue
+
+        expressions.append(f"approx_count_distinct({column}) as APPROX_DISTINCT_{position}")
+        expressions.append(f"min({column})::varchar as MIN_{position}")
+        expressions.append(f"max({column})::varchar as MAX_{position}")
+        if data_type in NUMERIC_TYPES:
+            expressions.extend(
+                f"approx_percentile({column}, {q}) as {name}_{position}" for name, q in PERCENTILES.items()
+            )
+
+    sample_sql = ""
+    if sample is not None:
+        seed_sql = f" seed ({seed})" if seed is not None else ""
+        sample_sql = f" tablesample {sample_method} ({sample}){seed_sql}"
+
+    select_sql = ",\n            ".join(expressions)
+
+    return f"""
+        select
+            {select_sql}
+        from {_quote(database)}.{_quote(schema)}.{_quote(table)}{sample_sql}
+    """
+
+
+def _reshape_profile(profile: Dict[str, object], columns_df: pd.DataFrame) -> pd.DataFrame:
+    """ the single wide profile row -> one row per column """
+    row_count = profile["ROW_COUNT"]
+    statistics = []
+    for position, (column_name, data_type) in enumerate(zip(columns_df["COLUMN_NAME"], columns_df["DATA_TYPE"])):
+        null_count = profile[f"NULL_COUNT_{position}"]
+        column_statistics = {
+            "COLUMN_NAME": column_name,
+            "DATA_TYPE": data_type,
+            "ROW_COUNT": row_count,
+            "NULL_COUNT": null_count,
+            "NULL_FRACTION": null_count / row_count if row_count else np.nan,
+        }
+        for name in ["APPROX_DISTINCT", "MIN", "MAX", *PERCENTILES]:
+            column_statistics[name] = profile.get(f"{name}_{position}")
+        statistics.append(column_statistics)
+
+    statistics_df = pd.DataFrame(statistics, columns=["COLUMN_NAME", *STATISTICS_COLUMNS])
+
+    return statistics_df.set_index("COLUMN_NAME")
+
+
+def _validate_sample(sample: float, sample_method: str):
+    if sample is not None and not 0 < sample <= 100:
+        raise ValueError(f"sample {sample} must be a percent in (0, 100]")
+    if sample_method not in SAMPLE_METHODS:
+        raise ValueError(f"sample_method {sample_method} not supported: supported: {SAMPLE_METHODS}")
+
+
+class StatisticsCache:
+    """
+    A cache of table statistics keyed by (table, sample settings).
+    An entry is only reused while the table's LAST_ALTERED is unchanged.
+    Only tables are cached (see CACHED_TABLE_TYPES), views are profiled every time.
+
+    Example
+    -------
+        | >> cache = StatisticsCache()
+        | >> get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+        | >> # returned from the cache until the table is altered
+        | >> get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+    """
+
+    def __init__(self):
+        self._statistics: Dict[tuple, Tuple[object, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._statistics)
+
+    def get(self, key: tuple, last_altered) -> pd.DataFrame:
+        with self._lock:
+            cached = self._statistics.get(key)
+        if cached is None or pd.isna(last_altered) or cached[0] != last_altered:
+            return None
+
+        return cached[1].copy()
+
+    def put(self, key: tuple, last_altered, statistics_df: pd.DataFrame):
+        with self._lock:
+            self._statistics[key] = (last_altered, statistics_df.copy())
+
+    def clear(self):
+        with self._lock:
+            self._statistics.clear()
+
+
+STATISTICS_CACHE = StatisticsCache()
+
+
+def _profile_table(
+    session: Session,
+    database: str,
+    schema: str,
+    table: str,
+    columns_df: pd.DataFrame,
+    sample: float,
+    sample_method: str,
+    seed: int,
+    refresh: bool,
+    cache: StatisticsCache,
+) -> pd.DataFrame:
+    if columns_df.empty:
+        raise ValueError(f"table {_table_key(database, schema, table)} does not exist or has no columns")
+
+    key = (_table_key(database, schema, table), sample, sample_method, seed)
+    last_altered = columns_df["LAST_ALTERED"].iloc[0]
+    # a view's LAST_ALTERED only changes with its definition, not with the data it selects
+    cached = columns_df["TABLE_TYPE"].iloc[0] in CACHED_TABLE_TYPES
+    if cached and not refresh:
+        statistics_df = cache.get(key, last_altered)
+        if statistics_df is not None:
+            return statistics_df
+
+    profile_sql = _profile_sql(database, schema, table, columns_df, sample, sample_method, seed)
+    profile_df = snowpark_query(session, profile_sql)
+    statistics_df = _reshape_profile(profile_df.iloc[0].to_dict(), columns_df)
+
+    if cached:
+        cache.put(key, last_altered, statistics_df)
+
+    return statistics_df
+
+
+def get_table_statistics(
+    session: Session,
+    database: str,
+    schema: str,
+    table: str,
+    sample: float = None,
+    sample_method: str = "system",
+    seed: int = None,
+    refresh: bool = False,
+    cache: StatisticsCache = None,
+) -> pd.DataFrame:
+    """
+    Profile every column of a table in a single aggregate query.
+
+    Parameters
+    ----------
+    session : Session
+        Snowpark Session
+    database, schema, table : str
+        the table (or view) to profile
+    sample : float = None
+        profile a TABLESAMPLE of this percent of the table (ex: 1 for 1%) instead of the whole table.
+        With a sample the counts are of the sampled rows and the other statistics are estimates
+    sample_method : str = "system"
+        "system" samples micro-partitions (fast on huge tables), "bernoulli" samples rows
+    seed : int = None
+        a seed for a repeatable sample
+    refresh : bool = False
+        profile the table even if cached statistics are still current (views are never cached)
+    cache : StatisticsCache = None
+        defaults to the module level STATISTICS_CACHE
+
+    Returns
+    -------
+    pd.DataFrame
+        indexed by COLUMN_NAME with DATA_TYPE, ROW_COUNT, NULL_COUNT, NULL_FRACTION, APPROX_DISTINCT, MIN, MAX
+        and the P25, P50, P75 approximate percentiles (numeric columns only)
+
+    Example
+    -------
+        | >> get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", sample=1)
+    """
+    _validate_sample(sample, sample_method)
+    cache = STATISTICS_CACHE if cache is None else cache
+
+    columns_df = get_table_metadata(session, database, [(schema, table)])
+
+    return _profile_table(
+        session, database, schema, table, columns_df, sample, sample_method, seed, refresh, cache
+    )
+
+
+def get_statistics_bulk(
+    session: Session,
+    objects: List[SchemaObject],
+    sample: float = None,
+    sample_method: str = "system",
+    seed: int = None,
+    refresh: bool = False,
+    max_workers: int = 8,
+    cache: StatisticsCache = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Profile many tables at once (ex: the tables returned by a SchemaObjectFilter).
+    Metadata is fetched with one query per database and the profile queries run concurrently
+    with max_workers threads. Objects that can't be profiled (ex: procedures) and tables without
+    metadata (ex: dropped since the filter ran) are skipped.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        the statistics for each table (see get_table_statistics), keyed by the fully qualified table name
+
+    Example
+    -------
+        | >> objs = session.create_schema_object_filter(["TEST"], [".*"], [".*"], ["table"]).return_schema_objects()
+        | >> statistics = get_statistics_bulk(session, objs, sample=1)
+        | >> statistics["TEST.SCHEMA_1.CUSTOMER"]
+    """
+    _validate_sample(sample, sample_method)
+    cache = STATISTICS_CACHE if cache is None else cache
+
+    tables = [obj for obj in objects if obj.object_type.upper() in PROFILED_OBJECT_TYPES]
+
+    tables_by_database: Dict[str, List[Tuple[str, str]]] = {}
+    for obj in tables:
+        tables_by_database.setdefault(obj.database, []).append((obj.schema, obj.object_name))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        metadata_dfs = dict(zip(
+            tables_by_database,
+            executor.map(
+                lambda database: get_table_metadata(session, database, tables_by_database[database]),
+                tables_by_database,
+            ),
+        ))
+        table_columns = {}
+        for database, metadata_df in metadata_dfs.items():
+            for (schema, table), columns_df in metadata_df.groupby(["TABLE_SCHEMA", "TABLE_NAME"], sort=False):
+                table_columns[_table_key(database, schema, table)] = columns_df
+
+        def profile(obj: SchemaObject) -> pd.DataFrame:
+            key = _table_key(obj.database, obj.schema, obj.object_name)
+            if key not in table_columns:
+                warnings.warn(f"No columns found for {key}, skipping", UserWarning)
+                return None
+            return _profile_table(
+                session, obj.database, obj.schema, obj.object_name, table_columns[key],
+                sample, sample_method, seed, refresh, cache,
+            )
+
+        statistics_dfs = list(executor.map(profile, tables))
+
+    return {
+        _table_key(obj.database, obj.schema, obj.object_name): statistics_df
+        for obj, statistics_df in zip(tables, statistics_dfs)
+        if statistics_df is not None
+    }
@@ -0,0 +1,167 @@
+"""
+Chunk wise aggregation for streamed query results.
+Aggregators consume pandas dataframe chunks (ex: Warehouse.query_history(..., stream=True))
+and only keep one partial row per group, so analytics over large histories run in constant memory.
+"""
+
+from typing import List, Dict, Iterable
+
+import pandas as pd
+
+
+SUPPORTED_AGGREGATIONS = ["sum", "count", "min", "max", "mean"]
+
+# how partial results are combined
+_COMBINE_AGGREGATIONS = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+class GroupedRollup:
+    """
+    A group by aggregation that is updated one chunk at a time.
+
+    Parameters
+    ----------
+    by : list
+        the columns to group on
+    metrics : Dict[str, list]
+        the aggregations for each column, ex: {"EXECUTION_TIME": ["sum", "mean", "max"]}
+        (supported: sum, count, min, max, mean)
+    time_column : str = None
+        optionally also group on this timestamp column floored to freq
+    freq : str = "h"
+        the time bucket size for time_column (a pandas frequency string)
+    compact_every : int = 16
+        combine the partial results after this many chunks to keep memory bounded
+
+    Example
+    -------
+        | >> rollup = GroupedRollup(["WAREHOUSE_NAME"], {"EXECUTION_TIME": ["sum", "mean"]}, time_column="START_TIME")
+        | >> for chunk in warehouse.query_history(24 * 14, 0, stream=True):
+        | >>     rollup.update(chunk)
+        | >> rollup.result()
+    """
+
+    def __init__(
+        self,
+        by: list,
+        metrics: Dict[str, list],
+        time_column: str = None,
+        freq: str = "h",
+        compact_every: int = 16,
+    ):
+        for column, aggregations in metrics.items():
+            unsupported = set(aggregations) - set(SUPPORTED_AGGREGATIONS)
+            if unsupported:
+                raise ValueError(
+                    f"aggregations {unsupported} for {column} not supported: "
+                    f"supported aggregations: {SUPPORTED_AGGREGATIONS}"
+                )
+
+        if not by and not time_column:
+            raise ValueError("at least one group by column or a time_column is required")
+
+        self.by = list(by)
+        self.metrics = metrics
+        self.time_column = time_column
+        self.freq = freq
+        self.compact_every = compact_every
+        self.rows = 0
+        self._partials: List[pd.DataFrame] = []
+
+    @property
+    def keys(self) -> list:
+        return self.by + ([self.time_column] if self.time_column else [])
+
+    def _partial_aggregations(self) -> Dict[str, tuple]:
+        """ the partial aggregations, mean is kept as a sum and a count """
+        partial_aggregations = {}
+        for column, aggregations in self.metrics.items():
+            for aggregation in aggregations:
+                if aggregation == "mean":
+                    partial_aggregations[f"{column}__sum"] = (column, "sum")
+                    partial_aggregations[f"{column}__count"] = (column, "count")
+                else:
+                    partial_aggregations[f"{column}__{aggregation}"] = (column, aggregation)
+
+        return partial_aggregations
+
+    def _compact(self):
+        if len(self._partials) <= 1:
+            return
+
+        partials_df = pd.concat(self._partials)
+        combine = {
+            column: _COMBINE_AGGREGATIONS[column.rsplit("__", 1)[1]] for column in partials_df.columns
+        }
+        self._partials = [partials_df.groupby(level=list(range(len(self.keys))), dropna=False).agg(combine)]
+
+    def update(self, chunk: pd.DataFrame):
+        """ aggregate a chunk into the partial results """
+        if chunk.empty:
+            return
+
+        if self.time_column:
+            chunk = chunk.assign(
+                **{self.time_column: pd.to_datetime(chunk[self.time_column]).dt.floor(self.freq)}
+            )
+
+        self._partials.append(chunk.groupby(self.keys, dropna=False).agg(**self._partial_aggregations()))
+        self.rows += len(chunk)
+
+        if len(self._partials) >= self.compact_every:
+            self._compact()
+
+    def result(self) -> pd.DataFrame:
+        """ return the aggregated result with one "<column>_<aggregation>" column per metric """
+        self._compact()
+        if not self._partials:
+            return pd.DataFrame()
+
+        partials_df = self._partials[0]
+
+        result_df = pd.DataFrame(index=partials_df.index)
+        for column, aggregations in self.metrics.items():
+            for aggregation in aggregations:
+                if aggregation == "mean":
+                    result_df[f"{column}_mean"] = (
+                        partials_df[f"{column}__sum"] / partials_df[f"{column}__count"]
+                    )
+                else:
+                    result_df[f"{column}_{aggregation}"] = partials_df[f"{column}__{aggregation}"]
+
+        return result_df.sort_index()
+
+
+def hourly_rollup(metrics: Dict[str, list], time_column: str = "START_TIME", by: list = None) -> GroupedRollup:
+    """ rollup per hour (optionally also grouped by the by columns) """
+    return GroupedRollup(by or [], metrics, time_column=time_column, freq="h")
+
+
+def warehouse_rollup(metrics: Dict[str, list]) -> GroupedRollup:
+    """ rollup per warehouse """
+    return GroupedRollup(["WAREHOUSE_NAME"], metrics)
+
+
+def user_rollup(metrics: Dict[str, list]) -> GroupedRollup:
+    """ rollup per user """
+    return GroupedRollup(["USER_NAME"], metrics)
+
+
+def aggregate_stream(chunks: Iterable[pd.DataFrame], aggregators: Dict[str, GroupedRollup]) -> Dict[str, pd.DataFrame]:
+    """
+    Feed every chunk of a stream to each aggregator (the stream is only read once)
+    and return the result of each aggregator.
+
+    Example
+    -------
+        | >> chunks = fleet.query_history(24 * 14, 0, source="account_usage", stream=True)
+        | >> results = aggregate_stream(chunks, {
+        | >>     "hourly": hourly_rollup({"EXECUTION_TIME": ["sum", "count"]}, by=["WAREHOUSE_NAME"]),
+        | >>     "users": user_rollup({"EXECUTION_TIME": ["mean", "max"]}),
+        | >> })
+    """
+    for chunk in chunks:
+        for aggregator in aggregators.values():
+            aggregator.update(chunk)
+
+    return {name: aggregator.result() for name, aggregator in aggregators.items()}
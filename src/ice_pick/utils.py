@@ -1,22 +1,51 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Dict, Iterator, Optional, Union
+import datetime
+import decimal
 import copy
 import re
 import configparser
 import functools
+import operator
+import logging
+import threading
+import warnings
 
 from snowflake.snowpark import Session
 import snowflake.snowpark as snowpark
 from snowflake.snowpark.row import Row
 from snowflake.snowpark.types import (
+    DataType,
+    ByteType,
+    ShortType,
     IntegerType,
+    LongType,
+    DecimalType,
+    DoubleType,
     StringType,
     StructField,
     StructType,
     FloatType,
     NullType,
+    DateType,
+    TimestampType,
+    BooleanType,
+)
+from snowflake.snowpark import GroupingSets, Window
+from snowflake.snowpark.functions import (
+    lit,
+    col,
+    count,
+    avg,
+    grouping_id,
+    row_number,
+    iff,
+    when,
+    call_function,
+    sum as sum_,
+    min as min_,
+    max as max_,
 )
-from snowflake.snowpark.functions import lit
 
 import pandas as pd
 import numpy as np
@@ -63,6 +92,18 @@ def snowpark_query(session, sql, non_select=False, dry=False, collect=False):
         return df
 
 
+@SQLTracker
+def snowpark_query_batches(session, sql) -> Iterator[pd.DataFrame]:
+    """
+    Streaming version of snowpark_query for select queries.
+    Yields the result as pandas dataframe chunks (from the result batches),
+    so large results can be processed without loading everything into memory.
+
+    """
+    for batch_df in session.sql(sql).to_pandas_batches():
+        yield batch_df
+
+
 
 # ----------------------   Account State Management --------------------------
 # Is this out of scope?
@@ -82,99 +123,269 @@ def snowpark_query(session, sql, non_select=False, dry=False, collect=False):
 # ---------------------   Pandas-like Functionality  --------------------
 # (mostly just to cover edge cases, or features I want)
 ### Auto union
-def _get_schemas(union_dfs: list) -> list:
-    # get a flat list of all structs in all dataframes
-    struct_field_list = []
+UNION_METHODS = ["balanced", "flat"]
+
+_INTEGRAL_TYPES = (ByteType, ShortType, IntegerType, LongType)
+_FRACTIONAL_TYPES = (FloatType, DoubleType)
+
+
+def _common_type(left: DataType, right: DataType) -> Optional[DataType]:
+    # the common type for two data types, None when the types are not compatible
+    if left == right:
+        return left
+    if isinstance(left, NullType):
+        return right
+    if isinstance(right, NullType):
+        return left
+
+    numeric_types = _INTEGRAL_TYPES + _FRACTIONAL_TYPES + (DecimalType,)
+    if isinstance(left, numeric_types) and isinstance(right, numeric_types):
+        if isinstance(left, _FRACTIONAL_TYPES) or isinstance(right, _FRACTIONAL_TYPES):
+            return DoubleType()
+        if isinstance(left, _INTEGRAL_TYPES) and isinstance(right, _INTEGRAL_TYPES):
+            return LongType()
+        # integers are decimals with a scale of 0
+        scale = max(getattr(data_type, "scale", 0) for data_type in (left, right))
+        return DecimalType(38, scale)
+
+    if isinstance(left, StringType) and isinstance(right, StringType):
+        if left.length is None or right.length is None:
+            return StringType()
+        return StringType(max(left.length, right.length))
+
+    if isinstance(left, (DateType, TimestampType)) and isinstance(right, (DateType, TimestampType)):
+        return TimestampType()
+
+    return None
+
+
+def _promote_types(left: DataType, right: DataType) -> DataType:
+    # the common type for columns with the same name and different data types,
+    # incompatible types (ex: a number and a string) fall back to strings
+    return _common_type(left, right) or StringType()
+
+
+def _merge_schemas(union_dfs: list) -> Dict[str, DataType]:
+    # one pass over every column: column name -> promoted data type (in first seen order)
+    merged_schema = {}
     for df in union_dfs:
-        structs = df.schema.fields
-        for struct in structs:
-            struct_field_list.append(struct)
+        for struct in df.schema.fields:
+            if struct.name in merged_schema:
+                merged_schema[struct.name] = _promote_types(merged_schema[struct.name], struct.datatype)
+            else:
+                merged_schema[struct.name] = struct.datatype
 
-    return struct_field_list
+    return merged_schema
 
 
-def _get_unique_struct_fields(struct_field_list: list) -> list:
-    # only get ge the unique structs
-    unique_structs_list = []
-    for struct in struct_field_list:
-        if struct not in unique_structs_list:
-            unique_structs_list.append(struct)
+def _align_schema(df: snowpark.DataFrame, merged_schema: Dict[str, DataType]) -> snowpark.DataFrame:
+    # project the merged schema in order: cast mismatched types and add typed null columns
+    df_types = {struct.name: struct.datatype for struct in df.schema.fields}
 
-    return unique_structs_list
+    aligned_cols = []
+    for name, data_type in merged_schema.items():
+        if name not in df_types:
+            aligned_cols.append(lit(None).cast(data_type).alias(name))
+        elif df_types[name] != data_type:
+            aligned_cols.append(col(name).cast(data_type).alias(name))
+        else:
+            aligned_cols.append(col(name))
 
+    return df.select(aligned_cols)
 
-def _handle_struct_name_type_mismatch(unique_structs_list: list) -> list:
-    # handle when columns with the same name have different data types
-    # for now just pick the first data type, and discard the others
-    unique_structs_type_list = []
-    struct_name_list = []
-    for struct in unique_structs_list:
-        if struct.name not in struct_name_list:
-            struct_name_list.append(struct.name)
-            unique_structs_type_list.append(struct)
 
-    return unique_structs_type_list
+def _union_balanced(aligned_dfs: list) -> snowpark.DataFrame:
+    # union pairs of dataframes until one is left, so the plan depth is log2(n) instead of n
+    while len(aligned_dfs) > 1:
+        aligned_dfs = [
+            aligned_dfs[i].union_all(aligned_dfs[i + 1]) if i + 1 < len(aligned_dfs) else aligned_dfs[i]
+            for i in range(0, len(aligned_dfs), 2)
+        ]
 
+    return aligned_dfs[0]
 
-def _create_union_dataframe(
-    session: Session, unique_structs_type_list: list
-) -> snowpark.DataFrame:
-    # create the union dataframe from the unique schema structs
-    union_schema = StructType(unique_structs_type_list)
 
-    union_df = session.create_dataframe([], union_schema)
+def _union_flat(session: Session, aligned_dfs: list) -> snowpark.DataFrame:
+    # a single flat "union all" statement, dataframes that need more than one query
+    # (ex: large create_dataframe calls that upload a temp table) fall back to the balanced union
+    df_queries = [df.queries for df in aligned_dfs]
+    if any(len(queries["queries"]) != 1 or queries["post_actions"] for queries in df_queries):
+        return _union_balanced(aligned_dfs)
 
-    return union_df
+    union_sql = "\nunion all\n".join(
+        f"select * from ({queries['queries'][0]})" for queries in df_queries
+    )
 
+    return session.sql(union_sql)
 
-def _extend_schema(
-    df: snowpark.DataFrame, union_df: snowpark.DataFrame
-) -> snowpark.DataFrame:
-    col_names = {struct.name: struct for struct in df.schema.fields}
-    union_col_names = {struct.name: struct for struct in union_df.schema.fields}
 
-    # get struct for col not in the dataframe
-    structs_to_null = []
-    for key in union_col_names:
-        if key not in col_names:
-            structs_to_null.append(union_col_names[key])
+### Local engine
+# small inputs created from local rows (session.create_dataframe) can be combined client side,
+# the result is a single values dataframe instead of a plan with one branch per input
+ENGINES = ["auto", "snowflake", "local"]
+LOCAL_ENGINE_MAX_ROWS = 10000
 
-    # add struct as null col
-    for struct in structs_to_null:
-        df = df.with_column(struct.name, lit(None))
+_LOCAL_TYPES = _INTEGRAL_TYPES + _FRACTIONAL_TYPES + (DecimalType, StringType, BooleanType, DateType, TimestampType, NullType)
+# the conversions create_dataframe projects over the values it inlines
+_VALUES_CONVERSIONS = ["to_date", "to_decimal", "to_timestamp", "to_timestamp_ntz", "to_timestamp_ltz", "to_timestamp_tz"]
 
-        # cast to the correct data type
 
-    return df
+def _is_column_reference(expr, name: str) -> bool:
+    from snowflake.snowpark._internal.analyzer.expression import Attribute, UnresolvedAttribute
 
+    return isinstance(expr, (Attribute, UnresolvedAttribute)) and expr.name == name
 
-def _add_null_cols(union_dfs: list, union_df: snowpark.DataFrame) -> list:
-    # add null columns for the inclusive case
-    # (the number of columns must match between tables, so null cols need to be added)
-    ext_dfs = []
-    for df in union_dfs:
-        df = _extend_schema(df, union_df)
-        ext_dfs.append(df)
 
-    return ext_dfs
+def _is_values_projection(expr, name: str) -> bool:
+    # a plain column, or one of the conversions create_dataframe adds on top of the values
+    from snowflake.snowpark._internal.analyzer.expression import FunctionExpression
+    from snowflake.snowpark._internal.analyzer.unary_expression import Alias
 
+    if _is_column_reference(expr, name):
+        return True
+    if isinstance(expr, Alias) and expr.name == name:
+        child = expr.children[0]
+        return (
+            isinstance(child, FunctionExpression)
+            and child.name in _VALUES_CONVERSIONS
+            and _is_column_reference(child.children[0], name)
+        )
+    return False
 
-def _populate_union_df(
-    ext_dfs: list, union_df: snowpark.DataFrame
-) -> snowpark.DataFrame:
-    for df in ext_dfs:
-        union_df = union_df.union_all_by_name(df)
 
-    return union_df
+def _from_values(value, data_type: DataType):
+    # create_dataframe inlines dates and timestamps as strings
+    if isinstance(value, str) and isinstance(data_type, DateType):
+        return datetime.date.fromisoformat(value)
+    if isinstance(value, str) and isinstance(data_type, TimestampType):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(value, decimal.Decimal) and isinstance(data_type, DecimalType):
+        return value.quantize(decimal.Decimal(1).scaleb(-data_type.scale))
+    return value
+
+
+def _local_rows(df: snowpark.DataFrame) -> Optional[List[tuple]]:
+    """
+    The rows of a dataframe created from local data with session.create_dataframe, read from the plan
+    without a round trip. None for any other dataframe (tables, sql, transformed or uploaded dataframes).
+    """
+    try:
+        # Snowpark internals are imported lazily: when they move, only the local engine is disabled
+        from snowflake.snowpark._internal.analyzer.snowflake_plan_node import SnowflakeValues
+        from snowflake.snowpark._internal.analyzer.analyzer_utils import quote_name
+
+        select_statement = getattr(df, "_select_statement", None) or df._plan.source_plan
+        if (
+            select_statement.where is not None
+            or select_statement.order_by
+            or select_statement.limit_ is not None
+            or select_statement.offset
+            or select_statement.distinct_
+        ):
+            return None
+
+        from_plan = getattr(select_statement.from_, "_snowflake_plan", None) or select_statement.from_._execution_plan
+        values_plan = from_plan.source_plan
+        if not isinstance(values_plan, SnowflakeValues) or values_plan.data is None:
+            return None
+
+        fields = df.schema.fields
+        names = [quote_name(struct.name) for struct in fields]
+        projection = select_statement.projection
+        if [attribute.name for attribute in values_plan.output] != names or projection is None:
+            return None
+        if len(projection) != len(names) or not all(map(_is_values_projection, projection, names)):
+            return None
+    except (ImportError, AttributeError) as e:
+        # Snowpark plan internals changed: engine="auto" falls back to Snowflake
+        logging.debug(f"dataframe plan not recognized as local values: {e}")
+        return None
+
+    if not all(isinstance(struct.datatype, _LOCAL_TYPES) for struct in fields):
+        return None
+
+    return [
+        tuple(_from_values(value, struct.datatype) for value, struct in zip(row, fields))
+        for row in values_plan.data
+    ]
+
+
+def _to_local_type(value, data_type: DataType):
+    # python equivalent of casting the value to data_type in Snowflake
+    if value is None or isinstance(data_type, NullType):
+        return value
+    if isinstance(data_type, _INTEGRAL_TYPES):
+        return int(value)
+    if isinstance(data_type, _FRACTIONAL_TYPES):
+        return float(value)
+    if isinstance(data_type, DecimalType):
+        return decimal.Decimal(str(value))
+    if isinstance(data_type, TimestampType) and not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    if isinstance(data_type, StringType) and not isinstance(value, str):
+        if isinstance(value, bool):
+            return str(value).lower()
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        if isinstance(value, datetime.datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        return str(value)
+    return value
+
+
+def _select_engine(engine: str, dfs: list) -> Optional[List[List[tuple]]]:
+    """ the local rows of every input when they should run on the local engine, otherwise None """
+    if engine not in ENGINES:
+        raise ValueError(f"engine {engine} not supported: supported engines: {ENGINES}")
+    if engine == "snowflake":
+        return None
+
+    local_rows = [_local_rows(df) for df in dfs]
+
+    if engine == "auto":
+        if any(rows is None for rows in local_rows):
+            return None
+        if sum(len(rows) for rows in local_rows) > LOCAL_ENGINE_MAX_ROWS:
+            return None
+        return local_rows
+
+    # engine="local": inputs that are not local are collected
+    return [rows if rows is not None else [tuple(row) for row in df.collect()] for rows, df in zip(local_rows, dfs)]
+
+
+def _concat_local(session: Session, union_dfs: list, local_rows: list) -> snowpark.DataFrame:
+    merged_schema = _merge_schemas(union_dfs)
+    names = list(merged_schema)
+    data_types = list(merged_schema.values())
+
+    rows = []
+    for df, df_rows in zip(union_dfs, local_rows):
+        positions = {name: i for i, name in enumerate(df.schema.names)}
+        for row in df_rows:
+            rows.append([
+                _to_local_type(row[positions[name]], data_type) if name in positions else None
+                for name, data_type in zip(names, data_types)
+            ])
+
+    schema = StructType([StructField(name, data_type) for name, data_type in merged_schema.items()])
+
+    return session.create_dataframe(rows, schema=schema)
 
 
 # Might move these to a "pandas_func" module
-def concat_standalone(session: Session, union_dfs: list) -> snowpark.DataFrame:
+def concat_standalone(
+    session: Session,
+    union_dfs: list,
+    union_method: str = "balanced",
+    engine: str = "auto",
+) -> snowpark.DataFrame:
     """
     Returns a unioned dataframe from the input list of dataframes based on column names.
     Primarly to handle cases where the number of columns do not match,
     which is not suppored by the base union function.
-    If columns do not match, non-matching columns are added with null values to the base dataframes.
+    If columns do not match, non-matching columns are added as typed null values to the base dataframes.
+    Columns with the same name and different types are cast to a common type
+    (ex: integer and float -> double, integer and decimal -> decimal, mismatched types -> string).
 
     Parameters
     ----------
@@ -182,6 +393,16 @@ def concat_standalone(session: Session, union_dfs: list) -> snowpark.DataFrame:
         session object
     union_dfs : list
         A list of the input snowpark dataframes to union
+    union_method : str, default 'balanced'
+        | - balanced: union the dataframes pairwise, so the plan depth grows with log2 of the number of inputs
+        | - flat: generate a single flat "union all" statement
+        |   (falls back to balanced for inputs that need more than one query)
+    engine : str, default 'auto'
+        | - auto: union client side when every input was created from local rows with session.create_dataframe
+        |   and there are at most LOCAL_ENGINE_MAX_ROWS rows in total, otherwise in Snowflake
+        | - snowflake: always build the union in Snowflake
+        | - local: always union client side (inputs that are not local are collected first)
+        | The local engine returns a single values dataframe with the same schema as the Snowflake union
 
     Returns
     -------
@@ -217,20 +438,90 @@ def concat_standalone(session: Session, union_dfs: list) -> snowpark.DataFrame:
         | ----------------------------------------
 
     """
+    if union_method not in UNION_METHODS:
+        raise ValueError(f"union_method {union_method} not supported: supported methods: {UNION_METHODS}")
+    if not union_dfs:
+        raise ValueError("union_dfs must contain at least one dataframe")
+
+    local_rows = _select_engine(engine, union_dfs)
+    if local_rows is not None:
+        return _concat_local(session, union_dfs, local_rows)
+
+    merged_schema = _merge_schemas(union_dfs)
 
-    struct_field_list = _get_schemas(union_dfs)
+    aligned_dfs = [_align_schema(df, merged_schema) for df in union_dfs]
 
-    unique_structs_list = _get_unique_struct_fields(struct_field_list)
+    if union_method == "flat":
+        return _union_flat(session, aligned_dfs)
 
-    unique_structs_type_list = _handle_struct_name_type_mismatch(unique_structs_list)
+    return _union_balanced(aligned_dfs)
 
-    union_df = _create_union_dataframe(session, unique_structs_type_list)
 
-    ext_dfs = _add_null_cols(union_dfs, union_df)
+MELT_METHODS = ["auto", "unpivot", "union"]
 
-    union_df = _populate_union_df(ext_dfs, union_df)
 
-    return union_df
+def _melt_union(
+    session: Session,
+    df: snowpark.DataFrame,
+    id_vars: list,
+    value_vars: list,
+    var_name: str,
+    value_name: str,
+    include_nulls: bool,
+) -> snowpark.DataFrame:
+    # one projection per value column, unioned (one scan per value column)
+    id_cols = [col(id_var) for id_var in id_vars]
+
+    melt_dfs_list = []
+    for value_var in value_vars:
+        melt_subset_df = df if include_nulls else df.filter(col(value_var).is_not_null())
+        melt_subset_df = melt_subset_df.select(
+            id_cols + [lit(value_var).alias(var_name), col(value_var).alias(value_name)]
+        )
+        melt_dfs_list.append(melt_subset_df)
+
+    return concat_standalone(session, melt_dfs_list)
+
+
+def _unquote(name: str) -> str:
+    # a resolved column name as Snowflake returns it as a value, ex: "x" -> x, X -> X
+    if len(name) > 1 and name.startswith('"') and name.endswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name
+
+
+def _melt_local(
+    session: Session,
+    df: snowpark.DataFrame,
+    rows: List[tuple],
+    id_vars: list,
+    value_vars: list,
+    var_name: str,
+    value_name: str,
+    include_nulls: bool,
+) -> snowpark.DataFrame:
+    # the value type matches the Snowflake paths: the common type, or strings for incompatible types
+    df_types = {struct.name: struct.datatype for struct in df.schema.fields}
+    positions = {name: i for i, name in enumerate(df.schema.names)}
+    id_cols = [df.select(id_var).schema.names[0] for id_var in id_vars]
+    value_cols = [df.select(value_var).schema.names[0] for value_var in value_vars]
+    value_type = functools.reduce(_promote_types, [df_types[name] for name in value_cols])
+
+    melt_rows = []
+    for row in rows:
+        ids = [row[positions[name]] for name in id_cols]
+        for value_var, name in zip(value_vars, value_cols):
+            value = row[positions[name]]
+            if value is None and not include_nulls:
+                continue
+            melt_rows.append(ids + [value_var, _to_local_type(value, value_type)])
+
+    schema = StructType(
+        [StructField(name, df_types[name]) for name in id_cols]
+        + [StructField(var_name, StringType()), StructField(value_name, value_type)]
+    )
+
+    return session.create_dataframe(melt_rows, schema=schema)
 
 
 def melt_standalone(
@@ -240,12 +531,15 @@ def melt_standalone(
     value_vars: list,
     var_name: str = "variable",
     value_name: str = "value",
+    include_nulls: bool = True,
+    method: str = "auto",
+    engine: str = "auto",
 ) -> snowpark.DataFrame:
     """
-    Returns a unioned dataframe from the input list of dataframes based on column names.
-    Primarly to handle cases where the number of columns do not match,
-    which is not suppored by the base union function.
-    If columns do not match, non-matching columns are added with null values to the base dataframes.
+    Unpivot a dataframe from wide to long format, like pandas.melt.
+    The value columns are cast to a common type and unpivoted with a single native UNPIVOT (one scan).
+    When the value columns do not share a common type (ex: numbers and strings)
+    each value column is projected separately and unioned instead, with the values cast to strings.
 
     Parameters
     ----------
@@ -261,12 +555,23 @@ def melt_standalone(
         Name of the variable column
     value_name: str, default 'value'
         Name of the value column
-
+    include_nulls: bool, default True
+        keep rows with null values (pandas semantics), UNPIVOT drops them by default
+    method: str, default 'auto'
+        | - auto: unpivot when the value columns have a common type, otherwise union
+        | - unpivot: always unpivot (raises a ValueError for incompatible types)
+        | - union: always union
+    engine: str, default 'auto'
+        | - auto: melt client side when the dataframe was created from local rows with session.create_dataframe
+        |   and has at most LOCAL_ENGINE_MAX_ROWS rows, otherwise in Snowflake
+        | - snowflake: always melt in Snowflake
+        | - local: always melt client side (a dataframe that is not local is collected first)
+        | The local engine returns a single values dataframe with the same schema as the Snowflake melt
 
     Returns
     -------
     snowpark.DataFrame
-        A snowpark dataframe with the unpivoted dataframes
+        A snowpark dataframe with the id columns, the variable column and the value column
 
     Example
     -------
@@ -276,42 +581,581 @@ def melt_standalone(
         | >> melt_df.show()
 
         | ------------------------------
-        | |"A"  |"VALUE"  |"VARIABLE"  |
+        | |"A"  |"VARIABLE"  |"VALUE"  |
         | ------------------------------
-        | |a    |1        |B           |
-        | |b    |3        |B           |
-        | |c    |5        |B           |
-        | |a    |2        |C           |
-        | |b    |4        |C           |
-        | |c    |6        |C           |
+        | |a    |B           |1        |
+        | |a    |C           |2        |
+        | |b    |B           |3        |
+        | |b    |C           |4        |
+        | |c    |B           |5        |
+        | |c    |C           |6        |
         | ------------------------------
 
     """
+    if method not in MELT_METHODS:
+        raise ValueError(f"method {method} not supported: supported methods: {MELT_METHODS}")
+
+    value_types = [struct.datatype for struct in df.select(value_vars).schema.fields]
+    common_type = functools.reduce(
+        lambda left, right: _common_type(left, right) if left is not None else None, value_types
+    )
+
+    if method == "unpivot" and common_type is None:
+        raise ValueError(
+            f"value_vars {value_vars} do not have a common type for UNPIVOT: use method='union'"
+        )
+
+    unpivot = method != "union" and common_type is not None
+
+    local_rows = _select_engine(engine, [df])
+    if local_rows is not None:
+        return _melt_local(session, df, local_rows[0], id_vars, value_vars, var_name, value_name, include_nulls)
+
+    if not unpivot:
+        return _melt_union(session, df, id_vars, value_vars, var_name, value_name, include_nulls)
+
+    value_cols = [
+        col(value_var) if value_type == common_type else col(value_var).cast(common_type).alias(value_var)
+        for value_var, value_type in zip(value_vars, value_types)
+    ]
+    melt_df = df.select([col(id_var) for id_var in id_vars] + value_cols).unpivot(
+        value_name, var_name, value_vars, include_nulls=include_nulls
+    )
+
+    # UNPIVOT returns the resolved column names (ex: x -> X), the union path the names as given
+    resolved_vars = [_unquote(df.select(value_var).schema.names[0]) for value_var in value_vars]
+    if resolved_vars != list(value_vars):
+        variable = when(col(var_name) == lit(resolved_vars[0]), lit(value_vars[0]))
+        for resolved_var, value_var in zip(resolved_vars[1:], value_vars[1:]):
+            variable = variable.when(col(var_name) == lit(resolved_var), lit(value_var))
+        melt_df = melt_df.select(
+            [col(id_var) for id_var in id_vars] + [variable.alias(var_name), col(value_name)]
+        )
 
-    melt_dfs_list = []
-    for value_var in value_vars:
-        filtered_cols = id_vars + [value_var]
-        melt_subset_df = df[filtered_cols]
-        melt_subset_df = melt_subset_df.rename(value_var, value_name)
-        melt_subset_df = melt_subset_df.with_column(var_name, lit(value_var))
-        melt_dfs_list.append(melt_subset_df)
+    return melt_df
 
-    melt_df = concat_standalone(session, melt_dfs_list)
 
-    return melt_df
+### Nulls
+def isna_standalone(session: Session, df: snowpark.DataFrame) -> snowpark.DataFrame:
+    """
+    Returns a lazy boolean dataframe with the same columns, like pandas.isna
+    (True where the value is null). Nothing is executed until the result is used.
+
+    Parameters
+    ----------
+    session : Session
+        session object
+    df : snowpark.DataFrame
+        A snowpark dataframe
+
+    Returns
+    -------
+    snowpark.DataFrame
+        A boolean snowpark dataframe
+
+    Example
+    -------
+        | >> session.isna(df).show()
+    """
+    return df.select([col(column).is_null().alias(column) for column in df.columns])
+
+
+def isnull_standalone(session: Session, df: snowpark.DataFrame) -> snowpark.DataFrame:
+    """ alias of isna_standalone, like pandas.isnull """
+    return isna_standalone(session, df)
+
+
+def null_profile_standalone(
+    session: Session,
+    df: snowpark.DataFrame,
+    columns: list = None,
+) -> pd.DataFrame:
+    """
+    Returns the null count and null fraction of every column, computed in one scan
+    with a single aggregate query (COUNT_IF(column IS NULL) per column).
+
+    Parameters
+    ----------
+    session : Session
+        session object
+    df : snowpark.DataFrame
+        A snowpark dataframe to profile
+    columns : list, default None
+        the columns to profile (all columns by default)
+
+    Returns
+    -------
+    pd.DataFrame
+        indexed by column with the columns: null_count, null_fraction, row_count
+
+    Example
+    -------
+        | >> null_profile_df = session.null_profile(session.table("TEST.SCHEMA_1.CUSTOMER"))
+        | >> null_profile_df[null_profile_df["null_fraction"] > 0.5]
+    """
+    columns = df.select(columns).columns if columns is not None else df.columns
+
+    # positional aliases, so any column name works
+    null_count_cols = [
+        call_function("count_if", col(column).is_null()).alias(f"NULL_COUNT_{i}")
+        for i, column in enumerate(columns)
+    ]
+    profile_row = df.agg([count(lit(1)).alias("ROW_COUNT")] + null_count_cols).collect()[0]
+
+    row_count = profile_row[0]
+    null_counts = np.array(profile_row[1:], dtype=float)
+
+    profile_df = pd.DataFrame(
+        {
+            "null_count": null_counts.astype(int),
+            "null_fraction": null_counts / row_count if row_count else np.zeros(len(columns)),
+            "row_count": row_count,
+        },
+        index=pd.Index(columns, name="column"),
+    )
+
+    return profile_df
+
+
+### Pivot
+PIVOT_AGGREGATIONS = {
+    "sum": sum_,
+    "mean": avg,
+    "avg": avg,
+    "min": min_,
+    "max": max_,
+    "count": count,
+}
 
 
-def isna():
-    return
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
 
 
-def isnull():
-    return
+def _sorted_values(values: list) -> list:
+    # pandas orders categories, mixed types keep the discovered order
+    try:
+        return sorted(values)
+    except TypeError:
+        return list(values)
 
 
-def pivot():
-    return
+def _grouping_id(n_columns: int, position: int) -> int:
+    # the grouping id of the grouping set of one column: a 0 bit for the grouped column
+    return (2 ** n_columns - 1) - 2 ** (n_columns - 1 - position)
 
 
-def get_dummies():
-    return
+def _parse_distinct_rows(rows: list, columns: list) -> Dict[str, list]:
+    # rows are (*columns, count, grouping id, rank)
+    n_columns = len(columns)
+    grouping_ids = {_grouping_id(n_columns, i): i for i in range(n_columns)}
+
+    value_counts = {column: [] for column in columns}
+    for row in rows:
+        position = grouping_ids[row[n_columns + 1]]
+        value_counts[columns[position]].append((row[position], row[n_columns]))
+
+    # nulls can't be pivoted or compared with "=", so they are not categories
+    return {
+        column: [value for value, _ in sorted(counts, key=lambda value_count: -value_count[1]) if value is not None]
+        for column, counts in value_counts.items()
+    }
+
+
+class DistinctValueCache:
+    """
+    The distinct values of columns (most frequent first), cached per source dataframe (its sql) and column,
+    so repeated pivots / encodings of the same source skip the discovery query.
+    Discovery is one scan for all of the requested columns (group by grouping sets).
+    """
+
+    def __init__(self):
+        self._values: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _source_key(df: snowpark.DataFrame) -> str:
+        return "\n".join(df.queries["queries"])
+
+    @staticmethod
+    def _discover(df: snowpark.DataFrame, columns: list, max_values: int) -> Dict[str, list]:
+        # at most max_values + 1 of the most frequent values per column, so callers can detect overflow
+        column_cols = [col(column) for column in columns]
+        counts_df = df.group_by_grouping_sets(GroupingSets(*[[column_col] for column_col in column_cols])).agg(
+            count(lit(1)).alias("__COUNT"), grouping_id(*column_cols).alias("__GROUPING_ID")
+        )
+        # the null group is ranked last, so it doesn't take the place of a value
+        grouped_null = functools.reduce(operator.or_, [
+            (col("__GROUPING_ID") == lit(_grouping_id(len(columns), i))) & column_col.is_null()
+            for i, column_col in enumerate(column_cols)
+        ])
+        rank = row_number().over(
+            Window.partition_by(col("__GROUPING_ID")).order_by(iff(grouped_null, lit(1), lit(0)), col("__COUNT").desc())
+        )
+        counts_df = counts_df.with_column("__RANK", rank).filter(col("__RANK") <= max_values + 1)
+
+        return _parse_distinct_rows(counts_df.collect(), columns)
+
+    def get(
+        self,
+        df: snowpark.DataFrame,
+        columns: list,
+        max_values: int = 100,
+        refresh: bool = False,
+    ) -> Dict[str, list]:
+        """
+        Return up to max_values + 1 distinct values per column, most frequent first
+        (more than max_values values means the column was truncated)
+        """
+        source_key = self._source_key(df)
+
+        with self._lock:
+            cached = {}
+            for column in columns:
+                entry = self._values.get((source_key, column))
+                # a cached entry is reusable if it was complete or discovered with a larger cap
+                if entry is not None and not refresh and (len(entry[0]) <= entry[1] or entry[1] >= max_values):
+                    cached[column] = entry[0][:max_values + 1]
+
+        missing = [column for column in columns if column not in cached]
+        if missing:
+            discovered = self._discover(df, missing, max_values)
+            with self._lock:
+                for column, values in discovered.items():
+                    self._values[(source_key, column)] = (values, max_values)
+            cached.update(discovered)
+
+        return {column: cached[column] for column in columns}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+DISTINCT_VALUE_CACHE = DistinctValueCache()
+
+
+def pivot_standalone(
+    session: Session,
+    df: snowpark.DataFrame,
+    index: Union[str, list],
+    columns: str,
+    values: str,
+    aggfunc: str = "mean",
+    pivot_values: list = None,
+    fill_value=None,
+    max_columns: int = 100,
+    refresh: bool = False,
+    cache: DistinctValueCache = None,
+) -> snowpark.DataFrame:
+    """
+    Returns a pivoted dataframe, like pandas.pivot_table, executed as a native Snowflake PIVOT in one pass.
+    The pivot values are discovered with one query and cached per source and column (see DistinctValueCache).
+    Columns with more than max_columns distinct values warn and only pivot the max_columns most frequent values.
+
+    Parameters
+    ----------
+    session : Session
+        session object
+    df : snowpark.DataFrame
+        A snowpark dataframe to pivot
+    index : Union[str, list]
+        Column(s) to group by (the rows of the pivoted dataframe)
+    columns : str
+        Column whose values become the new columns
+    values : str
+        Column to aggregate
+    aggfunc : str, default 'mean'
+        sum, mean (avg), min, max or count
+    pivot_values : list, default None
+        the values to pivot, skips discovery
+    fill_value : default None
+        the value for missing combinations
+    max_columns : int, default 100
+        the maximum number of discovered pivot values
+    refresh : bool, default False
+        rediscover the pivot values instead of using the cache
+    cache : DistinctValueCache, default None
+        the cache to use, defaults to a process wide cache
+
+    Returns
+    -------
+    snowpark.DataFrame
+        A snowpark dataframe with the index columns and one column per pivot value
+
+    Example
+    -------
+        | >> schema = StructType([StructField("REGION", StringType()), StructField("PRODUCT", StringType()), StructField("SALES", IntegerType())])
+        | >> df = session.create_dataframe([['east', 'a', 1], ['east', 'b', 2], ['west', 'a', 3]], schema)
+        | >> pivot_df = session.pivot(df, "REGION", "PRODUCT", "SALES", aggfunc="sum")
+        | >> pivot_df.show()
+
+        | ---------------------------
+        | |"REGION"  |"a"  |"b"    |
+        | ---------------------------
+        | |east      |1    |2      |
+        | |west      |3    |NULL   |
+        | ---------------------------
+
+    """
+    if aggfunc not in PIVOT_AGGREGATIONS:
+        raise ValueError(f"aggfunc {aggfunc} not supported: supported aggregations: {list(PIVOT_AGGREGATIONS)}")
+
+    index = [index] if isinstance(index, str) else list(index)
+
+    if pivot_values is None:
+        cache = cache or DISTINCT_VALUE_CACHE
+        pivot_values = cache.get(df, [columns], max_columns, refresh=refresh)[columns]
+        if len(pivot_values) > max_columns:
+            warnings.warn(
+                f"{columns} has more than {max_columns} distinct values, "
+                f"only the {max_columns} most frequent values are pivoted (increase max_columns to pivot more)"
+            )
+            pivot_values = pivot_values[:max_columns]
+        pivot_values = _sorted_values(pivot_values)
+
+    if not pivot_values:
+        raise ValueError(f"{columns} has no values to pivot")
+
+    pivot_df = (
+        df.select([col(column) for column in index + [columns, values]])
+        .pivot(columns, pivot_values, default_on_null=fill_value)
+        .agg(PIVOT_AGGREGATIONS[aggfunc](col(values)))
+    )
+
+    # name the pivoted columns after the pivot values (like pandas)
+    pivot_columns = pivot_df.columns
+    pivot_df = pivot_df.select(
+        [col(column) for column in pivot_columns[:len(index)]]
+        + [
+            col(column).alias(_quote_identifier(str(value)))
+            for column, value in zip(pivot_columns[len(index):], pivot_values)
+        ]
+    )
+
+    return pivot_df
+
+
+### One hot encoding
+# category values json can't represent, serialized as {"type": ..., "value": ...}
+_JSON_VALUE_TYPES = {
+    "timestamp": (datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    "date": (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    "time": (datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    "decimal": (decimal.Decimal, str, decimal.Decimal),
+}
+
+
+def _to_json_value(value):
+    # timestamps are checked before dates (datetime is a subclass of date)
+    for type_name, (value_type, serialize, _) in _JSON_VALUE_TYPES.items():
+        if isinstance(value, value_type):
+            return {"type": type_name, "value": serialize(value)}
+    return value
+
+
+def _from_json_value(value):
+    if isinstance(value, dict) and value.get("type") in _JSON_VALUE_TYPES:
+        return _JSON_VALUE_TYPES[value["type"]][2](value["value"])
+    return value
+
+
+class DummyEncoder:
+    """
+    A one hot encoder fitted on a snowpark dataframe. The categories of all columns are discovered
+    with one batched query (see DistinctValueCache), and transform is a single scan
+    IFF(column = value, 1, 0) projection, so train and score runs produce identical columns
+    without re-querying the categories.
+
+    Parameters
+    ----------
+    columns : list
+        the categorical columns to encode
+    top_k : int, default None
+        only encode the top_k most frequent values of each column
+    other_category : str, default 'other'
+        with top_k, the name of the bucket column for values outside the top_k (None for no bucket)
+    prefix_sep : str, default '_'
+        the separator between the column name and the value in the dummy column names
+    drop_original : bool, default True
+        drop the encoded columns from the output
+    max_categories : int, default 100
+        without top_k, columns with more distinct values warn and only encode the most frequent values
+
+    Example
+    -------
+        | >> encoder = DummyEncoder(["COLOR", "SIZE"], top_k=10).fit(train_df)
+        | >> train_features_df = encoder.transform(train_df)
+        | >> score_features_df = encoder.transform(score_df)
+        | >> encoder.to_dict()  # persist the fitted categories (json serializable)
+    """
+
+    def __init__(
+        self,
+        columns: list,
+        top_k: int = None,
+        other_category: str = "other",
+        prefix_sep: str = "_",
+        drop_original: bool = True,
+        max_categories: int = 100,
+    ):
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        self.top_k = top_k
+        self.other_category = other_category
+        self.prefix_sep = prefix_sep
+        self.drop_original = drop_original
+        self.max_categories = max_categories
+        self.categories_: Dict[str, list] = None
+
+    def fit(
+        self,
+        df: snowpark.DataFrame,
+        refresh: bool = False,
+        cache: DistinctValueCache = None,
+    ):
+        """ discover the categories of every column with one query """
+        cache = cache or DISTINCT_VALUE_CACHE
+        max_values = self.top_k or self.max_categories
+        discovered = cache.get(df, self.columns, max_values, refresh=refresh)
+
+        self.categories_ = {}
+        for column, values in discovered.items():
+            if len(values) > max_values and not self.top_k:
+                warnings.warn(
+                    f"{column} has more than {max_values} distinct values, "
+                    f"only the {max_values} most frequent values are encoded (set top_k to bucket the rest)"
+                )
+            self.categories_[column] = _sorted_values(values[:max_values])
+
+        return self
+
+    @property
+    def feature_names(self) -> List[str]:
+        """ the dummy column names, in output order """
+        self._check_fitted()
+
+        feature_names = []
+        for column, values in self.categories_.items():
+            feature_names += [f"{column}{self.prefix_sep}{value}" for value in values]
+            if self.top_k and self.other_category is not None:
+                feature_names.append(f"{column}{self.prefix_sep}{self.other_category}")
+
+        return feature_names
+
+    def _check_fitted(self):
+        if self.categories_ is None:
+            raise ValueError("the encoder is not fitted: call fit first")
+
+    def transform(self, df: snowpark.DataFrame) -> snowpark.DataFrame:
+        """ one hot encode the columns with a single projection """
+        self._check_fitted()
+
+        encoded = set(df.select(self.columns).columns) if self.drop_original else set()
+        keep_cols = [col(name) for name in df.columns if name not in encoded]
+
+        dummy_cols = []
+        for column, values in self.categories_.items():
+            for value in values:
+                dummy_cols.append(
+                    iff(col(column) == lit(value), 1, 0).alias(_quote_identifier(f"{column}{self.prefix_sep}{value}"))
+                )
+            if self.top_k and self.other_category is not None:
+                other_name = _quote_identifier(f"{column}{self.prefix_sep}{self.other_category}")
+                if values:
+                    other_col = iff(col(column).is_null() | col(column).isin(values), 0, 1)
+                else:
+                    other_col = iff(col(column).is_null(), 0, 1)
+                dummy_cols.append(other_col.alias(other_name))
+
+        return df.select(keep_cols + dummy_cols)
+
+    def fit_transform(self, df: snowpark.DataFrame, refresh: bool = False) -> snowpark.DataFrame:
+        return self.fit(df, refresh=refresh).transform(df)
+
+    def to_dict(self) -> dict:
+        """ the fitted encoder as a json serializable dict (dates, timestamps and decimals are type tagged) """
+        self._check_fitted()
+
+        return {
+            "columns": self.columns,
+            "top_k": self.top_k,
+            "other_category": self.other_category,
+            "prefix_sep": self.prefix_sep,
+            "drop_original": self.drop_original,
+            "max_categories": self.max_categories,
+            "categories": {
+                column: [_to_json_value(value) for value in values] for column, values in self.categories_.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, encoder_dict: dict):
+        """ load a fitted encoder from to_dict """
+        encoder_dict = dict(encoder_dict)
+        categories = encoder_dict.pop("categories")
+        encoder = cls(**encoder_dict)
+        encoder.categories_ = {
+            column: [_from_json_value(value) for value in values] for column, values in categories.items()
+        }
+
+        return encoder
+
+
+def get_dummies_standalone(
+    session: Session,
+    df: snowpark.DataFrame,
+    columns: Union[str, list],
+    top_k: int = None,
+    other_category: str = "other",
+    prefix_sep: str = "_",
+    drop_original: bool = True,
+    max_categories: int = 100,
+) -> snowpark.DataFrame:
+    """
+    Returns a one hot encoded dataframe, like pandas.get_dummies, computed in Snowflake
+    with a single projection (see DummyEncoder to reuse the fitted categories).
+    Nulls are not a category (all dummy columns are 0), like pandas.
+
+    Parameters
+    ----------
+    session : Session
+        session object
+    df : snowpark.DataFrame
+        A snowpark dataframe to encode
+    columns : Union[str, list]
+        the categorical columns to encode
+    top_k : int, default None
+        only encode the top_k most frequent values of each column,
+        other values are bucketed into the other_category column
+    other_category : str, default 'other'
+        the name of the bucket column (None for no bucket)
+    prefix_sep : str, default '_'
+        the separator between the column name and the value
+    drop_original : bool, default True
+        drop the encoded columns from the output
+    max_categories : int, default 100
+        without top_k, the maximum number of encoded values per column
+
+    Returns
+    -------
+    snowpark.DataFrame
+        A snowpark dataframe with one 0 / 1 column per category
+
+    Example
+    -------
+        | >> schema = StructType([StructField("ID", IntegerType()), StructField("COLOR", StringType())])
+        | >> df = session.create_dataframe([[1, 'red'], [2, 'blue'], [3, None]], schema)
+        | >> session.get_dummies(df, ["COLOR"]).show()
+
+        | ----------------------------------------
+        | |"ID"  |"COLOR_blue"  |"COLOR_red"  |
+        | ----------------------------------------
+        | |1     |0             |1            |
+        | |2     |1             |0            |
+        | |3     |0             |0            |
+        | ----------------------------------------
+
+    """
+    encoder = DummyEncoder(columns, top_k, other_category, prefix_sep, drop_original, max_categories)
+
+    return encoder.fit_transform(df)
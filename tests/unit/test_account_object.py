@@ -3,6 +3,8 @@ from unittest import mock
 
 import pytest
 
+import pandas as pd
+
 
 from snowflake.snowpark import Session
 from ice_pick.account_object import (
@@ -22,3 +24,32 @@ def test_warehouse_init():
     assert warehouse.object_type == "warehouse"
     assert warehouse.session == Session_mock
 
+
+
+@mock.patch("ice_pick.account_object.snowpark_query")
+def test_warehouse_resize_sql_size(query_mock):
+    query_mock.return_value = pd.DataFrame({"status": ["Statement executed successfully."]})
+    warehouse = Warehouse(mock.create_autospec(Session), "COMPUTE_WH")
+
+    warehouse.resize("2X-Large")
+    assert "WAREHOUSE_SIZE = X2LARGE" in query_mock.call_args.args[1]
+
+    with pytest.raises(ValueError):
+        warehouse.resize("HUGE")
+
+
+@mock.patch("ice_pick.account_object.snowpark_query")
+def test_warehouse_get_settings_exact_name(query_mock):
+    query_mock.return_value = pd.DataFrame({
+        "name": ["ETLX1", "ETL_1"],
+        "size": ["Small", "2X-Large"],
+        "min_cluster_count": [1, 1],
+        "max_cluster_count": [1, 2],
+        "auto_suspend": [60, None],
+    })
+    warehouse = Warehouse(mock.create_autospec(Session), "ETL_1")
+
+    assert warehouse.get_settings() == {
+        "size": "2XLARGE", "min_cluster_count": 1, "max_cluster_count": 2, "auto_suspend": 0
+    }
+    assert "like 'ETL\\\\_1'" in query_mock.call_args.args[1]
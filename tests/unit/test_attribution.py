@@ -0,0 +1,68 @@
+import pytest
+
+import pandas as pd
+
+from ice_pick.attribution import attribute_credits, rollup_credits, normalize_query_text
+
+
+hour = pd.Timestamp("2023-01-01 00:00:00")
+
+metering_df = pd.DataFrame({
+    "WAREHOUSE_NAME": ["ETL_WH", "ETL_WH"],
+    "START_TIME": [hour, hour + pd.Timedelta(hours=1)],
+    "END_TIME": [hour + pd.Timedelta(hours=1), hour + pd.Timedelta(hours=2)],
+    "CREDITS_USED": [1.0, 2.0],
+})
+
+# q1 runs 00:30-00:45, q2 runs 00:50-01:10 (split across both hours), q3 runs 01:10-01:40
+query_df = pd.DataFrame({
+    "QUERY_ID": ["q1", "q2", "q3"],
+    "WAREHOUSE_NAME": "ETL_WH",
+    "END_TIME": [
+        hour + pd.Timedelta(minutes=45),
+        hour + pd.Timedelta(minutes=70),
+        hour + pd.Timedelta(minutes=100),
+    ],
+    "EXECUTION_TIME": [15 * 60_000, 20 * 60_000, 30 * 60_000],
+    "USER_NAME": ["ALICE", "BOB", "BOB"],
+    "QUERY_TEXT": ["select * from t where id = 1", "SELECT *  from t where id = 2", "insert into t values ('a')"],
+})
+
+
+def test_attribute_credits_execution_share():
+    attribution_df = attribute_credits(metering_df, query_df).set_index("QUERY_ID")
+
+    # hour 0: q1 15 min, q2 10 min. hour 1: q2 10 min, q3 30 min
+    assert attribution_df.loc["q1", "CREDITS"] == pytest.approx(1.0 * 15 / 25)
+    assert attribution_df.loc["q2", "CREDITS"] == pytest.approx(1.0 * 10 / 25 + 2.0 * 10 / 40)
+    assert attribution_df.loc["q3", "CREDITS"] == pytest.approx(2.0 * 30 / 40)
+    assert attribution_df["CREDITS"].sum() == pytest.approx(3.0)
+
+
+def test_attribute_credits_idle_allocation():
+    # an XSMALL warehouse bills 1 credit per hour: hour 0 was busy 25 of 60 billed minutes
+    sized_query_df = query_df.assign(WAREHOUSE_SIZE="X-Small")
+
+    attribution_df = attribute_credits(metering_df, sized_query_df, idle_allocation="none")
+    hour_0_df = attribution_df.set_index("QUERY_ID").loc[["q1"]]
+
+    assert hour_0_df["CREDITS_COMPUTE"].iloc[0] == pytest.approx(25 / 60 * 15 / 25)
+    assert attribution_df["CREDITS_IDLE"].sum() == 0
+
+    proportional_df = attribute_credits(metering_df, sized_query_df)
+    assert proportional_df["CREDITS"].sum() == pytest.approx(3.0)
+
+    with pytest.raises(ValueError):
+        attribute_credits(metering_df, query_df, idle_allocation="even")
+
+
+def test_rollup_credits():
+    attribution_df = attribute_credits(metering_df, query_df)
+
+    user_df = rollup_credits(attribution_df, "USER_NAME")
+    assert user_df.index.tolist() == ["BOB", "ALICE"]
+    assert user_df.loc["BOB", "QUERIES"] == 2
+
+    text_df = rollup_credits(attribution_df, "QUERY_TEXT")
+    assert text_df.loc["select * from t where id = ?", "QUERIES"] == 2
+    assert normalize_query_text(pd.Series(["insert into t values ('a')"]))[0] == "insert into t values (?)"
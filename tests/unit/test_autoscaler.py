@@ -0,0 +1,124 @@
+import pytest
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ice_pick.autoscaler import (
+    AutoscaleController,
+    AutoscalePolicy,
+    SimulatedWarehouse,
+    apply_action,
+    next_settings,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2023, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, minutes: int):
+        self.now += timedelta(minutes=minutes)
+
+
+def _recommendations(actions: dict) -> pd.DataFrame:
+    return pd.DataFrame({"action": actions}).rename_axis("WAREHOUSE_NAME")
+
+
+def test_next_settings_respects_policy_limits():
+    policy = AutoscalePolicy(min_size="SMALL", max_size="MEDIUM", max_clusters=2, min_auto_suspend=120)
+    settings = {"size": "Medium", "min_cluster_count": 1, "max_cluster_count": 2, "auto_suspend": 200}
+
+    assert next_settings(settings, "Size Up", policy)["size"] == "MEDIUM"
+    assert next_settings(settings, "Size Down", policy)["size"] == "SMALL"
+    assert next_settings(settings, "Scale Out", policy)["max_cluster_count"] == 2
+    assert next_settings(settings, "Reduce Auto Suspend", policy)["auto_suspend"] == 120
+
+    with pytest.raises(ValueError):
+        next_settings(settings, "Delete", policy)
+
+
+def test_next_settings_outside_policy_limits():
+    # warehouses already outside the policy limits are never moved against the action
+    policy = AutoscalePolicy()
+    xlarge = {"size": "X-Large", "min_cluster_count": 1, "max_cluster_count": 5, "auto_suspend": 30}
+
+    assert next_settings(xlarge, "Size Up", policy)["size"] == "XLARGE"
+    assert next_settings(xlarge, "Scale Out", policy)["max_cluster_count"] == 5
+    assert next_settings(xlarge, "Reduce Auto Suspend", policy)["auto_suspend"] == 30
+    assert next_settings(xlarge, "Size Down", policy)["size"] == "LARGE"
+    assert next_settings(xlarge, "Scale In", policy)["max_cluster_count"] == 4
+
+    small_policy = AutoscalePolicy(min_size="MEDIUM")
+    assert next_settings(dict(xlarge, size="XSMALL"), "Size Down", small_policy)["size"] == "XSMALL"
+
+    warehouse = SimulatedWarehouse("ETL_WH", size="2XLARGE")
+    assert apply_action(warehouse, "Size Up") == ""
+    assert warehouse.changes == []
+
+
+def test_controller_hysteresis_and_cooldown():
+    clock = FakeClock()
+    warehouse = SimulatedWarehouse("ETL_WH", size="SMALL")
+    policy = AutoscalePolicy(up_confirmations=2, cooldown=timedelta(hours=1))
+    controller = AutoscaleController([warehouse], policy=policy, dry_run=False, clock=clock)
+
+    size_up = _recommendations({"ETL_WH": "Size Up"})
+
+    statuses = []
+    for _ in range(4):
+        statuses.append(controller.step(size_up)["status"][0])
+        clock.advance(15)
+
+    assert statuses == ["hysteresis", "applied", "hysteresis", "cooldown"]
+    assert warehouse.settings["size"] == "MEDIUM"
+
+    clock.advance(60)
+    assert controller.step(size_up)["status"][0] == "applied"
+    assert warehouse.changes == [("size", "MEDIUM"), ("size", "LARGE")]
+
+
+def test_controller_budget_and_dry_run():
+    warehouses = [
+        SimulatedWarehouse("BI_WH", size="MEDIUM", max_cluster_count=1),
+        SimulatedWarehouse("ETL_WH", size="LARGE", auto_suspend=3600),
+    ]
+    policy = AutoscalePolicy(up_confirmations=1, down_confirmations=1)
+    recommendations_df = _recommendations({"BI_WH": "Scale Out", "ETL_WH": "Reduce Auto Suspend"})
+
+    controller = AutoscaleController(warehouses, policy=policy, budget_credits_per_hour=12, dry_run=False)
+    decisions_df = controller.step(recommendations_df).set_index("warehouse_name")
+
+    assert decisions_df.loc["BI_WH", "status"] == "budget"
+    assert decisions_df.loc["ETL_WH", "status"] == "applied"
+    assert warehouses[1].settings["auto_suspend"] == 1800
+
+    dry_run_controller = AutoscaleController(warehouses, policy=policy, dry_run=True)
+    decisions_df = dry_run_controller.step(recommendations_df)
+
+    assert decisions_df["status"].tolist() == ["dry_run", "dry_run"]
+    assert warehouses[0].changes == []
+
+
+def test_controller_scales_out_and_back_in():
+    clock = FakeClock()
+    warehouse = SimulatedWarehouse("ETL_WH", size="XLARGE", min_cluster_count=1, max_cluster_count=1)
+    policy = AutoscalePolicy(max_size="XLARGE", up_confirmations=1, down_confirmations=2, cooldown=timedelta(0))
+    controller = AutoscaleController([warehouse], policy=policy, dry_run=False, clock=clock)
+
+    for _ in range(2):
+        controller.step(_recommendations({"ETL_WH": "Scale Out"}))
+    assert warehouse.settings["max_cluster_count"] == 3
+
+    # overnight: the idle clusters are removed one step at a time, down to the policy minimum
+    statuses = [controller.step(_recommendations({"ETL_WH": "Scale In"}))["status"][0] for _ in range(6)]
+    assert statuses == ["hysteresis", "applied", "hysteresis", "applied", "hysteresis", "at_limit"]
+    assert warehouse.changes == [("clusters", (1, 2)), ("clusters", (1, 3)), ("clusters", (1, 2)), ("clusters", (1, 1))]
+
+    # min_cluster_count is lowered with max_cluster_count
+    maximized = {"size": "XLARGE", "min_cluster_count": 3, "max_cluster_count": 3, "auto_suspend": 60}
+    assert next_settings(maximized, "Scale In", policy)["min_cluster_count"] == 2
+    assert next_settings(maximized, "Scale In", AutoscalePolicy(min_clusters=3))["max_cluster_count"] == 3
@@ -0,0 +1,78 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from ice_pick.deploy import (
+    FakeSession,
+    PROCEDURES,
+    deploy_procedures,
+    run_procedure_locally,
+)
+
+
+databases_df = pd.DataFrame({"name": ["TEST", "SNOWFLAKE"]})
+schemas_df = pd.DataFrame({"database_name": ["TEST", "TEST"], "name": ["SCHEMA_1", "INFORMATION_SCHEMA"]})
+tables_df = pd.DataFrame({
+    "database_name": ["TEST", "TEST"],
+    "schema_name": ["SCHEMA_1", "INFORMATION_SCHEMA"],
+    "name": ["CUSTOMER", "TABLES"],
+})
+
+
+def fake_session():
+    return FakeSession({
+        r"show databases": databases_df,
+        r"show schemas": schemas_df,
+        r"show TABLES": tables_df,
+        r"get_ddl": pd.DataFrame({
+            "DDL": ["create or replace table CUSTOMER (ID NUMBER);"], "LAST_ALTERED": [pd.Timestamp("2024-01-01")],
+        }),
+        r"grants_to_roles": pd.DataFrame({
+            "PRIVILEGE": ["SELECT"], "GRANTED_ON": ["TABLE"], "NAME": ["CUSTOMER"], "TABLE_CATALOG": ["TEST"],
+            "TABLE_SCHEMA": ["SCHEMA_1"], "GRANTED_TO": ["ROLE"], "GRANTEE_NAME": ["ANALYST"],
+            "GRANT_OPTION": [False],
+        }),
+    })
+
+
+def test_export_ddl_procedure_locally():
+    session = fake_session()
+
+    ddl_df = run_procedure_locally("ice_pick_export_ddl", session, ["TEST"], [".*"], [".*"], ["table"])
+
+    assert ddl_df[["DATABASE_NAME", "SCHEMA_NAME", "OBJECT_NAME"]].values.tolist() == [["TEST", "SCHEMA_1", "CUSTOMER"]]
+    assert ddl_df["DDL"].iloc[0].startswith("create or replace table")
+    assert any("get_ddl('TABLE'" in query for query in session.queries)
+
+
+def test_grant_audit_procedure_locally():
+    grants_df = run_procedure_locally("ICE_PICK_GRANT_AUDIT", fake_session(), ["TEST"])
+
+    assert grants_df["NAME"].tolist() == ["TEST.SCHEMA_1.CUSTOMER"]
+    assert grants_df["GRANT_OPTION"].tolist() == ["False"]
+
+    with pytest.raises(ValueError):
+        run_procedure_locally("ICE_PICK_GRANT_AUDIT", fake_session())
+    # the input type is ARRAY(STRING), not STRING
+    with pytest.raises(ValueError):
+        run_procedure_locally("ICE_PICK_GRANT_AUDIT", fake_session(), "TEST")
+    with pytest.raises(ValueError):
+        run_procedure_locally("ICE_PICK_RECOMMEND_WAREHOUSES", fake_session(), "24")
+    with pytest.raises(ValueError):
+        FakeSession().sql("show databases")
+
+
+def test_deploy_procedures():
+    session = mock.MagicMock()
+
+    deployed = deploy_procedures(session, "@ICE_PICK_STAGE", database="ADMIN", schema="TOOLS")
+
+    assert deployed == [f"ADMIN.TOOLS.{name}" for name in PROCEDURES]
+    register_kwargs = session.sproc.register.call_args.kwargs
+    assert register_kwargs["imports"][0][1] == "ice_pick"
+    assert register_kwargs["is_permanent"] and register_kwargs["execute_as"] == "caller"
+
+    with pytest.raises(ValueError):
+        deploy_procedures(session, "@ICE_PICK_STAGE", names=["NOT_A_PROCEDURE"])
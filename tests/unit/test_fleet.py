@@ -0,0 +1,118 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.account_object import Warehouse, Role
+from ice_pick.fleet import WarehouseFleet
+
+
+def test_fleet_from_objects():
+    Session_mock = mock.create_autospec(Session)
+    objects = [Warehouse(Session_mock, "COMPUTE_WH"), Role(Session_mock, "ANALYST"), Warehouse(Session_mock, "ETL_WH")]
+
+    fleet = WarehouseFleet.from_objects(Session_mock, objects)
+
+    assert fleet.warehouse_names == ["COMPUTE_WH", "ETL_WH"]
+
+
+def test_fleet_load_history_single_query():
+    Session_mock = mock.create_autospec(Session)
+    load_df = pd.DataFrame({
+        "START_TIME": pd.to_datetime(["2023-01-01 01:00", "2023-01-01 00:00", "2023-01-01 00:00"]),
+        "WAREHOUSE_NAME": ["ETL_WH", "ETL_WH", "COMPUTE_WH"],
+        "AVG_RUNNING": [1.0, 0.5, 0.2],
+    })
+    fleet = WarehouseFleet(Session_mock, ["COMPUTE_WH", "ETL_WH"])
+
+    with mock.patch("ice_pick.fleet.snowpark_query", return_value=load_df) as query_mock:
+        history_df = fleet.load_history(12, 0)
+
+    query_mock.assert_called_once()
+    assert "in ('COMPUTE_WH', 'ETL_WH')" in query_mock.call_args[0][1]
+    assert history_df.loc["ETL_WH"]["AVG_RUNNING"].tolist() == [0.5, 1.0]
+
+    with pytest.raises(ValueError):
+        fleet.metering_history(12, 0, source="unknown")
+
+
+def test_fleet_warehouse_filter_sql():
+    Session_mock = mock.create_autospec(Session)
+
+    empty_fleet = WarehouseFleet.from_objects(Session_mock, [Role(Session_mock, "ANALYST")])
+    assert empty_fleet.warehouse_names == []
+    assert "in ()" not in empty_fleet._warehouse_filter_sql()
+    assert empty_fleet._warehouse_filter_sql().strip() == "and false"
+
+    quoted_fleet = WarehouseFleet(Session_mock, ["O'BRIEN_WH"])
+    assert "in ('O''BRIEN_WH')" in quoted_fleet._warehouse_filter_sql()
+
+
+def test_fleet_bulk_operation_status():
+    Session_mock = mock.create_autospec(Session)
+    fleet = WarehouseFleet(Session_mock, ["COMPUTE_WH", "ETL_WH", "MISSING_WH"])
+
+    def query(session, sql, non_select=False):
+        if "MISSING_WH" in sql:
+            raise Exception("Object does not exist")
+        return pd.DataFrame({"status": ["Statement executed successfully."]})
+
+    with mock.patch("ice_pick.account_object.snowpark_query", side_effect=query) as query_mock:
+        status_df = fleet.suspend(max_workers=2)
+
+    assert query_mock.call_count == 3
+    assert status_df.set_index("WAREHOUSE_NAME")["STATUS"].to_dict() == {
+        "COMPUTE_WH": "success", "ETL_WH": "success", "MISSING_WH": "error"
+    }
+
+    with pytest.raises(ValueError):
+        fleet.resize("HUGE")
+
+
+def test_fleet_snapshot_restore():
+    Session_mock = mock.create_autospec(Session)
+    fleet = WarehouseFleet(Session_mock, ["COMPUTE_WH", "ETL_WH"])
+
+    def show_warehouses(sizes, states):
+        return pd.DataFrame({
+            "name": ["COMPUTE_WH", "ETL_WH", "OTHER_WH"],
+            "state": states,
+            "size": sizes,
+            "min_cluster_count": [1, 1, 1],
+            "max_cluster_count": [1, 2, 1],
+            "auto_suspend": [60, 600, None],
+        })
+
+    with mock.patch("ice_pick.fleet.snowpark_query", return_value=show_warehouses(
+        ["X-Small", "Large", "Small"], ["SUSPENDED", "STARTED", "STARTED"]
+    )):
+        snapshot_df = fleet.snapshot()
+
+    assert snapshot_df.index.tolist() == ["COMPUTE_WH", "ETL_WH"]
+    assert snapshot_df.loc["ETL_WH", "size"] == "LARGE"
+
+    alter_df = pd.DataFrame({"status": ["Statement executed successfully."]})
+    with mock.patch("ice_pick.fleet.snowpark_query", side_effect=[
+        show_warehouses(["X-Small", "X-Large", "Small"], ["SUSPENDED", "SUSPENDED", "STARTED"]), alter_df
+    ]) as query_mock, mock.patch("ice_pick.account_object.snowpark_query", return_value=alter_df) as resume_mock:
+        status_df = fleet.restore(snapshot_df)
+
+    assert status_df["WAREHOUSE_NAME"].tolist() == ["ETL_WH"]
+    assert "WAREHOUSE_SIZE = LARGE" in query_mock.call_args_list[1][0][1]
+    assert "resume" in resume_mock.call_args[0][1]
+
+    # sizes from 2X-Large up are restored with their SQL names
+    with mock.patch("ice_pick.fleet.snowpark_query", return_value=show_warehouses(
+        ["2X-Large", "Large", "Small"], ["SUSPENDED", "STARTED", "STARTED"]
+    )):
+        large_snapshot_df = fleet.snapshot()
+
+    assert large_snapshot_df.loc["COMPUTE_WH", "size"] == "2XLARGE"
+    with mock.patch("ice_pick.fleet.snowpark_query", side_effect=[
+        show_warehouses(["X-Small", "Large", "Small"], ["SUSPENDED", "STARTED", "STARTED"]), alter_df
+    ]) as query_mock:
+        fleet.restore(large_snapshot_df)
+
+    assert "WAREHOUSE_SIZE = X2LARGE" in query_mock.call_args_list[1][0][1]
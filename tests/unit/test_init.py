@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+import pytest
+
+import ice_pick
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, ice_pick; "
+        "print(any(m in sys.modules for m in ['snowflake.snowpark', 'pandas', 'numpy', 'ice_pick.utils']))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "False"
+
+
+def test_lazy_attributes():
+    from ice_pick.account_object import Warehouse
+
+    assert ice_pick.Warehouse is Warehouse
+    assert set(ice_pick.__all__) == set(ice_pick._LAZY_ATTRIBUTES)
+    assert ice_pick.statistics.__name__ == "ice_pick.statistics"
+    assert "WhatIfSimulator" in dir(ice_pick)
+
+    with pytest.raises(AttributeError):
+        ice_pick.not_an_attribute
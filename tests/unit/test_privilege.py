@@ -0,0 +1,142 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.account_object import User
+from ice_pick.schema_object import SchemaObject
+from ice_pick.privileges import PrivilegeIndex, FutureGrantIndex, get_grants_bulk
+
+
+def _show_grants_df(rows):
+    return pd.DataFrame(rows, columns=["privilege", "granted_on", "name", "grantee_name"])
+
+
+role_grants = {
+    "ANALYST": _show_grants_df([
+        ["USAGE", "DATABASE", "TEST", "ANALYST"],
+        ["USAGE", "SCHEMA", "TEST.SCHEMA_1", "ANALYST"],
+        ["SELECT", "TABLE", "TEST.SCHEMA_1.CUSTOMER", "ANALYST"],
+        ["USAGE", "ROLE", "READER", "ANALYST"],
+    ]),
+    "READER": _show_grants_df([
+        ["SELECT", "VIEW", "TEST.SCHEMA_2.ORDERS", "READER"],
+        ["USAGE", "ROLE", "ANALYST", "READER"],
+    ]),
+    "PUBLIC": _show_grants_df([]),
+}
+
+
+def _fake_query(session, sql, non_select=False):
+    if "to user" in sql:
+        return pd.DataFrame({"role": ["ANALYST"]})
+    role = sql.split("to role")[-1].strip()
+    return role_grants[role]
+
+
+def test_privilege_index_lookup():
+    index = PrivilegeIndex(role_grants["ANALYST"])
+
+    assert index.lookup("TABLE", 'TEST."SCHEMA_1".CUSTOMER') == {"SELECT"}
+    assert index.lookup("TABLE", "TEST.SCHEMA_1.ORDERS") == set()
+    assert index.has_usage("SCHEMA", "TEST.SCHEMA_1")
+
+
+def test_user_check_privileges_crawls_once():
+    Session_mock = mock.create_autospec(Session)
+    user = User(Session_mock, "USER1")
+    objects = [
+        SchemaObject(Session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE"),
+        SchemaObject(Session_mock, "TEST", "SCHEMA_2", "ORDERS", "VIEW"),
+        SchemaObject(Session_mock, "TEST", "SCHEMA_1", "PRODUCTS", "TABLE"),
+    ]
+
+    with mock.patch("ice_pick.account_object.snowpark_query", side_effect=_fake_query) as query_mock:
+        privileges_df = user.check_privileges(objects)
+        assert user.check_privilege(objects[0]) == ["SELECT"]
+
+    # user + ANALYST, PUBLIC + READER (the ANALYST <-> READER cycle is only crawled once)
+    assert query_mock.call_count == 4
+    assert privileges_df["privileges"].tolist() == [["SELECT"], ["SELECT"], []]
+    assert privileges_df["usable"].tolist() == [True, False, False]
+
+
+def test_user_privilege_index_predicts_for_roles_without_grants():
+    Session_mock = mock.create_autospec(Session)
+    user = User(Session_mock, "USER1")
+    # PUBLIC has no current grants, only a future grant
+    future_index = FutureGrantIndex(pd.DataFrame(
+        [["TEST", "SCHEMA_1", "TABLE", "SELECT", "PUBLIC"]],
+        columns=["database", "schema", "grant_on", "privilege", "grantee_name"],
+    ))
+
+    with mock.patch("ice_pick.account_object.snowpark_query", side_effect=_fake_query):
+        index = user.privilege_index(future_index=future_index)
+
+    assert index.roles == {"ANALYST", "READER", "PUBLIC"}
+    assert index.predict_privileges("TEST", "SCHEMA_1", "TABLE") == {"SELECT"}
+
+
+def test_get_grants_bulk_groups_by_object():
+    Session_mock = mock.create_autospec(Session)
+    objects = [
+        SchemaObject(Session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE"),
+        SchemaObject(Session_mock, "TEST", "SCHEMA_1", "PRODUCTS", "TABLE"),
+        SchemaObject(Session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "STREAM"),
+    ]
+    account_grants_df = pd.DataFrame(
+        [
+            ["SELECT", "TABLE", "TEST.SCHEMA_1.CUSTOMER", "ANALYST"],
+            ["INSERT", "TABLE", "TEST.SCHEMA_1.CUSTOMER", "LOADER"],
+            ["SELECT", "TABLE", "TEST.SCHEMA_1.ORDERS", "ANALYST"],
+            ["SELECT", "STREAM", "TEST.SCHEMA_1.CUSTOMER", "READER"],
+        ],
+        columns=["privilege", "granted_on", "name", "grantee_name"],
+    )
+
+    with mock.patch("ice_pick.privileges.get_account_grants", return_value=account_grants_df) as grants_mock:
+        grants = get_grants_bulk(Session_mock, objects)
+
+    grants_mock.assert_called_once_with(Session_mock, ["TEST"])
+    assert list(grants) == [
+        ("TABLE", "TEST.SCHEMA_1.CUSTOMER"), ("TABLE", "TEST.SCHEMA_1.PRODUCTS"), ("STREAM", "TEST.SCHEMA_1.CUSTOMER")
+    ]
+    # a table and a stream with the same name are kept apart
+    assert grants[("TABLE", "TEST.SCHEMA_1.CUSTOMER")]["grantee_name"].tolist() == ["ANALYST", "LOADER"]
+    assert grants[("STREAM", "TEST.SCHEMA_1.CUSTOMER")]["grantee_name"].tolist() == ["READER"]
+    assert grants[("TABLE", "TEST.SCHEMA_1.PRODUCTS")].empty
+
+
+def test_future_grants_schema_level_takes_precedence():
+    Session_mock = mock.create_autospec(Session)
+    show_results = {
+        "show databases": pd.DataFrame({"name": ["TEST"]}),
+        "show schemas": pd.DataFrame({"database_name": ["TEST", "TEST"], "name": ["SCHEMA_1", "SCHEMA_2"]}),
+        'in database "TEST"': pd.DataFrame(
+            [["SELECT", "TABLE", "TEST.<TABLE>", "READER"]],
+            columns=["privilege", "grant_on", "name", "grantee_name"],
+        ),
+        'in schema "TEST"."SCHEMA_1"': pd.DataFrame(
+            [["INSERT", "TABLE", "TEST.SCHEMA_1.<TABLE>", "ANALYST"]],
+            columns=["privilege", "grant_on", "name", "grantee_name"],
+        ),
+        'in schema "TEST"."SCHEMA_2"': pd.DataFrame(),
+    }
+
+    def _fake_show(session, sql, non_select=False):
+        return next(df for key, df in show_results.items() if key in sql)
+
+    with mock.patch("ice_pick.privileges.snowpark_query", side_effect=_fake_show):
+        future_index = FutureGrantIndex.from_session(Session_mock)
+
+    assert future_index.resolve("TEST", "SCHEMA_1", "TABLE") == {("INSERT", "ANALYST")}
+    assert future_index.resolve("TEST", "SCHEMA_2", "TABLE") == {("SELECT", "READER")}
+    assert future_index.resolve("TEST", "SCHEMA_2", "VIEW") == set()
+
+    privilege_index = PrivilegeIndex(role_grants["ANALYST"], future_index)
+    objects = [SchemaObject(Session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE")]
+
+    assert privilege_index.predict_privileges("TEST", "SCHEMA_1", "TABLE") == {"INSERT"}
+    assert privilege_index.check_privileges(objects)["future_privileges"].tolist() == [["INSERT"]]
@@ -0,0 +1,101 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.query_history import QueryHistorySync, OperatorStatsCache
+from ice_pick.account_object import Warehouse
+
+
+now = pd.Timestamp.now(tz="UTC").tz_localize(None).floor("min")
+
+# 50 queries in the last 10 hours
+recorded_df = pd.DataFrame({
+    "QUERY_ID": [f"q{i}" for i in range(50)],
+    "START_TIME": [now - pd.Timedelta(minutes=12 * i + 1) for i in range(50)],
+    "END_TIME": [now - pd.Timedelta(minutes=12 * i) for i in range(50)],
+    "EXECUTION_TIME": range(50),
+})
+
+
+def _fake_fetch_window(history_sync, start, end):
+    in_window = (recorded_df["END_TIME"] >= start) & (recorded_df["END_TIME"] < end)
+    return recorded_df[in_window].head(history_sync.result_limit)
+
+
+@pytest.mark.parametrize("storage", ["sqlite", "parquet"])
+def test_sync_pages_past_result_limit_and_is_incremental(tmp_path, storage):
+    if storage == "parquet":
+        pytest.importorskip("pyarrow")
+
+    Session_mock = mock.create_autospec(Session)
+    path = tmp_path / ("history.db" if storage == "sqlite" else "history")
+    history_sync = QueryHistorySync(Session_mock, "COMPUTE_WH", path=str(path), storage=storage, result_limit=10)
+
+    with mock.patch.object(QueryHistorySync, "_fetch_window", _fake_fetch_window):
+        first_df = history_sync.sync(lookback_hours=12)
+        second_df = history_sync.sync()
+
+    stored_df = history_sync.load()
+
+    assert len(first_df) == 50
+    # only the queries at the high water mark are fetched again
+    assert len(second_df) == 1
+    assert sorted(stored_df["QUERY_ID"]) == sorted(recorded_df["QUERY_ID"])
+    assert history_sync.high_water_mark() == now
+
+
+def _fake_operator_stats(session, sql, non_select=False):
+    query_ids = [part.split("'")[1] for part in sql.split(" union all ")]
+    return pd.DataFrame({
+        "QUERY_ID": query_ids,
+        "OPERATOR_ID": [0] * len(query_ids),
+        "LOCAL_DISK": [0.5] * len(query_ids),
+    })
+
+
+def test_operator_stats_cache_only_fetches_missing(tmp_path):
+    Session_mock = mock.create_autospec(Session)
+    path = str(tmp_path / "operator_stats.db")
+    stats_cache = OperatorStatsCache(path)
+
+    with mock.patch("ice_pick.query_history.snowpark_query", side_effect=_fake_operator_stats) as query_mock:
+        first_df = stats_cache.get(Session_mock, [f"q{i}" for i in range(60)], batch_size=25)
+        assert query_mock.call_count == 3
+
+        second_df = stats_cache.get(Session_mock, ["q0", "q1", "q60"])
+        assert query_mock.call_count == 4
+        assert "'q60'" in query_mock.call_args[0][1] and "'q0'" not in query_mock.call_args[0][1]
+
+        # a new cache instance reads the persisted stats
+        persisted_df = OperatorStatsCache(path).get(Session_mock, ["q0", "q60"])
+        assert query_mock.call_count == 4
+
+    assert len(first_df) == 60
+    assert second_df["QUERY_ID"].tolist() == ["q0", "q1", "q60"]
+    assert persisted_df["LOCAL_DISK"].tolist() == [0.5, 0.5]
+
+
+def test_resize_recommendation_uses_cache():
+    Session_mock = mock.create_autospec(Session)
+    query_df = pd.DataFrame({
+        "QUERY_ID": [f"q{i}" for i in range(20)],
+        "WAREHOUSE_SIZE": ["X-Small"] * 20,
+        "EXECUTION_TIME": range(20),
+        "QUEUED_OVERLOAD_TIME": [0] * 20,
+        "EXECUTION_STATUS": ["SUCCESS"] * 19 + ["RUNNING"],
+    })
+    stats_cache = OperatorStatsCache()
+
+    with mock.patch("ice_pick.query_history.snowpark_query", side_effect=_fake_operator_stats) as query_mock:
+        recommendation = Warehouse(Session_mock, "COMPUTE_WH").resize_recommendation(
+            top_n=10, query_df=query_df, operator_stats_cache=stats_cache
+        )
+
+    assert recommendation == "Size Up"
+    assert query_mock.call_count == 1
+    # the stats of the running query are incomplete, so they are not cached
+    assert len(stats_cache) == 9
+    assert "q19" not in stats_cache
@@ -0,0 +1,91 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from ice_pick.recommendations import (
+    RecommendationEngine,
+    Rule,
+    align_telemetry,
+    rolling_percentile,
+)
+
+
+periods = pd.date_range("2023-01-01", periods=48, freq="h")
+
+
+def _load_df(warehouse, running, queued):
+    return pd.DataFrame({
+        "WAREHOUSE_NAME": warehouse,
+        "START_TIME": periods,
+        "AVG_RUNNING": running,
+        "AVG_QUEUED_LOAD": queued,
+    })
+
+
+load_df = pd.concat([
+    _load_df("BUSY_WH", 3.0, 2.0),
+    _load_df("QUIET_WH", 0.1, 0.0),
+    _load_df("IDLE_WH", 0.0, 0.0),
+]).set_index(["WAREHOUSE_NAME", "START_TIME"])
+
+metering_df = pd.DataFrame({
+    "WAREHOUSE_NAME": ["BUSY_WH"] * 48 + ["QUIET_WH"] * 48 + ["IDLE_WH"] * 48,
+    "START_TIME": list(periods) * 3,
+    "CREDITS_USED": 1.0,
+})
+
+query_df = pd.DataFrame({
+    "WAREHOUSE_NAME": ["BUSY_WH", "QUIET_WH"],
+    "START_TIME": [periods[-1], periods[-1]],
+    "BYTES_SPILLED_TO_LOCAL_STORAGE": [0, 0],
+    "BYTES_SPILLED_TO_REMOTE_STORAGE": [0, 0],
+    "QUEUED_OVERLOAD_TIME": [0, 0],
+})
+
+
+def test_align_telemetry_shapes():
+    telemetry = align_telemetry(load_df, metering_df, query_df)
+
+    assert telemetry.warehouses == ["BUSY_WH", "IDLE_WH", "QUIET_WH"]
+    assert telemetry["running"].shape == (3, 48)
+    assert telemetry["queries"].sum() == 2
+
+
+def test_rolling_percentile_matches_pandas():
+    values = np.random.default_rng(0).random((4, 30))
+
+    rolling = rolling_percentile(values, 6, 95)
+    expected = pd.DataFrame(values.T).rolling(6).quantile(0.95).to_numpy().T
+
+    np.testing.assert_allclose(rolling, expected)
+
+
+def test_recommend_fleet_with_custom_rules():
+    telemetry = align_telemetry(load_df, metering_df, query_df)
+
+    recommendations_df = RecommendationEngine(window=24).recommend(telemetry)
+
+    assert recommendations_df["action"].to_dict() == {
+        "BUSY_WH": "Scale Out",
+        "IDLE_WH": "Reduce Auto Suspend",
+        "QUIET_WH": "Size Down",
+    }
+    assert recommendations_df.loc["IDLE_WH", "idle_credit_fraction"] == 1.0
+
+    # multi cluster warehouses without queueing or load scale in first
+    settings_df = pd.DataFrame(
+        {"min_cluster_count": [2], "max_cluster_count": [3]}, index=pd.Index(["QUIET_WH"], name="WAREHOUSE_NAME")
+    )
+    clustered_df = RecommendationEngine(window=24).recommend(telemetry, settings_df)
+    assert clustered_df["action"].to_dict() == {
+        "BUSY_WH": "Scale Out",
+        "IDLE_WH": "Reduce Auto Suspend",
+        "QUIET_WH": "Scale In",
+    }
+    assert clustered_df["max_cluster_count"].tolist() == [1, 1, 3]
+
+    busy_rule = Rule("busy", "Size Up", lambda f: f["running_p50"] > 2)
+    custom_df = RecommendationEngine(rules=[busy_rule]).recommend(telemetry)
+
+    assert custom_df["action"].tolist() == ["Size Up", "No Change", "No Change"]
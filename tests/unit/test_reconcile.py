@@ -0,0 +1,148 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.reconcile import (
+    GrantReconciler,
+    diff_grants,
+    expand_desired_state,
+)
+from ice_pick.privileges import get_account_grants
+from ice_pick.account_object import Role, Warehouse
+from ice_pick.extension import create_schema_object
+from ice_pick.registry import get_registry
+
+
+desired_state = {
+    "roles": {
+        "ANALYST": [
+            {"on": "TABLE", "objects": ["TEST.SCHEMA_1.CUSTOMER"], "privileges": ["SELECT", "INSERT"]},
+        ]
+    }
+}
+
+
+def _grants_df(rows):
+    return pd.DataFrame(rows, columns=["granted_on", "name", "grantee_name", "privilege"])
+
+
+def test_diff_grants_minimal_plan():
+    current_df = _grants_df([
+        ("TABLE", "TEST.SCHEMA_1.CUSTOMER", "ANALYST", "SELECT"),
+        ("TABLE", "TEST.SCHEMA_1.ORDERS", "ANALYST", "SELECT"),
+        ("TABLE", "TEST.SCHEMA_1.ORDERS", "ANALYST", "OWNERSHIP"),
+        ("TABLE", "TEST.SCHEMA_1.ORDERS", "LOADER", "INSERT"),
+        ("WAREHOUSE", "COMPUTE_WH", "ANALYST", "USAGE"),
+    ])
+
+    plan = diff_grants(current_df, expand_desired_state(desired_state))
+
+    assert plan.grants.values.tolist() == [["TABLE", "TEST.SCHEMA_1.CUSTOMER", "ROLE", "ANALYST", "INSERT"]]
+    # ownership, other roles and undeclared object types are left alone
+    assert plan.revokes.values.tolist() == [["TABLE", "TEST.SCHEMA_1.ORDERS", "ROLE", "ANALYST", "SELECT"]]
+    assert plan.to_sql() == [
+        'revoke SELECT on TABLE "TEST"."SCHEMA_1"."ORDERS" from role ANALYST',
+        "grant INSERT on TABLE TEST.SCHEMA_1.CUSTOMER to role ANALYST",
+    ]
+
+
+def test_diff_grants_underscores_only_normalized_in_privileges():
+    current_df = _grants_df([
+        ("MATERIALIZED_VIEW", "TEST.SCHEMA_1.CUSTOMER_MV", "ETL ROLE", "SELECT"),
+        ("SCHEMA", "TEST.SCHEMA_1", "ETL_ROLE", "CREATE_TABLE"),
+    ])
+    desired_df = _grants_df([
+        ("MATERIALIZED VIEW", "TEST.SCHEMA_1.CUSTOMER_MV", "ETL_ROLE", "SELECT"),
+        ("SCHEMA", "TEST.SCHEMA_1", "ETL_ROLE", "CREATE TABLE"),
+    ])
+
+    plan = diff_grants(current_df, desired_df)
+
+    # the grant to ETL_ROLE is not satisfied by the grant to "ETL ROLE"
+    assert plan.grants["grantee_name"].tolist() == ["ETL_ROLE"]
+    assert plan.grants["name"].tolist() == ["TEST.SCHEMA_1.CUSTOMER_MV"]
+
+
+def test_diff_grants_database_roles():
+    current_df = pd.DataFrame(
+        [
+            ("SCHEMA", "TEST.SCHEMA_1", "DATABASE_ROLE", "TEST.READER", "USAGE"),
+            ("SCHEMA", "TEST.SCHEMA_2", "DATABASE_ROLE", "TEST.READER", "USAGE"),
+            ("SCHEMA", "TEST.SCHEMA_2", "ROLE", "READER", "USAGE"),
+        ],
+        columns=["granted_on", "name", "granted_to", "grantee_name", "privilege"],
+    )
+    desired = {
+        "database_roles": {
+            "TEST.READER": [{"on": "SCHEMA", "objects": ["TEST.SCHEMA_1"], "privileges": ["USAGE"]}]
+        }
+    }
+
+    plan = diff_grants(current_df, expand_desired_state(desired))
+
+    # the account role READER is outside the managed scope
+    assert plan.grants.empty
+    assert plan.to_sql() == ['revoke USAGE on SCHEMA "TEST"."SCHEMA_2" from database role TEST.READER']
+
+
+def test_expand_desired_state_rejects_all_privileges():
+    desired = {"roles": {"ANALYST": [{"on": "TABLE", "objects": ["TEST.SCHEMA_1.CUSTOMER"], "privileges": "ALL"}]}}
+
+    with pytest.raises(ValueError):
+        expand_desired_state(desired)
+
+
+def test_plan_dry_run_does_not_execute():
+    Session_mock = mock.create_autospec(Session)
+    current_df = _grants_df([])
+
+    with mock.patch("ice_pick.reconcile.snowpark_query") as query_mock:
+        plan = GrantReconciler(Session_mock, desired_state).plan(current_df)
+        statements = plan.apply(Session_mock, dry_run=True)
+
+    assert statements == ["grant INSERT, SELECT on TABLE TEST.SCHEMA_1.CUSTOMER to role ANALYST"]
+    query_mock.assert_not_called()
+
+
+def test_plan_apply_invalidates_memoized_grants():
+    Session_mock = mock.create_autospec(Session)
+    registry = get_registry(Session_mock)
+    role = registry.get(Role, Session_mock, "ANALYST")
+    table_obj = create_schema_object(Session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "table")
+    other_warehouse = registry.get(Warehouse, Session_mock, "COMPUTE_WH")
+    for obj in (role, table_obj, other_warehouse):
+        obj._metadata.put("grants_on", pd.DataFrame())
+
+    with mock.patch("ice_pick.reconcile.snowpark_query") as query_mock:
+        GrantReconciler(Session_mock, desired_state).plan(_grants_df([])).apply(Session_mock, dry_run=False)
+
+    query_mock.assert_called_once()
+    assert len(role._metadata) == 0
+    assert len(table_obj._metadata) == 0
+    assert len(other_warehouse._metadata) == 1
+
+
+def test_get_account_grants_qualifies_names():
+    Session_mock = mock.create_autospec(Session)
+    usage_df = pd.DataFrame(
+        [
+            ["SELECT", "TABLE", "CUSTOMER", "TEST", "SCHEMA_1", "ROLE", "ANALYST", "false"],
+            ["USAGE", "SCHEMA", "SCHEMA_1", "TEST", None, "ROLE", "ANALYST", "false"],
+            ["USAGE", "DATABASE", "TEST", "TEST", None, "ROLE", "ANALYST", "false"],
+            ["USAGE", "FILE_FORMAT", "CSV", "TEST", "SCHEMA_1", "ROLE", "ANALYST", "false"],
+            ["USAGE", "WAREHOUSE", "COMPUTE_WH", None, None, "ROLE", "ANALYST", "false"],
+        ],
+        columns=["PRIVILEGE", "GRANTED_ON", "NAME", "TABLE_CATALOG", "TABLE_SCHEMA",
+                 "GRANTED_TO", "GRANTEE_NAME", "GRANT_OPTION"],
+    )
+
+    with mock.patch("ice_pick.privileges.snowpark_query", return_value=usage_df):
+        grants_df = get_account_grants(Session_mock)
+
+    assert grants_df["name"].tolist() == [
+        "TEST.SCHEMA_1.CUSTOMER", "TEST.SCHEMA_1", "TEST", "TEST.SCHEMA_1.CSV", "COMPUTE_WH"
+    ]
+    assert grants_df["granted_on"].tolist()[3] == "FILE FORMAT"
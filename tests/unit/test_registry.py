@@ -0,0 +1,83 @@
+from unittest import mock
+import gc
+import weakref
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.account_object import Role, User, Warehouse
+from ice_pick.extension import create_role, create_schema_object
+from ice_pick.registry import ObjectRegistry, get_registry, normalize_identifier
+
+
+def test_identity_map():
+    session = mock.create_autospec(Session)
+    other_session = mock.create_autospec(Session)
+
+    role = create_role(session, "ANALYST")
+
+    assert create_role(session, "ANALYST") is role
+    # names are quoted in the objects' sql, so "analyst" is a different role
+    lower_role = create_role(session, "analyst")
+    assert lower_role is not role and lower_role.name == "analyst"
+    assert create_role(other_session, "ANALYST") is not role
+    assert create_schema_object(session, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE") is create_schema_object(
+        session, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE"
+    )
+    assert normalize_identifier('"My""Table"') == 'My"Table'
+
+    # the most recently used objects are kept alive, older objects nobody references are evicted
+    registry = ObjectRegistry(max_recent=1)
+    registry.get(Role, session, "ANALYST")
+    registry.get(Role, session, "LOADER")
+    gc.collect()
+    assert registry.lookup(Role, "ANALYST") is None
+    assert registry.lookup(Role, "LOADER") is not None
+
+    # a session and its registry are collected together
+    session_ref = weakref.ref(other_session)
+    del other_session
+    gc.collect()
+    assert session_ref() is None
+
+
+def test_memoized_grants_shared_and_invalidated():
+    session = mock.create_autospec(Session)
+    grants_df = pd.DataFrame({"privilege": ["USAGE"], "granted_on": ["WAREHOUSE"], "name": ["ETL_WH"]})
+    user_grants_df = pd.DataFrame({"role": ["ANALYST"]})
+
+    def query(session, sql, non_select=False):
+        return user_grants_df if "to user" in sql else grants_df
+
+    with mock.patch("ice_pick.account_object.snowpark_query", side_effect=query) as query_mock:
+        # the users share the memoized grants of the ANALYST role (nobody else holds the role)
+        User(session, "USER1").get_all_privileges()
+        User(session, "USER2").get_all_privileges()
+        role_queries = [call for call in query_mock.call_args_list if "to role ANALYST" in call.args[1]]
+        assert len(role_queries) == 1
+
+        query_mock.reset_mock()
+        warehouse = get_registry(session).get(Warehouse, session, "ETL_WH")
+        warehouse.get_grants_on()
+        warehouse.get_grants_on()
+        assert query_mock.call_count == 1
+
+        # alter warehouse + a fresh show grants
+        warehouse.set_auto_suspend(60)
+        warehouse.get_grants_on()
+        assert query_mock.call_count == 3
+
+        get_registry(session).invalidate(Role, "ANALYST")
+        get_registry(session).get(Role, session, "ANALYST").show_grants_to()
+        assert query_mock.call_count == 4
+
+
+def test_schema_object_grant_invalidates_unquoted_grantee():
+    session = mock.create_autospec(Session)
+    role = get_registry(session).get(Role, session, "ANALYST")
+    role._metadata.put("grants_to", pd.DataFrame())
+
+    with mock.patch("ice_pick.schema_object.snowpark_query", return_value=pd.DataFrame({"status": ["ok"]})):
+        create_schema_object(session, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE").grant(["SELECT"], "analyst")
+
+    assert len(role._metadata) == 0
@@ -3,10 +3,14 @@ from unittest import mock
 
 import pytest
 
+import pandas as pd
+
 
 from snowflake.snowpark import Session
 from ice_pick.schema_object import (
-    SchemaObject
+    SchemaObject,
+    DESCRIBE_COLUMNS,
+    get_descriptions_bulk,
 )
 
 
@@ -22,3 +26,129 @@ def test_table_init():
     assert table_obj.database == "TEST"
     assert table_obj.schema == "SCHEMA_1"
 
+
+
+@mock.patch("ice_pick.schema_object.snowpark_query")
+def test_metadata_is_memoized(snowpark_query_mock):
+    snowpark_query_mock.return_value = pd.DataFrame({
+        "DDL": ["create or replace table CUSTOMER (ID NUMBER);"], "LAST_ALTERED": [pd.Timestamp("2024-01-01")],
+    })
+    table_obj = SchemaObject(mock.create_autospec(Session), "TEST", "SCHEMA_1", "CUSTOMER", "TABLE")
+
+    assert table_obj.get_ddl() == table_obj.get_ddl()
+    table_obj.get_description()
+    table_obj.get_description()
+    assert snowpark_query_mock.call_count == 2
+
+    table_obj.get_ddl(refresh=True)
+    table_obj.get_ddl(fully_qualified=False)
+    assert snowpark_query_mock.call_count == 4
+
+
+@mock.patch("ice_pick.schema_object.snowpark_query")
+def test_metadata_max_age(snowpark_query_mock):
+    snowpark_query_mock.return_value = pd.DataFrame({"privilege": ["SELECT"]})
+    table_obj = SchemaObject(mock.create_autospec(Session), "TEST", "SCHEMA_1", "CUSTOMER", "TABLE", max_age=60)
+
+    with mock.patch("ice_pick.registry.time.monotonic", side_effect=[0, 30, 61, 61]):
+        table_obj.get_grants_on()
+        table_obj.get_grants_on()
+        table_obj.get_grants_on()
+
+    assert snowpark_query_mock.call_count == 2
+
+
+@mock.patch("ice_pick.schema_object.snowpark_query")
+def test_metadata_invalidated_on_grant_and_create(snowpark_query_mock):
+    snowpark_query_mock.return_value = pd.DataFrame({"status": ["ok"]})
+    table_obj = SchemaObject(mock.create_autospec(Session), "TEST", "SCHEMA_1", "CUSTOMER", "TABLE")
+
+    table_obj.get_grants_on()
+    table_obj.get_description()
+    table_obj.grant(["SELECT"], "ANALYST")
+    assert "grants_on" not in table_obj._metadata
+    assert "description" in table_obj._metadata
+
+    table_obj.create()
+    assert len(table_obj._metadata) == 0
+
+
+@mock.patch("ice_pick.schema_object.snowpark_query")
+def test_refresh(snowpark_query_mock):
+    altered = pd.Timestamp("2024-01-01")
+    snowpark_query_mock.side_effect = lambda session, sql, non_select=False: (
+        pd.DataFrame({"DDL": ["ddl"], "LAST_ALTERED": [altered]}) if "get_ddl" in sql
+        else pd.DataFrame({"LAST_ALTERED": [altered]})
+    )
+    table_obj = SchemaObject(mock.create_autospec(Session), "TEST", "SCHEMA_1", "CUSTOMER", "TABLE")
+
+    # the first fetch records LAST_ALTERED in the same query, so the first refresh can validate the ddl
+    table_obj.get_ddl()
+    assert snowpark_query_mock.call_count == 1
+    table_obj.get_grants_on()
+    assert not table_obj.refresh()
+    assert ("ddl", True) in table_obj._metadata
+    assert "INFORMATION_SCHEMA.TABLES" in snowpark_query_mock.call_args.args[1]
+    # grants don't change LAST_ALTERED
+    assert "grants_on" not in table_obj._metadata
+
+    altered = pd.Timestamp("2024-02-01")
+    assert table_obj.refresh()
+    assert len(table_obj._metadata) == 0
+
+    stage_obj = SchemaObject(mock.create_autospec(Session), "TEST", "SCHEMA_1", "MY_STREAM", "STREAM")
+    assert stage_obj.get_last_altered() is None
+
+
+columns_df = pd.DataFrame({
+    "TABLE_SCHEMA": ["SCHEMA_1", "SCHEMA_1", "SCHEMA_1"],
+    "TABLE_NAME": ["CUSTOMER", "CUSTOMER", "ORDERS"],
+    "COLUMN_NAME": ["ID", "CREATED", "NOTE"],
+    "ORDINAL_POSITION": [1, 2, 1],
+    "DATA_TYPE": ["NUMBER", "TIMESTAMP_NTZ", "TEXT"],
+    "IS_NULLABLE": ["NO", "YES", "YES"],
+    "COLUMN_DEFAULT": [None, "CURRENT_TIMESTAMP()", None],
+    "CHARACTER_MAXIMUM_LENGTH": [None, None, 16777216],
+    "NUMERIC_PRECISION": [38, None, None],
+    "NUMERIC_SCALE": [0, None, None],
+    "DATETIME_PRECISION": [None, 9, None],
+    "COMMENT": ["customer id", None, None],
+})
+
+
+def _fake_describe_query(session, sql, non_select=False):
+    if "show primary keys" in sql:
+        return pd.DataFrame({"schema_name": ["SCHEMA_1"], "table_name": ["CUSTOMER"], "column_name": ["ID"]})
+    if "show unique keys" in sql:
+        return pd.DataFrame()
+    return columns_df
+
+
+@mock.patch("ice_pick.schema_object.snowpark_query", side_effect=_fake_describe_query)
+def test_get_descriptions_bulk(snowpark_query_mock):
+    session_mock = mock.create_autospec(Session)
+    objs = [
+        SchemaObject(session_mock, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE"),
+        SchemaObject(session_mock, "TEST", "SCHEMA_1", "ORDERS", "VIEW"),
+        SchemaObject(session_mock, "TEST", "SCHEMA_1", "MY_PROC()", "PROCEDURE"),
+    ]
+
+    with pytest.warns(UserWarning):
+        descriptions = get_descriptions_bulk(
+            session_mock, objs + [SchemaObject(session_mock, "TEST", "SCHEMA_1", "DROPPED", "TABLE")]
+        )
+
+    assert list(descriptions) == ["TEST.SCHEMA_1.CUSTOMER", "TEST.SCHEMA_1.ORDERS"]
+    customer_df = descriptions["TEST.SCHEMA_1.CUSTOMER"]
+    assert list(customer_df.columns) == DESCRIBE_COLUMNS
+    assert customer_df["type"].tolist() == ["NUMBER(38,0)", "TIMESTAMP_NTZ(9)"]
+    assert customer_df["null?"].tolist() == ["N", "Y"]
+    assert customer_df["primary key"].tolist() == ["Y", "N"]
+    assert customer_df["unique key"].tolist() == ["N", "N"]
+    assert descriptions["TEST.SCHEMA_1.ORDERS"]["type"].tolist() == ["VARCHAR(16777216)"]
+
+    # the columns and keys are queried once for the database, and the descriptions are memoized on the objects
+    assert snowpark_query_mock.call_count == 3
+    assert any("INFORMATION_SCHEMA.COLUMNS" in call.args[1] for call in snowpark_query_mock.call_args_list)
+    assert objs[0].get_description().equals(customer_df)
+    assert snowpark_query_mock.call_count == 3
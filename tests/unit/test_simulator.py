@@ -0,0 +1,71 @@
+import pytest
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from ice_pick.simulator import WhatIfSimulator, WarehouseConfig, config_grid, _fifo_starts
+
+
+def _query_df(n_queries: int = 40) -> pd.DataFrame:
+    # bursts of 10 queries every 10 minutes, each running 60 seconds on a SMALL warehouse
+    start_times = [
+        pd.Timestamp("2023-01-01") + pd.Timedelta(minutes=10 * (i // 10), seconds=i % 10)
+        for i in range(n_queries)
+    ]
+    return pd.DataFrame({
+        "QUERY_ID": [f"q{i}" for i in range(n_queries)],
+        "START_TIME": start_times,
+        "EXECUTION_TIME": 60_000,
+        "WAREHOUSE_SIZE": "Small",
+        "BYTES_SCANNED": 1e9,
+        "BYTES_SPILLED_TO_LOCAL_STORAGE": [1e9 if i == 0 else 0 for i in range(n_queries)],
+        "BYTES_SPILLED_TO_REMOTE_STORAGE": 0,
+    })
+
+
+def test_fifo_starts_matches_event_simulation():
+    rng = np.random.default_rng(0)
+    arrivals = np.sort(rng.exponential(1, 500).cumsum())
+    durations = rng.exponential(10, 500)
+
+    free_at = [-np.inf] * 4
+    expected = []
+    for arrival, duration in zip(arrivals, durations):
+        start = max(arrival, heapq.heappop(free_at))
+        heapq.heappush(free_at, start + duration)
+        expected.append(start)
+
+    np.testing.assert_allclose(_fifo_starts(arrivals, durations, 4), expected)
+
+
+def test_simulate_queueing_and_credits():
+    simulator = WhatIfSimulator(_query_df())
+
+    single = simulator.simulate(WarehouseConfig("SMALL", auto_suspend=60))
+    # 10 queries per burst with 8 slots, 2 queries per burst queue
+    assert single["queued_queries"] == 8
+    assert single["spilling_queries"] == 1
+
+    multi = simulator.simulate(WarehouseConfig("SMALL", max_cluster_count=2, auto_suspend=60))
+    assert multi["queued_queries"] == 0
+    assert multi["credits"] > single["credits"]
+
+    larger = simulator.simulate(WarehouseConfig("MEDIUM", auto_suspend=60))
+    assert larger["spilling_queries"] == 0
+    assert larger["latency_p50_s"] < single["latency_p50_s"]
+
+
+def test_evaluate_config_grid():
+    simulator = WhatIfSimulator(_query_df())
+    summary_df = simulator.evaluate(config_grid(["XSMALL", "SMALL", "LARGE"], [1, 2], [60, 600]))
+
+    assert len(summary_df) == 12
+    assert summary_df["credits"].is_monotonic_increasing
+
+    queries_df = simulator.simulate_queries(WarehouseConfig("SMALL"))
+    assert (queries_df["SIMULATED_START_TIME"] >= queries_df["START_TIME"]).all()
+
+    with pytest.raises(ValueError):
+        WarehouseConfig("SMALL", min_cluster_count=2, max_cluster_count=1)
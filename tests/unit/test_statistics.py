@@ -0,0 +1,111 @@
+from unittest import mock
+
+import pytest
+
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.schema_object import SchemaObject
+from ice_pick.statistics import (
+    StatisticsCache,
+    get_table_statistics,
+    get_statistics_bulk,
+    _profile_sql,
+)
+
+
+altered = pd.Timestamp("2023-01-01 00:00:00")
+
+columns_df = pd.DataFrame({
+    "TABLE_SCHEMA": "SCHEMA_1",
+    "TABLE_NAME": "CUSTOMER",
+    "COLUMN_NAME": ["ID", "NAME", "ATTRS"],
+    "DATA_TYPE": ["NUMBER", "TEXT", "VARIANT"],
+    "ORDINAL_POSITION": [1, 2, 3],
+    "TABLE_TYPE": "BASE TABLE",
+    "LAST_ALTERED": altered,
+})
+
+profile_df = pd.DataFrame([{
+    "ROW_COUNT": 10,
+    "NULL_COUNT_0": 0, "APPROX_DISTINCT_0": 10, "MIN_0": "1", "MAX_0": "10", "P25_0": 3, "P50_0": 5, "P75_0": 8,
+    "NULL_COUNT_1": 5, "APPROX_DISTINCT_1": 4, "MIN_1": "a", "MAX_1": "d",
+    "NULL_COUNT_2": 10,
+}])
+
+
+def fake_query(metadata_df):
+    def query(session, sql, non_select=False):
+        return metadata_df if "INFORMATION_SCHEMA" in sql else profile_df
+    return query
+
+
+def test_profile_sql_single_pass():
+    profile_sql = _profile_sql("TEST", "SCHEMA_1", "CUSTOMER", columns_df, sample=1, seed=7)
+
+    assert profile_sql.count("from ") == 1
+    assert 'approx_percentile("ID", 0.5) as P50_0' in profile_sql
+    assert 'approx_percentile("NAME"' not in profile_sql
+    assert 'min("ATTRS")' not in profile_sql
+    assert 'count_if("ATTRS" is null) as NULL_COUNT_2' in profile_sql
+    assert "tablesample system (1) seed (7)" in profile_sql
+
+
+def test_get_table_statistics_reshape_and_cache():
+    session = mock.create_autospec(Session)
+    cache = StatisticsCache()
+
+    with mock.patch("ice_pick.statistics.snowpark_query", side_effect=fake_query(columns_df)) as query_mock:
+        statistics_df = get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+        assert query_mock.call_count == 2
+
+        # unchanged LAST_ALTERED -> only the metadata query runs
+        get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+        assert query_mock.call_count == 3
+
+    assert statistics_df.loc["NAME", "NULL_FRACTION"] == pytest.approx(0.5)
+    assert statistics_df.loc["ID", "P50"] == 5
+    assert pd.isna(statistics_df.loc["ATTRS", "MIN"])
+
+    altered_df = columns_df.assign(LAST_ALTERED=altered + pd.Timedelta(hours=1))
+    with mock.patch("ice_pick.statistics.snowpark_query", side_effect=fake_query(altered_df)) as query_mock:
+        get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+        assert query_mock.call_count == 2
+
+
+def test_get_table_statistics_views_not_cached():
+    session = mock.create_autospec(Session)
+    cache = StatisticsCache()
+    view_df = columns_df.assign(TABLE_TYPE="VIEW")
+
+    with mock.patch("ice_pick.statistics.snowpark_query", side_effect=fake_query(view_df)) as query_mock:
+        get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+        get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", cache=cache)
+
+    # the view is profiled every time
+    assert query_mock.call_count == 4
+    assert len(cache) == 0
+
+
+def test_get_statistics_bulk_skips_unsupported():
+    session = mock.create_autospec(Session)
+    objects = [
+        SchemaObject(session, "TEST", "SCHEMA_1", "CUSTOMER", "TABLE"),
+        SchemaObject(session, "TEST", "SCHEMA_1", "MISSING", "TABLE"),
+        SchemaObject(session, "TEST", "SCHEMA_1", "LOAD()", "PROCEDURE"),
+    ]
+
+    with mock.patch("ice_pick.statistics.snowpark_query", side_effect=fake_query(columns_df)):
+        with pytest.warns(UserWarning):
+            statistics = get_statistics_bulk(session, objects, cache=StatisticsCache())
+
+    assert list(statistics) == ["TEST.SCHEMA_1.CUSTOMER"]
+
+
+def test_get_statistics_invalid_input():
+    session = mock.create_autospec(Session)
+
+    with pytest.raises(ValueError):
+        get_table_statistics(session, "TEST", "SCHEMA_1", "CUSTOMER", sample=0)
+    with pytest.raises(ValueError):
+        SchemaObject(session, "TEST", "SCHEMA_1", "LOAD()", "PROCEDURE").get_statistics()
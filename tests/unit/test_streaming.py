@@ -0,0 +1,56 @@
+from unittest import mock
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from snowflake.snowpark import Session
+from ice_pick.account_object import Warehouse
+from ice_pick.streaming import (
+    GroupedRollup,
+    aggregate_stream,
+    hourly_rollup,
+    warehouse_rollup,
+)
+
+
+rng = np.random.default_rng(0)
+history_df = pd.DataFrame({
+    "WAREHOUSE_NAME": rng.choice(["COMPUTE_WH", "ETL_WH", "BI_WH"], 1000),
+    "START_TIME": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 3600 * 24, 1000), unit="s"),
+    "EXECUTION_TIME": rng.integers(0, 10000, 1000),
+})
+
+
+def test_chunked_rollups_match_full_group_by():
+    chunks = [history_df.iloc[i:i + 37] for i in range(0, len(history_df), 37)]
+
+    results = aggregate_stream(iter(chunks), {
+        "warehouse": warehouse_rollup({"EXECUTION_TIME": ["sum", "mean", "max", "count"]}),
+        "hourly": hourly_rollup({"EXECUTION_TIME": ["min"]}, by=["WAREHOUSE_NAME"]),
+    })
+
+    expected_df = history_df.groupby("WAREHOUSE_NAME")["EXECUTION_TIME"].agg(["sum", "mean", "max", "count"])
+    pd.testing.assert_frame_equal(
+        results["warehouse"], expected_df.add_prefix("EXECUTION_TIME_"), check_dtype=False
+    )
+
+    expected_hourly = history_df.groupby(
+        ["WAREHOUSE_NAME", history_df["START_TIME"].dt.floor("h")]
+    )["EXECUTION_TIME"].min()
+    assert results["hourly"]["EXECUTION_TIME_min"].tolist() == expected_hourly.tolist()
+
+
+def test_rollup_validates_aggregations():
+    with pytest.raises(ValueError):
+        GroupedRollup(["WAREHOUSE_NAME"], {"EXECUTION_TIME": ["median"]})
+
+
+def test_query_history_stream():
+    Session_mock = mock.create_autospec(Session)
+    Session_mock.sql.return_value.to_pandas_batches.return_value = iter([history_df.head(2), history_df.tail(2)])
+
+    chunks = Warehouse(Session_mock, "COMPUTE_WH").query_history(24, 0, stream=True)
+
+    assert [len(chunk) for chunk in chunks] == [2, 2]
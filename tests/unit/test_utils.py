@@ -0,0 +1,373 @@
+from unittest import mock
+import json
+import sys
+from decimal import Decimal
+from datetime import date
+
+import pytest
+
+import snowflake.snowpark as snowpark
+from snowflake.snowpark.functions import col
+from snowflake.snowpark import Session
+from snowflake.snowpark.mock import patch as mock_patch, ColumnEmulator, ColumnType
+from snowflake.snowpark.types import (
+    StructType,
+    StructField,
+    IntegerType,
+    LongType,
+    FloatType,
+    DoubleType,
+    DecimalType,
+    StringType,
+    DateType,
+    TimestampType,
+    NullType,
+)
+
+from ice_pick.utils import (
+    concat_standalone,
+    melt_standalone,
+    pivot_standalone,
+    DummyEncoder,
+    isna_standalone,
+    null_profile_standalone,
+    DistinctValueCache,
+    _parse_distinct_rows,
+    _promote_types,
+    _merge_schemas,
+    _local_rows,
+)
+
+
+@pytest.fixture(scope="module")
+def local_session():
+    session = Session.builder.config("local_testing", True).create()
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("left, right, expected", [
+    (IntegerType(), IntegerType(), IntegerType()),
+    (IntegerType(), LongType(), LongType()),
+    (IntegerType(), FloatType(), DoubleType()),
+    (IntegerType(), DecimalType(10, 2), DecimalType(38, 2)),
+    (NullType(), StringType(), StringType()),
+    (StringType(10), StringType(20), StringType(20)),
+    (DateType(), TimestampType(), TimestampType()),
+    (IntegerType(), StringType(), StringType()),
+])
+def test_promote_types(left, right, expected):
+    assert _promote_types(left, right) == expected
+
+
+def test_concat_standalone(local_session):
+    schema_1 = StructType([StructField("a", IntegerType()), StructField("b", StringType())])
+    schema_2 = StructType([StructField("a", FloatType()), StructField("c", StringType())])
+    schema_3 = StructType([StructField("c", StringType()), StructField("d", StringType())])
+
+    df_1 = local_session.create_dataframe([[1, "snow"], [3, "flake"]], schema_1)
+    df_2 = local_session.create_dataframe([[2.0, "ice"]], schema_2)
+    df_3 = local_session.create_dataframe([["testing_d", "testing_f"]], schema_3)
+
+    merged_schema = _merge_schemas([df_1, df_2, df_3])
+    assert list(merged_schema) == ["A", "B", "C", "D"]
+    assert merged_schema["A"] == DoubleType()
+
+    union_df = concat_standalone(local_session, [df_1, df_2, df_3])
+    assert [field.datatype for field in union_df.schema.fields] == [
+        DoubleType(), StringType(), StringType(), StringType()
+    ]
+
+    union_pd_df = union_df.to_pandas()
+    assert union_pd_df["A"].tolist()[:3] == [1.0, 3.0, 2.0]
+    assert union_pd_df["D"].tolist()[-1] == "testing_f"
+    assert union_pd_df["B"].isna().sum() == 2
+
+    with pytest.raises(ValueError):
+        concat_standalone(local_session, [df_1], union_method="nested")
+
+
+def test_concat_standalone_many_inputs(local_session):
+    schema = StructType([StructField("a", IntegerType())])
+    dfs = [local_session.create_dataframe([[i]], schema) for i in range(33)]
+
+    union_df = concat_standalone(local_session, dfs)
+
+    assert sorted(union_df.to_pandas()["A"].tolist()) == list(range(33))
+
+
+def test_concat_standalone_local_engine(local_session):
+    schema_1 = StructType([StructField("a", IntegerType()), StructField("b", DecimalType(10, 2))])
+    schema_2 = StructType([StructField("a", DoubleType()), StructField("b", StringType()), StructField("c", DateType())])
+    df_1 = local_session.create_dataframe([[1, Decimal("1.5")], [2, Decimal("2")]], schema_1)
+    df_2 = local_session.create_dataframe([[2.5, "ice", date(2023, 1, 1)], [None, None, None]], schema_2)
+
+    assert _local_rows(df_1) == [(1, Decimal("1.50")), (2, Decimal("2.00"))]
+    assert _local_rows(df_1.filter(col("a") > 1)) is None
+    assert _local_rows(df_1.select((col("a") + 1).alias("a"), col("b"))) is None
+    # Snowpark internals that moved disable the local engine instead of failing
+    with mock.patch.dict(sys.modules, {"snowflake.snowpark._internal.analyzer.snowflake_plan_node": None}):
+        assert _local_rows(df_1) is None
+
+    local_df = concat_standalone(local_session, [df_1, df_2], engine="local")
+    snowflake_df = concat_standalone(local_session, [df_1, df_2], engine="snowflake")
+
+    assert local_df.schema == snowflake_df.schema
+    assert local_df.collect() == snowflake_df.collect()
+
+    # a transformed input is not local, auto falls back to the snowflake union
+    with mock.patch("ice_pick.utils._concat_local") as concat_local_mock:
+        concat_standalone(local_session, [df_1.filter(col("a") > 1), df_2])
+    concat_local_mock.assert_not_called()
+
+    with pytest.raises(ValueError):
+        concat_standalone(local_session, [df_1], engine="pandas")
+
+
+def test_melt_standalone_local_engine(local_session):
+    schema = StructType([
+        StructField("A", StringType()), StructField("B", IntegerType()), StructField("C", FloatType())
+    ])
+    df = local_session.create_dataframe([["a", 1, 2.0], ["b", 3, None]], schema)
+
+    with mock.patch.object(snowpark.DataFrame, "unpivot", autospec=True) as unpivot_mock:
+        melt_df = melt_standalone(local_session, df, ["A"], ["B", "C"], include_nulls=False)
+    unpivot_mock.assert_not_called()
+
+    assert [(field.name, field.datatype) for field in melt_df.schema.fields] == [
+        ("A", StringType()), ("VARIABLE", StringType()), ("VALUE", DoubleType())
+    ]
+    assert [tuple(row) for row in melt_df.collect()] == [("a", "B", 1.0), ("a", "C", 2.0), ("b", "B", 3.0)]
+
+
+def test_melt_standalone_local_engine_variable_names(local_session):
+    schema = StructType([StructField("a", StringType()), StructField("x", IntegerType()), StructField('"y"', IntegerType())])
+    df = local_session.create_dataframe([["a", 1, 2], ["b", 3, None]], schema)
+
+    # the union path keeps value_vars as given: both engines run for real
+    local_df = melt_standalone(local_session, df, ["a"], ["x", '"y"'], method="union", engine="local")
+    snowflake_df = melt_standalone(local_session, df, ["a"], ["x", '"y"'], method="union", engine="snowflake")
+    assert sorted(map(tuple, local_df.collect()), key=str) == sorted(map(tuple, snowflake_df.collect()), key=str)
+
+    # UNPIVOT (not supported by local testing) returns the resolved names of the unpivoted columns,
+    # which are mapped back to value_vars
+    unpivot_df = local_session.create_dataframe(
+        [["a", "X", 1], ["a", "y", 2], ["b", "X", 3]],
+        StructType([StructField("a", StringType()), StructField("variable", StringType()), StructField("value", LongType())]),
+    )
+    with mock.patch.object(snowpark.DataFrame, "unpivot", return_value=unpivot_df):
+        unpivot_df = melt_standalone(
+            local_session, df, ["a"], ["x", '"y"'], include_nulls=False, method="unpivot", engine="snowflake"
+        )
+    union_df = melt_standalone(
+        local_session, df, ["a"], ["x", '"y"'], include_nulls=False, method="union", engine="snowflake"
+    )
+    local_df = melt_standalone(local_session, df, ["a"], ["x", '"y"'], include_nulls=False, engine="local")
+
+    assert unpivot_df.schema.names == union_df.schema.names
+    expected = sorted(map(tuple, union_df.collect()), key=str)
+    assert sorted(map(tuple, unpivot_df.collect()), key=str) == expected
+    assert sorted(map(tuple, local_df.collect()), key=str) == expected
+    assert sorted(row[1] for row in expected) == ['"y"', "x", "x"]
+
+
+def test_local_rows_recognizes_create_dataframe(local_session):
+    # guards the plan introspection against Snowpark changes: when it stops recognizing
+    # create_dataframe plans, engine="auto" silently falls back to Snowflake
+    schema = StructType([
+        StructField("A", StringType()), StructField("B", LongType()), StructField("C", DecimalType(10, 2)),
+        StructField("D", DateType()), StructField("E", TimestampType()),
+    ])
+    df = local_session.create_dataframe([["a", 1, Decimal("1.5"), date(2023, 1, 1), None]], schema)
+
+    assert _local_rows(df) == [("a", 1, Decimal("1.50"), date(2023, 1, 1), None)]
+
+
+def test_melt_standalone_unpivot(local_session):
+    schema = StructType([
+        StructField("A", StringType()), StructField("B", IntegerType()), StructField("C", FloatType())
+    ])
+    df = local_session.create_dataframe([["a", 1, 2.0], ["b", 3, None]], schema)
+
+    # local testing doesn't support UNPIVOT
+    with mock.patch.object(snowpark.DataFrame, "unpivot", autospec=True) as unpivot_mock:
+        melt_standalone(local_session, df, ["A"], ["B", "C"], engine="snowflake")
+
+    projected_df, value_name, var_name, value_vars = unpivot_mock.call_args[0]
+    assert (value_name, var_name, value_vars) == ("value", "variable", ["B", "C"])
+    assert unpivot_mock.call_args[1] == {"include_nulls": True}
+    # a single projection with the value columns cast to the common type
+    assert [field.datatype for field in projected_df.schema.fields] == [StringType(), DoubleType(), DoubleType()]
+
+
+def test_melt_standalone_union_fallback(local_session):
+    schema = StructType([
+        StructField("A", StringType()), StructField("B", IntegerType()), StructField("C", StringType())
+    ])
+    df = local_session.create_dataframe([["a", 1, "x"], ["b", None, "y"]], schema)
+
+    with pytest.raises(ValueError):
+        melt_standalone(local_session, df, ["A"], ["B", "C"], method="unpivot")
+
+    melt_df = melt_standalone(local_session, df, ["A"], ["B", "C"])
+    assert [field.name for field in melt_df.schema.fields] == ["A", "VARIABLE", "VALUE"]
+    assert len(melt_df.to_pandas()) == 4
+
+    melt_pd_df = melt_standalone(local_session, df, ["A"], ["B", "C"], include_nulls=False).to_pandas()
+    assert sorted(melt_pd_df["VALUE"].tolist()) == ["1", "x", "y"]
+
+
+@pytest.fixture(scope="module")
+def local_pivot_session(local_session):
+    # the local testing PIVOT emulation raises a KeyError for explicit pivot values with pandas 3
+    # (it loses the index column names), even for a plain DataFrame.pivot
+    schema = StructType([StructField("I", StringType()), StructField("C", StringType()), StructField("V", IntegerType())])
+    probe_df = local_session.create_dataframe([["x", "a", 1]], schema)
+    try:
+        probe_df.pivot("C", ["a"]).sum("V").collect()
+    except KeyError:
+        pytest.skip("Snowpark local testing can't pivot explicit values with this pandas version")
+
+    return local_session
+
+
+def test_distinct_value_cache(local_session):
+    schema = StructType([StructField("PRODUCT", StringType()), StructField("SALES", IntegerType())])
+    df = local_session.create_dataframe([["b", 1], ["a", 2], ["a", 3]], schema)
+
+    # discovery uses grouping sets, which local testing doesn't support (see test_parse_distinct_rows)
+    cache = DistinctValueCache()
+    with mock.patch.object(
+        DistinctValueCache, "_discover", return_value={"PRODUCT": ["a", "b"]}
+    ) as discover_mock:
+        assert cache.get(df, ["PRODUCT"], 10) == {"PRODUCT": ["a", "b"]}
+        # complete values are reused for a smaller cap, refresh rediscovers
+        assert cache.get(df, ["PRODUCT"], 1) == {"PRODUCT": ["a", "b"]}
+        cache.get(df, ["PRODUCT"], 10, refresh=True)
+
+    assert discover_mock.call_count == 2
+
+
+def test_pivot_standalone(local_pivot_session):
+    schema = StructType([
+        StructField("REGION", StringType()), StructField("PRODUCT", StringType()), StructField("SALES", IntegerType())
+    ])
+    df = local_pivot_session.create_dataframe([["east", "b", 1], ["east", "a", 2], ["west", "a", 3]], schema)
+
+    pivot_df = pivot_standalone(
+        local_pivot_session, df, "REGION", "PRODUCT", "SALES", aggfunc="sum", pivot_values=["a", "b"], fill_value=0
+    )
+
+    assert pivot_df.columns == ["REGION", '"a"', '"b"']
+    assert sorted(map(tuple, pivot_df.collect())) == [("east", 2, 1), ("west", 3, 0)]
+
+    with pytest.raises(ValueError):
+        pivot_standalone(local_pivot_session, df, "REGION", "PRODUCT", "SALES", aggfunc="median", pivot_values=["a"])
+
+
+def test_pivot_standalone_discovered_values(local_pivot_session):
+    schema = StructType([StructField("I", StringType()), StructField("C", IntegerType()), StructField("V", IntegerType())])
+    df = local_pivot_session.create_dataframe([["x", 5, 1], ["x", 4, 2], ["y", 3, 3], ["y", 2, 4]], schema)
+
+    with mock.patch.object(DistinctValueCache, "_discover", return_value={"C": [5, 4, 3, 2]}):
+        with pytest.warns(UserWarning):
+            pivot_df = pivot_standalone(
+                local_pivot_session, df, "I", "C", "V", aggfunc="sum", max_columns=3, cache=DistinctValueCache()
+            )
+
+    # the 3 most frequent values, sorted
+    assert pivot_df.columns == ["I", '"3"', '"4"', '"5"']
+    assert sorted(map(tuple, pivot_df.collect()), key=str) == [("x", None, 2, 1), ("y", 3, None, None)]
+
+
+def test_parse_distinct_rows():
+    # grouping sets ((I), (C)): grouping id 1 for I rows, 2 for C rows
+    rows = [("x", None, 5, 1, 1), (None, "a", 3, 2, 2), (None, "b", 7, 2, 1), (None, None, 9, 2, 3), ("y", None, 2, 1, 2)]
+
+    assert _parse_distinct_rows(rows, ["I", "C"]) == {"I": ["x", "y"], "C": ["b", "a"]}
+
+
+def test_discover_ranks_nulls_last(local_session):
+    schema = StructType([StructField("I", StringType()), StructField("C", StringType())])
+    df = local_session.create_dataframe([["x", "a"]], schema)
+    # the grouping sets aggregate (not supported by local testing): the null C group is the most frequent
+    counts_df = local_session.create_dataframe(
+        [["x", None, 5, 1], [None, "a", 3, 2], [None, "b", 7, 2], [None, None, 9, 2]],
+        StructType([
+            StructField("I", StringType()), StructField("C", StringType()),
+            StructField("__COUNT", LongType()), StructField("__GROUPING_ID", LongType()),
+        ]),
+    )
+    grouped_mock = mock.Mock()
+    grouped_mock.agg.return_value = counts_df
+
+    with mock.patch.object(snowpark.DataFrame, "group_by_grouping_sets", return_value=grouped_mock):
+        discovered = DistinctValueCache._discover(df, ["I", "C"], 1)
+
+    # max_values + 1 values, so the overflow of C is detected
+    assert discovered == {"I": ["x"], "C": ["b", "a"]}
+
+
+def test_dummy_encoder(local_session):
+    schema = StructType([StructField("ID", IntegerType()), StructField("COLOR", StringType())])
+    train_df = local_session.create_dataframe([[1, "red"], [2, "blue"], [3, None], [4, "green"]], schema)
+    score_df = local_session.create_dataframe([[5, "blue"], [6, "purple"]], schema)
+
+    # local testing doesn't support the grouping sets discovery query, transform runs for real
+    with mock.patch.object(
+        DistinctValueCache, "_discover", return_value={"COLOR": ["red", "blue", "green"]}
+    ) as discover_mock:
+        encoder = DummyEncoder(["COLOR"], top_k=2).fit(train_df, cache=DistinctValueCache())
+
+    discover_mock.assert_called_once_with(train_df, ["COLOR"], 2)
+    assert encoder.feature_names == ["COLOR_blue", "COLOR_red", "COLOR_other"]
+
+    train_pd_df = encoder.transform(train_df).to_pandas()
+    assert train_pd_df.columns.tolist() == ["ID", "COLOR_blue", "COLOR_red", "COLOR_other"]
+    assert train_pd_df["COLOR_other"].tolist() == [0, 0, 0, 1]
+
+    # a reloaded encoder produces the same columns without discovery
+    score_pd_df = DummyEncoder.from_dict(encoder.to_dict()).transform(score_df).to_pandas()
+    assert score_pd_df.columns.tolist() == train_pd_df.columns.tolist()
+    assert score_pd_df[["COLOR_blue", "COLOR_other"]].values.tolist() == [[1, 0], [0, 1]]
+
+    with pytest.raises(ValueError):
+        DummyEncoder(["COLOR"]).transform(score_df)
+
+
+def test_dummy_encoder_json_round_trip_dates(local_session):
+    schema = StructType([StructField("ID", IntegerType()), StructField("DAY", DateType())])
+    df = local_session.create_dataframe([[1, date(2023, 1, 1)], [2, date(2023, 1, 2)], [3, date(2023, 1, 1)]], schema)
+
+    with mock.patch.object(
+        DistinctValueCache, "_discover", return_value={"DAY": [date(2023, 1, 1), date(2023, 1, 2)]}
+    ):
+        encoder = DummyEncoder(["DAY"]).fit(df, cache=DistinctValueCache())
+
+    reloaded = DummyEncoder.from_dict(json.loads(json.dumps(encoder.to_dict())))
+
+    assert reloaded.categories_ == {"DAY": [date(2023, 1, 1), date(2023, 1, 2)]}
+    assert reloaded.transform(df).collect() == encoder.transform(df).collect()
+
+
+@mock_patch("count_if")
+def mock_count_if(column: ColumnEmulator) -> ColumnEmulator:
+    return ColumnEmulator(data=[int(column.fillna(False).astype(bool).sum())], sf_type=ColumnType(LongType(), False))
+
+
+def test_isna_and_null_profile(local_session):
+    schema = StructType([StructField("COLOR", StringType()), StructField("N", IntegerType())])
+    df = local_session.create_dataframe([["red", 1], [None, 2], [None, None], ["blue", 4]], schema)
+
+    isna_pd_df = isna_standalone(local_session, df).to_pandas()
+    assert isna_pd_df.columns.tolist() == ["COLOR", "N"]
+    assert isna_pd_df["COLOR"].tolist() == [False, True, True, False]
+
+    with mock.patch.object(snowpark.DataFrame, "agg", wraps=df.agg) as agg_mock:
+        profile_df = null_profile_standalone(local_session, df)
+
+    # a single aggregate query for every column
+    agg_mock.assert_called_once()
+    assert profile_df["null_count"].to_dict() == {"COLOR": 2, "N": 1}
+    assert profile_df.loc["COLOR", "null_fraction"] == 0.5
+    assert profile_df["row_count"].tolist() == [4, 4]